@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+自适应阈值模块 - 用指数加权的流式统计跟踪中心注视时的偏移基线，随姿势和光照的缓慢变化平移上下注视阈值
+
+每个样本只做常数次标量运算，不需要暂停追踪重新校准。
+"""
+
+import math
+
+
+class AdaptiveThresholds:
+    """中心注视偏移基线的在线估计
+
+    set_baseline() 设定基准阈值（默认配置或校准结果），中心区宽度在整个会话中保持不变。
+    update() 只接收被分类为中心注视的样本（用户在阅读），按时间常数 time_constant 秒做指数加权，
+    得到偏移的均值和方差；均值相对基准中点的漂移（限制在 max_shift 以内）整体平移上下阈值。
+    离当前均值超过 outlier_sigma 个标准差的样本（眨眼、扫视）不参与统计。
+    前 warmup 个样本只积累统计，不移动阈值。
+    """
+
+    def __init__(self, time_constant: float = 30.0, max_shift: float = 0.004, warmup: int = 30,
+                 outlier_sigma: float = 3.0):
+        self.time_constant = time_constant
+        self.max_shift = max_shift
+        self.warmup = warmup
+        self.outlier_sigma = outlier_sigma
+        self.base_top = 0.0
+        self.base_bottom = 0.0
+        self.reset()
+
+    def set_baseline(self, bottom_threshold: float, top_threshold: float):
+        """设定基准阈值并清空统计"""
+        self.base_bottom = bottom_threshold
+        self.base_top = top_threshold
+        self.reset()
+
+    def reset(self):
+        self.mean = (self.base_top + self.base_bottom) / 2
+        self.variance = 0.0
+        self.samples = 0
+        self.rejected = 0
+        self.last_timestamp = None
+
+    @property
+    def shift(self) -> float:
+        """当前基线相对基准中点的漂移（已限幅）"""
+        if self.samples < self.warmup:
+            return 0.0
+        drift = self.mean - (self.base_top + self.base_bottom) / 2
+        return max(-self.max_shift, min(self.max_shift, drift))
+
+    @property
+    def top_threshold(self) -> float:
+        return self.base_top + self.shift
+
+    @property
+    def bottom_threshold(self) -> float:
+        return self.base_bottom + self.shift
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def update(self, offset_y: float, timestamp: float):
+        """加入一个中心注视样本（timestamp 为秒）"""
+        if self.last_timestamp is None or timestamp <= self.last_timestamp:
+            dt = 0.0
+        else:
+            dt = timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+
+        delta = offset_y - self.mean
+        if self.samples >= self.warmup and self.variance > 0 and \
+                delta * delta > self.outlier_sigma * self.outlier_sigma * self.variance:
+            self.rejected += 1
+            return
+        self.samples += 1
+        if self.samples <= self.warmup:
+            # 预热阶段用累积平均（Welford），基线不受初始值影响
+            alpha = 1.0 / self.samples
+        else:
+            alpha = 1.0 - math.exp(-dt / self.time_constant)
+        # 指数加权均值和方差的增量更新
+        self.mean += alpha * delta
+        self.variance = (1.0 - alpha) * (self.variance + alpha * delta * delta)
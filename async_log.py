@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+异步日志模块 - 热路径只把 (类别, 格式串, 参数) 放进环形缓冲区，
+由后台线程负责格式化和写出；每个类别可以单独开关、抽样和限速
+"""
+
+import atexit
+import sys
+import threading
+import time
+from collections import deque
+
+import config
+
+# 日志类别
+LOG_GAZE = 'gaze'          # 每帧的眼睛偏移
+LOG_CLASSIFY = 'classify'  # 注视位置分类
+LOG_STATUS = 'status'      # 主循环的周期性状态
+LOG_GESTURE = 'gesture'    # 手势/趋势检测
+LOG_SCROLL = 'scroll'      # 开始/停止滚动
+
+
+class LogCategory:
+    """一个日志类别的开关、抽样和限速状态"""
+
+    __slots__ = ('name', 'enabled', 'sample_every', 'rate', 'burst', 'tokens', 'last_refill',
+                 'seen', 'emitted', 'suppressed')
+
+    def __init__(self, name: str, enabled: bool = True, sample_every: int = 1, rate: float = 0.0):
+        self.name = name
+        self.enabled = enabled
+        self.sample_every = max(1, int(sample_every))  # 每 N 条只保留 1 条
+        self.rate = rate  # 每秒最多条数，0 表示不限速
+        self.burst = max(1.0, rate)  # 令牌桶容量
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.seen = 0        # 调用次数（开启时）
+        self.emitted = 0     # 放入缓冲区的条数
+        self.suppressed = 0  # 被抽样或限速丢掉的条数
+
+
+class AsyncLogger:
+    """异步日志
+
+    缓冲区是 collections.deque，append/popleft 本身是线程安全的，热路径不需要加锁。
+    格式串使用 str.format 语法，只在后台线程中才会格式化，所以被关闭、抽样或限速丢掉的
+    日志只花一次字典查找和几次整数运算。缓冲区满时最旧的记录被覆盖，并计入 dropped。
+    """
+
+    def __init__(self, capacity: int = 1024, flush_interval: float = 0.05, stream=None):
+        self.capacity = capacity
+        self.ring = deque(maxlen=capacity)
+        self.flush_interval = flush_interval
+        self.stream = stream
+        self.categories = {}
+        self.dropped = 0
+        self.stop_event = threading.Event()
+        self.write_lock = threading.Lock()
+        self.thread = None
+
+    def configure(self, name: str, enabled: bool = True, sample_every: int = 1, rate: float = 0.0):
+        """设置某个类别的开关、抽样间隔和限速（条/秒）"""
+        self.categories[name] = LogCategory(name, enabled, sample_every, rate)
+
+    def set_enabled(self, name: str, enabled: bool):
+        """开关某个类别"""
+        category = self.categories.get(name)
+        if category is None:
+            self.configure(name, enabled)
+        else:
+            category.enabled = enabled
+
+    def is_enabled(self, name: str) -> bool:
+        """类别是否开启；参数本身计算代价较大时先用它判断"""
+        category = self.categories.get(name)
+        return category is None or category.enabled
+
+    def log(self, name: str, message: str, *args) -> bool:
+        """记录一条日志，返回是否被放入缓冲区；未配置的类别不抽样也不限速"""
+        category = self.categories.get(name)
+        if category is not None:
+            if not category.enabled:
+                return False
+            category.seen += 1
+            if category.sample_every > 1 and category.seen % category.sample_every:
+                category.suppressed += 1
+                return False
+            if category.rate > 0:
+                now = time.monotonic()
+                tokens = min(category.burst, category.tokens + (now - category.last_refill) * category.rate)
+                category.last_refill = now
+                if tokens < 1.0:
+                    category.tokens = tokens
+                    category.suppressed += 1
+                    return False
+                category.tokens = tokens - 1.0
+            category.emitted += 1
+
+        if len(self.ring) == self.capacity:
+            self.dropped += 1
+        self.ring.append((message, args))
+        if self.thread is None:
+            self.start()
+        return True
+
+    def start(self):
+        """启动后台写出线程（第一次记录日志时自动启动）"""
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='AsyncLogger', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """格式化并写出缓冲区中的所有记录"""
+        with self.write_lock:
+            lines = []
+            ring = self.ring
+            while True:
+                try:
+                    message, args = ring.popleft()
+                except IndexError:
+                    break
+                try:
+                    lines.append(message.format(*args) if args else message)
+                except Exception as e:
+                    lines.append(f"日志格式化出错: {message!r} {args!r} ({e})")
+            if not lines:
+                return
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+
+    def stop(self):
+        """停止后台线程并写出剩余记录"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.flush()
+
+    def get_stats(self) -> dict:
+        """各类别的记录/丢弃统计"""
+        return {
+            'dropped': self.dropped,
+            'categories': {name: {'enabled': c.enabled, 'seen': c.seen, 'emitted': c.emitted,
+                                  'suppressed': c.suppressed}
+                           for name, c in self.categories.items()},
+        }
+
+
+_logger = None
+
+
+def get_logger() -> AsyncLogger:
+    """进程内共享的日志实例，类别设置取自 config.LOG_CATEGORIES"""
+    global _logger
+    if _logger is None:
+        _logger = AsyncLogger(config.LOG_BUFFER_SIZE, config.LOG_FLUSH_INTERVAL)
+        for name, settings in config.LOG_CATEGORIES.items():
+            _logger.configure(name, **settings)
+        atexit.register(_logger.stop)
+    return _logger
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试脚本
+
+用法：
+  python benchmark.py scales --video 录像.mp4    # 比较不同推理分辨率的延迟和精度
+  python benchmark.py keyframe --video 录像.mp4  # 比较关键帧+光流跟踪与逐帧推理
+  python benchmark.py filter --landmarks session.npy  # 比较注视滤波器的跳变次数和滞后
+  python benchmark.py headpose --video 录像.mp4  # 头部姿态估计与补偿的每帧开销
+  python benchmark.py landmarks                  # 比较逐属性与向量化关键点计算的耗时
+  python benchmark.py scroll --rates 20 60 120   # 各滚动节拍频率的节拍抖动、事件数和CPU占用
+  python benchmark.py pipeline --source 录像.mp4 --json result.json  # 完整流程各阶段延迟
+  python benchmark.py alloc --source 录像.mp4    # 每帧各阶段的Python/NumPy内存分配
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import config
+from async_log import get_logger
+from eye_tracker import EyeTracker
+from frame_capture import CapturedFrame
+from frame_source import PACING_FAST, open_frame_source
+from gaze_filter import GAZE_FILTERS
+from instrumentation import (COUNTER_SCROLL_STARTS, COUNTER_SCROLL_STOPS, COUNTER_THREAD_SPAWNS, STAGE_DISPLAY,
+                             STAGE_FILTER, STAGE_HEAD_POSE)
+from landmark_recording import load_landmark_recording, recorded_point_count
+from landmarks import LandmarkExtractor
+from main import EyeScrollController
+from screen_controller import ScreenController
+from scroll_backends import RecordingBackend
+from velocity_control import CONTROL_MODES
+
+
+def load_frames(video_path, max_frames):
+    """读取录像中的帧（预先解码，避免解码时间计入推理延迟）"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"✗ 无法打开录像: {video_path}")
+        return []
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        # 与主程序一致，推理使用原始画面（关键点在提取时镜像）
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def percentile_ms(values, q):
+    """计算百分位数（毫秒）"""
+    if len(values) == 0:
+        return 0.0
+    return float(np.percentile(values, q) * 1000)
+
+
+def run_tracker(frames, scale, keyframe_interval=1, tracker=None):
+    """用指定推理缩放比例和关键帧间隔跑一遍所有帧，返回每帧延迟和注视偏移"""
+    # 每个档位使用新的追踪器，避免FaceMesh内部跟踪状态互相影响
+    tracker = tracker or EyeTracker()
+    tracker.set_inference_scale(scale)
+    tracker.set_keyframe_interval(keyframe_interval)
+    latencies = []
+    offsets = []
+    for frame in frames:
+        start = time.perf_counter()
+        result = tracker.get_eye_position(frame)
+        latencies.append(time.perf_counter() - start)
+        offsets.append(tracker.last_gaze_direction if result else None)
+    return np.array(latencies), offsets
+
+
+def mute_hot_path_logs():
+    """只比较推理本身，关闭热路径日志"""
+    logger = get_logger()
+    for name in config.LOG_CATEGORIES:
+        logger.set_enabled(name, False)
+
+
+def bench_scales(args):
+    """推理分辨率档位基准：每个档位的延迟和相对全分辨率的注视偏移误差"""
+    frames = load_frames(args.video, args.max_frames)
+    if not frames:
+        return False
+    mute_hot_path_logs()
+    height, width = frames[0].shape[:2]
+    print(f"录像: {args.video}, {len(frames)} 帧, {width}x{height}")
+
+    # 以全分辨率的结果作为参考
+    _, reference = run_tracker(frames, 1.0)
+    ref_detected = sum(1 for offset in reference if offset is not None)
+
+    print(f"{'scale':>6} {'size':>10} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'detect':>7} {'err_y mean':>11} {'err_y p95':>10}")
+    for scale in args.scales:
+        latencies, offsets = run_tracker(frames, scale)
+        errors = [abs(offset[1] - ref[1]) for offset, ref in zip(offsets, reference)
+                  if offset is not None and ref is not None]
+        detected = sum(1 for offset in offsets if offset is not None)
+        err_mean = float(np.mean(errors)) if errors else float('nan')
+        err_p95 = float(np.percentile(errors, 95)) if errors else float('nan')
+        size = f"{int(width * scale)}x{int(height * scale)}"
+        print(f"{scale:>6.2f} {size:>10} {latencies.mean() * 1000:>8.2f} {percentile_ms(latencies, 50):>8.2f} "
+              f"{percentile_ms(latencies, 95):>8.2f} {detected:>3}/{ref_detected:<3} {err_mean:>11.6f} {err_p95:>10.6f}")
+    print("注：误差为注视垂直偏移 offset_y 与全分辨率结果的绝对差")
+    return True
+
+
+def bench_keyframe(args):
+    """关键帧推理基准：每个关键帧间隔的FaceMesh调用次数、CPU时间、延迟和相对逐帧推理的注视偏移误差"""
+    frames = load_frames(args.video, args.max_frames)
+    if not frames:
+        return False
+    mute_hot_path_logs()
+    print(f"录像: {args.video}, {len(frames)} 帧")
+
+    results = []
+    for interval in args.intervals:
+        tracker = EyeTracker()
+        cpu_start = time.process_time()
+        latencies, offsets = run_tracker(frames, config.INFERENCE_SCALE, interval, tracker)
+        cpu_time = time.process_time() - cpu_start
+        invocations = tracker.roi_stats['roi'] + tracker.roi_stats['full']
+        results.append((interval, latencies, offsets, cpu_time, invocations, tracker.roi_stats['flow']))
+
+    # 以逐帧推理（间隔1）的结果作为参考
+    reference = next((r[2] for r in results if r[0] == 1), None)
+    if reference is None:
+        _, reference = run_tracker(frames, config.INFERENCE_SCALE, 1)
+
+    print(f"{'interval':>8} {'face_mesh':>9} {'flow':>5} {'cpu ms/f':>9} {'mean ms':>8} {'p95 ms':>8} "
+          f"{'detect':>7} {'err_y mean':>11} {'err_y p95':>10}")
+    for interval, latencies, offsets, cpu_time, invocations, flow_frames in results:
+        errors = [abs(offset[1] - ref[1]) for offset, ref in zip(offsets, reference)
+                  if offset is not None and ref is not None]
+        detected = sum(1 for offset in offsets if offset is not None)
+        err_mean = float(np.mean(errors)) if errors else float('nan')
+        err_p95 = float(np.percentile(errors, 95)) if errors else float('nan')
+        print(f"{interval:>8} {invocations:>9} {flow_frames:>5} {cpu_time / len(frames) * 1000:>9.2f} "
+              f"{latencies.mean() * 1000:>8.2f} {percentile_ms(latencies, 95):>8.2f} "
+              f"{detected:>3}/{len(frames):<3} {err_mean:>11.6f} {err_p95:>10.6f}")
+    print("注：CPU时间包含FaceMesh内部线程；误差为注视垂直偏移 offset_y 与逐帧推理结果的绝对差")
+    return True
+
+
+def estimate_lag(raw, filtered, max_lag):
+    """用互相关估计滤波输出相对原始信号的滞后（帧）"""
+    raw = raw - raw.mean()
+    filtered = filtered - filtered.mean()
+    n = len(raw)
+    scores = [float(np.dot(raw[:n - lag], filtered[lag:])) for lag in range(min(max_lag, n - 1) + 1)]
+    return int(np.argmax(scores))
+
+
+def bench_filter(args):
+    """注视滤波基准：在关键点录制上比较各滤波器的位置跳变次数、滚动启停次数、滞后和每样本耗时"""
+    records, meta = load_landmark_recording(args.landmarks)
+    detected = records[records['detected']]
+    if len(detected) < 2:
+        print(f"✗ 录制中检测到面部的帧太少: {args.landmarks}")
+        return False
+    mute_hot_path_logs()
+    timestamps = detected['timestamp'].astype(np.float64)
+    frame_dt = float(np.median(np.diff(timestamps)))
+    print(f"关键点录制: {args.landmarks}, {len(detected)} 帧 (帧间隔 {frame_dt * 1000:.1f}ms)")
+
+    print(f"{'filter':>9} {'transitions':>11} {'dropped':>7} {'scroll start/stop':>17} {'threads':>7} {'lag ms':>7} "
+          f"{'us/sample':>9}")
+    for name in args.filters:
+        backend = RecordingBackend()  # 不实际滚动
+        controller = EyeScrollController(scroll_backend=backend)
+        controller.control_mode = args.control_mode
+        tracker = controller.eye_tracker
+        tracker.set_gaze_filter(name)
+        count = recorded_point_count(meta, tracker.extractor.indices)
+        if count is None:
+            print(f"✗ 录制文件的关键点索引与当前代码不一致: {args.landmarks}")
+            return False
+        # 旧录制没有头部姿态关键点时不做补偿
+        tracker.head_pose_enabled = tracker.head_pose_enabled and count == len(tracker.extractor.indices)
+        points = np.zeros((len(tracker.extractor.indices), 2))
+        recorded = points[:count]
+        raw_y = np.zeros(len(detected))
+        filtered_y = np.zeros(len(detected))
+        transitions = 0
+        dropped = 0  # 闭眼或置信度不足、没有进入分类的帧
+        last_position = None
+        for i, record in enumerate(detected):
+            np.copyto(recorded, record['points'])
+            eye_result = tracker.estimate_eye_position(points, timestamps[i])
+            raw_y[i] = tracker.last_raw_gaze_direction[1]
+            filtered_y[i] = tracker.last_gaze_direction[1]
+            if eye_result is None:
+                # 持续闭眼
+                dropped += 1
+                controller.stop_scrolling_if_needed()
+                continue
+            position, confidence = eye_result
+            if confidence < tracker.min_confidence:
+                dropped += 1
+                continue
+            transitions += last_position is not None and position != last_position
+            last_position = position
+            controller.process_eye_position(position, confidence, timestamps[i])
+        controller.screen_controller.close()
+
+        counters = controller.metrics.counters
+        lag_ms = estimate_lag(raw_y, filtered_y, args.max_lag) * frame_dt * 1000
+        filter_us = tracker.timer.stage_samples(STAGE_FILTER).mean() * 1e6
+        starts_stops = f"{counters[COUNTER_SCROLL_STARTS]}/{counters[COUNTER_SCROLL_STOPS]}"
+        print(f"{name:>9} {transitions:>11} {dropped:>7} {starts_stops:>17} {counters[COUNTER_THREAD_SPAWNS]:>7} "
+              f"{lag_ms:>7.1f} {filter_us:>9.2f}")
+    print("注：滞后为滤波后 offset_y 相对原始 offset_y 的互相关峰值位置，按帧间隔换算")
+    return True
+
+
+def bench_head_pose(args):
+    """头部姿态基准：在录像的关键点上重复估计头部姿态，统计每帧开销、姿态范围和补偿前后的 offset_y 波动"""
+    frames = load_frames(args.video, args.max_frames)
+    if not frames:
+        return False
+    mute_hot_path_logs()
+    tracker = EyeTracker()
+    height, width = frames[0].shape[:2]
+    samples = []
+    for frame in frames:
+        points = tracker.detect_landmarks(frame)
+        if points is not None:
+            samples.append(points.copy())
+    if not samples:
+        print("✗ 录像中没有检测到面部")
+        return False
+    print(f"录像: {args.video}, {len(frames)} 帧 (检测到面部 {len(samples)} 帧), {width}x{height}")
+
+    estimator = tracker.head_pose
+    pose_points = [tracker.extractor.group(points, 'head_pose') for points in samples]
+    latencies = np.zeros(len(samples) * args.repeat)
+    poses = np.zeros((len(samples), 2))
+    for r in range(args.repeat):
+        for i, points in enumerate(pose_points):
+            start = time.perf_counter()
+            pose = estimator.estimate(points, width, height)
+            latencies[r * len(samples) + i] = time.perf_counter() - start
+            if pose is not None:
+                poses[i] = pose
+
+    # 补偿前后的 offset_y（按帧间隔 1/CAMERA_FPS 计时）；每帧计算两次，关闭眨眼和置信度门控，
+    # 避免提前返回的帧留下上一帧的偏移，也避免两次调用推进不同的门控状态
+    raw_y = []
+    compensated_y = []
+    tracker.set_gaze_filter('none')
+    tracker.blink_detection = False
+    tracker.min_confidence = 0.0
+    for i, points in enumerate(samples):
+        tracker.head_pose_enabled = False
+        raw_result = tracker.estimate_eye_position(points, i / config.CAMERA_FPS)
+        raw = tracker.last_raw_gaze_direction[1]
+        tracker.head_pose_enabled = True
+        result = tracker.estimate_eye_position(points, i / config.CAMERA_FPS)
+        classified = ('top', 'center', 'bottom')
+        if raw_result is None or result is None or raw_result[0] not in classified or result[0] not in classified:
+            continue  # 没有完成分类的帧不会更新 last_raw_gaze_direction
+        raw_y.append(raw)
+        compensated_y.append(tracker.last_raw_gaze_direction[1])
+    if not raw_y:
+        print("✗ 没有可比较的帧")
+        return False
+    raw_y, compensated_y = np.array(raw_y), np.array(compensated_y)
+    total_us = tracker.timer.stage_samples(STAGE_HEAD_POSE).mean() * 1e6
+
+    pitch, yaw = np.degrees(poses[:, 0]), np.degrees(poses[:, 1])
+    print(f"solvePnP+角度: 平均 {latencies.mean() * 1e6:.1f}us, p50 {np.percentile(latencies, 50) * 1e6:.1f}us, "
+          f"p95 {np.percentile(latencies, 95) * 1e6:.1f}us; 含补偿的 head_pose 阶段: 平均 {total_us:.1f}us/帧")
+    print(f"俯仰角: {pitch.min():.1f}° ~ {pitch.max():.1f}°, 偏航角: {yaw.min():.1f}° ~ {yaw.max():.1f}°")
+    print(f"offset_y 标准差 ({len(raw_y)} 帧): 补偿前 {raw_y.std():.6f}, 补偿后 {compensated_y.std():.6f}")
+    return True
+
+
+def _legacy_center(landmarks, indices):
+    """旧实现：逐属性访问关键点并用Python列表求中心"""
+    x_coords = [landmarks.landmark[idx].x for idx in indices]
+    y_coords = [landmarks.landmark[idx].y for idx in indices]
+    return sum(x_coords) / len(x_coords), sum(y_coords) / len(y_coords)
+
+
+def _legacy_offsets(landmarks, tracker):
+    """旧实现的每帧计算量：虹膜中心两次、眼睛中心四次（get_eye_position 和 _calculate_gaze_direction 各算一遍）"""
+    left_iris = _legacy_center(landmarks, tracker.LEFT_IRIS)
+    right_iris = _legacy_center(landmarks, tracker.RIGHT_IRIS)
+    _legacy_center(landmarks, tracker.LEFT_EYE)
+    _legacy_center(landmarks, tracker.RIGHT_EYE)
+    left_eye = _legacy_center(landmarks, tracker.LEFT_EYE)
+    right_eye = _legacy_center(landmarks, tracker.RIGHT_EYE)
+    offset_x = ((left_iris[0] - left_eye[0]) + (right_iris[0] - right_eye[0])) / 2
+    offset_y = ((left_iris[1] - left_eye[1]) + (right_iris[1] - right_eye[1])) / 2
+    return offset_x, offset_y
+
+
+def _synthetic_landmarks(rng):
+    """生成与FaceMesh结果相同类型（protobuf）的随机关键点（478个点）"""
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y in rng.random((478, 2)):
+        landmarks.landmark.add(x=float(x), y=float(y), z=0.0)
+    return landmarks
+
+
+def _time_per_call(func, samples, repeat):
+    """对每个样本调用func，返回平均每次调用耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sample in samples:
+            func(sample)
+    return (time.perf_counter() - start) / (repeat * len(samples)) * 1e6
+
+
+def bench_landmarks(args):
+    """关键点提取微基准：旧的逐属性路径 vs 预分配数组 + 向量化计算"""
+    tracker = EyeTracker  # 只用到关键点索引，不需要初始化FaceMesh
+    extractor = LandmarkExtractor(tracker.LEFT_EYE, tracker.RIGHT_EYE, tracker.LEFT_IRIS, tracker.RIGHT_IRIS,
+                                  {'face_bounds': tracker.FACE_BOUNDS})
+
+    rng = np.random.default_rng(0)
+    samples = [_synthetic_landmarks(rng) for _ in range(args.samples)]
+
+    # 先确认两条路径结果一致
+    for sample in samples:
+        legacy = _legacy_offsets(sample, tracker)
+        features = extractor.compute_features(extractor.extract(sample))
+        if not np.allclose(legacy, features.mean_offset):
+            print("✗ 向量化结果与旧实现不一致")
+            return False
+
+    def vectorized(sample):
+        return extractor.compute_features(extractor.extract(sample))
+
+    legacy_us = _time_per_call(lambda sample: _legacy_offsets(sample, tracker), samples, args.repeat)
+    extract_us = _time_per_call(extractor.extract, samples, args.repeat)
+    vectorized_us = _time_per_call(vectorized, samples, args.repeat)
+    print(f"逐属性旧实现:       {legacy_us:8.2f} us/帧")
+    print(f"向量化（提取）:     {extract_us:8.2f} us/帧")
+    print(f"向量化（提取+计算）: {vectorized_us:8.2f} us/帧 ({legacy_us / vectorized_us:.2f}x)")
+    return True
+
+
+def bench_scroll(args):
+    """滚动输出基准：每个节拍频率下持续滚动一段时间，统计节拍抖动、滚动事件、滚动总量和进程CPU时间"""
+    print(f"{'rate Hz':>7} {'ticks':>6} {'events':>6} {'total':>6} {'jitter p50/p95/max ms':>22} {'cpu ms/s':>8}")
+    for rate in args.rates:
+        backend = RecordingBackend()
+        controller = ScreenController(backend)
+        controller.set_scroll_speed(config.SCROLL_SPEED)
+        controller.set_scroll_interval(config.SCROLL_INTERVAL)
+        controller.max_scroll_speed = config.MAX_SCROLL_SPEED
+        controller.acceleration = config.ACCELERATION
+        controller.set_tick_rate(rate)
+
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        # 向上、向下各滚动一半时间，中间停止一次（包括惯性减速）
+        controller.start_scroll_up()
+        time.sleep(args.duration / 2)
+        controller.stop_all_scrolling()
+        time.sleep(0.3)
+        controller.start_scroll_down()
+        time.sleep(args.duration / 2)
+        controller.close()
+        elapsed = time.perf_counter() - start
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+
+        ticks = controller.get_tick_stats()
+        events = backend.get_stats()
+        jitter = f"{ticks['jitter_p50_ms']:.2f}/{ticks['jitter_p95_ms']:.2f}/{ticks['jitter_max_ms']:.2f}"
+        total = events['total_up'] + events['total_down']
+        print(f"{rate:>7g} {ticks['ticks']:>6} {events['events']:>6} {total:>6} {jitter:>22} "
+              f"{cpu_ms / elapsed:>8.2f}")
+    print("注：滚动总量应与节拍频率无关；抖动为节拍实际时间相对截止时间的延迟")
+    return True
+
+
+def bench_pipeline(args):
+    """完整流程基准：在录像上逐帧串行执行所有阶段，输出各阶段延迟分布和整体吞吐量"""
+    backend = RecordingBackend()  # 不实际滚动
+    controller = EyeScrollController(args.source, PACING_FAST, scroll_backend=backend)
+    source = open_frame_source(args.source, PACING_FAST)
+    if not source.is_opened():
+        print(f"✗ 无法打开帧源: {source.describe()}")
+        return False
+
+    timer = controller.timer
+    timer.reset()
+    frames = 0
+    detected = 0
+    start = time.perf_counter()
+    # 调试日志照常记录（计入各阶段耗时），连同其他输出一起写到空设备
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while frames < args.max_frames:
+            ret, frame, source_time = source.read()
+            if not ret:
+                break
+            captured = CapturedFrame(frame, time.monotonic(), frames, source_time)
+            packet = controller._inference_stage(captured)
+            packet = controller._control_stage(packet)
+            detected += packet.position is not None
+
+            rendered = controller._render_preview(packet, 0.0)  # 翻转和绘制的耗时在内部统计
+            t = time.perf_counter()
+            if args.display:
+                cv2.imshow(config.PREVIEW_WINDOW_NAME, rendered)
+                cv2.waitKey(1)
+                timer.lap(STAGE_DISPLAY, t)
+            source.release_frame(frame)
+            frames += 1
+        controller.log.flush()
+    elapsed = time.perf_counter() - start
+    controller.screen_controller.close()
+    source.release()
+    if args.display:
+        cv2.destroyAllWindows()
+
+    result = {
+        'source': source.describe(),
+        'frames': frames,
+        'detected': detected,
+        'wall_time_s': elapsed,
+        'throughput_fps': frames / elapsed if elapsed > 0 else 0.0,
+        'config': {
+            'inference_scale': controller.eye_tracker.inference_scale,
+            'face_roi': controller.eye_tracker.use_face_roi,
+            'debug_mode': config.DEBUG_MODE,
+        },
+        'stages': timer.summary(),
+        'scroll_output': controller.screen_controller.get_output_stats(),
+    }
+
+    print(f"帧源: {result['source']}, {frames} 帧 (检测到面部 {detected} 帧), "
+          f"用时 {elapsed:.2f}s, 吞吐量 {result['throughput_fps']:.1f} fps")
+    print(timer.format_summary())
+    output = result['scroll_output']
+    print(f"滚动输出: {output['events']} 次事件 (合计 {backend.get_stats()['total_up']} 上 / "
+          f"{backend.get_stats()['total_down']} 下), 延迟 p50 {output['latency_p50_ms']:.1f}ms, "
+          f"p95 {output['latency_p95_ms']:.1f}ms")
+    if args.json == '-':
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"JSON结果已保存: {args.json}")
+    return True
+
+
+def bench_alloc(args):
+    """每帧内存分配基准：用 tracemalloc 统计读帧、推理、控制、渲染各阶段的分配量
+
+    tracemalloc 能看到 Python 对象和 NumPy/OpenCV 返回数组的数据缓冲区（FaceMesh 内部的 C++ 分配不计）。
+    每个阶段记录执行期间的内存峰值相对阶段开始时的增量，即该阶段临时分配的最大字节数；
+    复用预分配缓冲区的阶段接近0，每帧新建整帧数组的阶段至少是一帧的大小。
+    """
+    backend = RecordingBackend()  # 不实际滚动
+    controller = EyeScrollController(args.source, PACING_FAST, scroll_backend=backend)
+    source = open_frame_source(args.source, PACING_FAST)
+    if not source.is_opened():
+        print(f"✗ 无法打开帧源: {source.describe()}")
+        return False
+    mute_hot_path_logs()
+
+    stages = ('read', 'inference', 'control', 'render')
+    allocated = {name: [] for name in stages}
+    net = []
+    frames = 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while frames < args.warmup + args.max_frames:
+            measuring = frames >= args.warmup  # 预热阶段创建FaceMesh、缓存叠加层和缓冲区，不计入
+            if measuring and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            frame_start = tracemalloc.get_traced_memory()[0] if measuring else 0
+
+            def measure(name, func, *func_args):
+                if not measuring:
+                    return func(*func_args)
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                result = func(*func_args)
+                allocated[name].append(tracemalloc.get_traced_memory()[1] - before)
+                return result
+
+            ret, frame, source_time = measure('read', source.read)
+            if not ret:
+                break
+            captured = CapturedFrame(frame, time.monotonic(), frames, source_time)
+            packet = measure('inference', controller._inference_stage, captured)
+            packet = measure('control', controller._control_stage, packet)
+            measure('render', controller._render_preview, packet, 0.0)
+            source.release_frame(frame)  # 与主程序一致，渲染完的帧归还给帧源复用
+            del frame, captured, packet
+            if measuring:
+                net.append(tracemalloc.get_traced_memory()[0] - frame_start)
+            frames += 1
+    tracemalloc.stop()
+    controller.screen_controller.close()
+    source.release()
+
+    measured = len(net)
+    if measured == 0:
+        print("✗ 帧数不足，没有可统计的帧")
+        return False
+    print(f"帧源: {source.describe()}, 预热 {args.warmup} 帧, 统计 {measured} 帧")
+    print(f"{'stage':>10} {'mean KB':>10} {'p50 KB':>10} {'max KB':>10}")
+    for name in stages:
+        values = np.array(allocated[name]) / 1024
+        print(f"{name:>10} {values.mean():>10.1f} {np.percentile(values, 50):>10.1f} {values.max():>10.1f}")
+    total = np.array([sum(values) for values in zip(*allocated.values())]) / 1024
+    print(f"{'total':>10} {total.mean():>10.1f} {np.percentile(total, 50):>10.1f} {total.max():>10.1f}")
+    print(f"每帧结束时仍被持有的内存增量: 平均 {np.mean(net) / 1024:.1f} KB")
+    print("注：各阶段为执行期间临时分配的峰值（KB），整帧 BGR 图像约为 宽x高x3 字节")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="眼球追踪性能基准测试")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scales_parser = subparsers.add_parser('scales', help="比较不同推理分辨率的延迟和精度")
+    scales_parser.add_argument('--video', required=True, help="录像文件路径")
+    scales_parser.add_argument('--scales', type=float, nargs='+', default=config.INFERENCE_SCALE_LADDER,
+                               help="要评估的缩放档位")
+    scales_parser.add_argument('--max-frames', type=int, default=300, help="最多使用的帧数")
+    scales_parser.set_defaults(func=bench_scales)
+
+    keyframe_parser = subparsers.add_parser('keyframe', help="比较关键帧+光流跟踪与逐帧推理的误差和CPU占用")
+    keyframe_parser.add_argument('--video', required=True, help="录像文件路径")
+    keyframe_parser.add_argument('--intervals', type=int, nargs='+', default=config.KEYFRAME_INTERVAL_LADDER,
+                                 help="要评估的关键帧间隔")
+    keyframe_parser.add_argument('--max-frames', type=int, default=300, help="最多使用的帧数")
+    keyframe_parser.set_defaults(func=bench_keyframe)
+
+    filter_parser = subparsers.add_parser('filter', help="在关键点录制上比较各注视滤波器的跳变次数和滞后")
+    filter_parser.add_argument('--landmarks', required=True, help="关键点录制文件（main.py --record-landmarks）")
+    filter_parser.add_argument('--filters', nargs='+', choices=list(GAZE_FILTERS), default=list(GAZE_FILTERS),
+                               help="要评估的滤波器")
+    filter_parser.add_argument('--control-mode', choices=CONTROL_MODES, default=config.CONTROL_MODE,
+                               help="控制模式（velocity 模式下的滚动启停次数为速度设定值过零的次数）")
+    filter_parser.add_argument('--max-lag', type=int, default=15, help="互相关搜索的最大滞后（帧）")
+    filter_parser.set_defaults(func=bench_filter)
+
+    head_pose_parser = subparsers.add_parser('headpose', help="测量头部姿态估计与补偿的每帧开销")
+    head_pose_parser.add_argument('--video', required=True, help="录像文件路径")
+    head_pose_parser.add_argument('--max-frames', type=int, default=300, help="最多使用的帧数")
+    head_pose_parser.add_argument('--repeat', type=int, default=20, help="重复次数")
+    head_pose_parser.set_defaults(func=bench_head_pose)
+
+    landmarks_parser = subparsers.add_parser('landmarks', help="比较逐属性与向量化关键点计算的耗时")
+    landmarks_parser.add_argument('--samples', type=int, default=100, help="假关键点样本数")
+    landmarks_parser.add_argument('--repeat', type=int, default=100, help="重复次数")
+    landmarks_parser.set_defaults(func=bench_landmarks)
+
+    scroll_parser = subparsers.add_parser('scroll', help="比较不同滚动节拍频率的抖动和CPU占用")
+    scroll_parser.add_argument('--rates', type=float, nargs='+', default=[20, config.SCROLL_TICK_RATE, 120],
+                               help="要评估的节拍频率 (Hz)")
+    scroll_parser.add_argument('--duration', type=float, default=2.0, help="每个频率的滚动时间（秒）")
+    scroll_parser.set_defaults(func=bench_scroll)
+
+    pipeline_parser = subparsers.add_parser('pipeline', help="在录像上测量完整流程各阶段的延迟分布")
+    pipeline_parser.add_argument('--source', required=True, help="录像文件或图片目录")
+    pipeline_parser.add_argument('--max-frames', type=int, default=1000, help="最多处理的帧数")
+    pipeline_parser.add_argument('--display', action='store_true', help="同时显示预览窗口（计入display阶段）")
+    pipeline_parser.add_argument('--json', metavar='PATH', help="输出JSON结果到文件，'-' 表示标准输出")
+    pipeline_parser.set_defaults(func=bench_pipeline)
+
+    alloc_parser = subparsers.add_parser('alloc', help="用 tracemalloc 统计完整流程每帧各阶段的内存分配")
+    alloc_parser.add_argument('--source', required=True, help="录像文件或图片目录")
+    alloc_parser.add_argument('--max-frames', type=int, default=200, help="统计的帧数")
+    alloc_parser.add_argument('--warmup', type=int, default=20, help="预热帧数（不计入统计）")
+    alloc_parser.set_defaults(func=bench_alloc)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
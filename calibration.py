@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+校准模块 - 依次注视屏幕上的多个目标，用稳健的最小二乘多项式拟合注视偏移到屏幕纵坐标的映射，
+并把结果保存为每个用户一份的校准档案，启动时直接加载
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+PROFILE_VERSION = 1
+
+# 默认校准目标：屏幕高度的比例（0 为顶部，1 为底部）
+DEFAULT_TARGETS = (0.5, 0.1, 0.3, 0.7, 0.9)
+
+
+def target_label(target_y: float) -> str:
+    """校准目标的中文描述"""
+    if target_y < 0.2:
+        return '顶部'
+    if target_y < 0.4:
+        return '中上部'
+    if target_y <= 0.6:
+        return '中心'
+    if target_y <= 0.8:
+        return '中下部'
+    return '底部'
+
+
+class CalibrationSession:
+    """多点校准会话
+
+    依次注视 targets 中的每个目标：切换目标后先丢弃 settle_samples 个样本（等待视线稳定），
+    再收集 samples_per_target 个样本。样本为注视方向 (offset_x, offset_y)，与注视分类使用的偏移一致。
+    """
+
+    def __init__(self, targets=DEFAULT_TARGETS, samples_per_target: int = 30, settle_samples: int = 15):
+        self.targets = tuple(targets)
+        self.samples_per_target = samples_per_target
+        self.settle_samples = settle_samples
+        total = len(self.targets) * samples_per_target
+        self.offsets = np.zeros((total, 2))
+        self.screen_y = np.zeros(total)
+        self.count = 0
+        self.target_index = 0
+        self.target_seen = 0  # 当前目标已收到的样本数（包括丢弃的）
+
+    @property
+    def done(self) -> bool:
+        return self.target_index >= len(self.targets)
+
+    @property
+    def current_target(self) -> Optional[float]:
+        """当前目标的屏幕纵坐标（屏幕高度的比例），完成后为 None"""
+        return None if self.done else self.targets[self.target_index]
+
+    @property
+    def progress(self) -> float:
+        """整体进度 0-1"""
+        per_target = self.settle_samples + self.samples_per_target
+        return min(1.0, (self.target_index * per_target + self.target_seen) / (len(self.targets) * per_target))
+
+    def add_sample(self, offset_x: float, offset_y: float) -> bool:
+        """加入一个样本，返回是否切换到了下一个目标"""
+        if self.done:
+            return False
+        self.target_seen += 1
+        if self.target_seen > self.settle_samples:
+            self.offsets[self.count] = (offset_x, offset_y)
+            self.screen_y[self.count] = self.targets[self.target_index]
+            self.count += 1
+        if self.target_seen >= self.settle_samples + self.samples_per_target:
+            self.target_index += 1
+            self.target_seen = 0
+            return True
+        return False
+
+
+def _design_matrix(offsets: np.ndarray, degree: int) -> np.ndarray:
+    """多项式特征：[1, oy, oy², ..., oy^degree, ox]"""
+    offsets = np.atleast_2d(offsets)
+    columns = [offsets[:, 1] ** power for power in range(degree + 1)]
+    columns.append(offsets[:, 0])
+    return np.stack(columns, axis=1)
+
+
+class CalibrationProfile:
+    """校准档案：注视偏移到屏幕纵坐标的映射，以及由此得到的注视分类阈值"""
+
+    def __init__(self, coefficients, degree: int, top_threshold: float, bottom_threshold: float,
+                 rms_error: float = 0.0, samples: int = 0, inliers: int = 0, created: float = None):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.degree = degree
+        self.top_threshold = top_threshold        # offset_y 大于该值为向上注视
+        self.bottom_threshold = bottom_threshold  # offset_y 小于该值为向下注视
+        self.rms_error = rms_error                # 内点的均方根误差（屏幕高度的比例）
+        self.samples = samples
+        self.inliers = inliers
+        self.created = time.time() if created is None else created
+
+    def predict(self, offsets) -> np.ndarray:
+        """注视偏移 (N, 2) 对应的屏幕纵坐标（屏幕高度的比例）"""
+        return _design_matrix(np.asarray(offsets, dtype=np.float64), self.degree) @ self.coefficients
+
+    def to_dict(self) -> dict:
+        return {
+            'version': PROFILE_VERSION,
+            'coefficients': self.coefficients.tolist(),
+            'degree': self.degree,
+            'top_threshold': self.top_threshold,
+            'bottom_threshold': self.bottom_threshold,
+            'rms_error': self.rms_error,
+            'samples': self.samples,
+            'inliers': self.inliers,
+            'created': self.created,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CalibrationProfile':
+        return cls(data['coefficients'], data['degree'], data['top_threshold'], data['bottom_threshold'],
+                   data.get('rms_error', 0.0), data.get('samples', 0), data.get('inliers', 0), data.get('created'))
+
+
+def fit_calibration(offsets: np.ndarray, screen_y: np.ndarray, degree: int = 2, top_fraction: float = 0.3,
+                    bottom_fraction: float = 0.7, outlier_threshold: float = 3.0,
+                    max_iterations: int = 5) -> Optional[CalibrationProfile]:
+    """拟合校准映射，失败时返回 None
+
+    用最小二乘拟合 screen_y ≈ f(offset)，f 为 offset_y 的 degree 次多项式加 offset_x 的线性项。
+    离群样本（眨眼、走神）先在每个目标内按偏移到中位数的距离剔除（它们的偏移远离其他样本，杠杆很大，
+    只看残差剔不掉），再在拟合时每轮按残差的中位数绝对偏差（MAD）剔除，直到内点不再变化。
+    分类阈值取映射在 top_fraction / bottom_fraction（屏幕高度的比例）处对应的 offset_y。
+    """
+    offsets = np.asarray(offsets, dtype=np.float64)
+    screen_y = np.asarray(screen_y, dtype=np.float64)
+    targets, groups = np.unique(screen_y, return_inverse=True)
+    if len(targets) < 2 or len(screen_y) < degree + 3:
+        return None
+
+    # 每个目标内：偏移到该目标中位数的距离超过 outlier_threshold 倍 MAD 的样本视为离群
+    inliers = np.ones(len(screen_y), dtype=bool)
+    for group in range(len(targets)):
+        members = groups == group
+        deviation = np.abs(offsets[members] - np.median(offsets[members], axis=0))
+        scale = np.maximum(1.4826 * np.median(deviation, axis=0), 1e-9)
+        inliers[members] = np.all(deviation <= outlier_threshold * scale, axis=1)
+    if inliers.sum() < degree + 3:
+        return None
+
+    design = _design_matrix(offsets, degree)
+    coefficients = None
+    for _ in range(max_iterations):
+        coefficients, *_ = np.linalg.lstsq(design[inliers], screen_y[inliers], rcond=None)
+        residuals = screen_y - design @ coefficients
+        mad = np.median(np.abs(residuals[inliers] - np.median(residuals[inliers])))
+        scale = max(1.4826 * mad, 1e-6)
+        updated = np.abs(residuals) <= outlier_threshold * scale
+        if updated.sum() < degree + 3 or np.array_equal(updated, inliers):
+            break
+        inliers = updated
+    residuals = screen_y[inliers] - design[inliers] @ coefficients
+    rms_error = float(np.sqrt(np.mean(residuals ** 2)))
+
+    # 在 offset_x 取中位数时，沿 offset_y 求映射的反函数；向上看 offset_y 增大，屏幕纵坐标应减小
+    offset_x = float(np.median(offsets[inliers, 0]))
+    low, high = np.percentile(offsets[inliers, 1], [0, 100])
+    margin = (high - low) * 0.1
+    grid = np.empty((512, 2))
+    grid[:, 0] = offset_x
+    grid[:, 1] = np.linspace(low - margin, high + margin, len(grid))
+    predicted = _design_matrix(grid, degree) @ coefficients
+    if np.any(np.diff(predicted) >= 0):
+        # 映射不单调（样本太少或噪声太大）时退化为线性拟合
+        if degree > 1:
+            return fit_calibration(offsets, screen_y, 1, top_fraction, bottom_fraction, outlier_threshold,
+                                   max_iterations)
+        return None
+    # np.interp 需要递增的横坐标，因此把网格反过来
+    top_threshold = float(np.interp(top_fraction, predicted[::-1], grid[::-1, 1]))
+    bottom_threshold = float(np.interp(bottom_fraction, predicted[::-1], grid[::-1, 1]))
+    return CalibrationProfile(coefficients, degree, top_threshold, bottom_threshold, rms_error,
+                              len(screen_y), int(inliers.sum()))
+
+
+def profile_path(name: str, directory: str) -> str:
+    """用户名对应的校准档案路径"""
+    return os.path.join(os.path.expanduser(directory), f"{name}.json")
+
+
+def save_profile(profile: CalibrationProfile, path: str):
+    """保存校准档案：先写临时文件再替换，写到一半中断时原档案保持完整"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(profile.to_dict(), f, indent=2)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def load_profile(path: str) -> Optional[CalibrationProfile]:
+    """加载校准档案，文件不存在、损坏或版本不符时返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != PROFILE_VERSION:
+            print(f"校准档案版本不符，已忽略: {path}")
+            return None
+        return CalibrationProfile.from_dict(data)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"⚠ 校准档案无法读取，已忽略: {path} ({e})")
+        return None
@@ -8,17 +8,69 @@ GAZE_THRESHOLD = 0.4        # 注视置信度阈值 (0.1-1.0)，降低以提高
 POSITION_HOLD_TIME = 0.3    # 位置保持时间 (秒)，降低以提高响应速度
 
 # 摄像头参数
+FRAME_SOURCE = 0            # 帧源：摄像头编号、录像文件路径或图片目录路径
 CAMERA_WIDTH = 640          # 摄像头宽度
 CAMERA_HEIGHT = 480         # 摄像头高度
 CAMERA_FPS = 30             # 摄像头帧率
+CAPTURE_BUFFER_SIZE = 1     # 采集环形缓冲区大小 (帧)，1表示只保留最新一帧
+CAPTURE_STATS_WINDOW = 300  # 帧龄统计窗口 (帧)
+FRAME_BUFFER_POOL = 10      # 最多保留的空闲帧缓冲区数量（处理完归还的帧），没有空闲缓冲区时分配新帧
+MIRROR_IMAGE = True         # 镜像显示：推理使用原始画面、关键点镜像，只有预览画面水平翻转
+
+# 面部ROI参数
+FACE_ROI_ENABLED = True     # 检测到面部后只在面部附近区域内推理
+FACE_ROI_PADDING = 0.3      # ROI边距 (面部宽高的比例)
+
+# 关键帧推理参数
+KEYFRAME_INTERVAL = 1       # 每N帧运行一次FaceMesh，其余帧用光流跟踪眼部关键点；1表示每帧都推理
+FLOW_WIN_SIZE = 15          # 光流窗口大小 (像素)
+FLOW_PYRAMID_LEVELS = 2     # 光流金字塔层数
+FLOW_MAX_FB_ERROR = 1.0     # 前向-后向误差上限 (像素)，超过的点视为跟踪失败
+FLOW_MIN_QUALITY = 0.8      # 跟踪成功的点比例低于该值时立即重新运行FaceMesh
+KEYFRAME_INTERVAL_LADDER = [1, 2, 3, 5]  # benchmark.py keyframe 评估的间隔
+
+# 关键点提取参数
+LANDMARK_BUFFER_POOL = 8    # 关键点数组缓冲池大小，需大于流水线中同时流动的帧数
+
+# 推理分辨率参数
+INFERENCE_SCALE = 1.0       # 送入FaceMesh的图像缩放比例 (0.1-1.0)，预览保持采集分辨率
+INFERENCE_SCALE_LADDER = [1.0, 0.75, 0.5, 0.35, 0.25]  # benchmark.py scales 评估的缩放档位
+
+# 流水线参数
+# 各队列的 (容量, 满时策略)，策略可选 'drop_oldest'、'drop_newest'、'block'
+# 采集 -> 推理 由采集线程的环形缓冲区承担，始终保留最新帧，容量见 CAPTURE_BUFFER_SIZE
+PIPELINE_QUEUES = {
+    'landmarks': (2, 'drop_oldest'),  # 推理 -> 控制
+    'render': (1, 'drop_oldest'),     # 控制 -> 预览渲染
+}
+PIPELINE_STATS_INTERVAL = 5.0  # 调试模式下输出流水线统计的间隔 (秒)
+
+# 指标导出参数
+METRICS_JSONL_PATH = None   # 定期追加指标快照的 JSON-lines 文件，None 表示不导出
+METRICS_JSONL_INTERVAL = 5.0  # JSON-lines 导出间隔 (秒)
+METRICS_HTTP_PORT = None    # Prometheus 文本格式的本地HTTP端口 (http://127.0.0.1:端口/metrics)，None 表示不启动
+
+# 无头模式：不创建预览窗口、不调用任何 HighGUI 函数，通过信号或本地控制套接字控制
+HEADLESS = False
+CONTROL_SOCKET_PATH = None  # 控制套接字路径（如 '~/.eye_scroll/control.sock'），None 表示不启动
 
 # 滚动参数
 SCROLL_SPEED = 3            # 基础滚动速度 (像素/次)
-SCROLL_INTERVAL = 0.05      # 滚动间隔 (秒)
+SCROLL_INTERVAL = 0.05      # 滚动间隔 (秒)，滚动速度和加速度以此为时间单位
+SCROLL_TICK_RATE = 60       # 滚动节拍频率 (Hz)，每个节拍最多发出一次滚动事件
+SCROLL_EASE_TIME = 0.15     # 接近目标速度时的缓出时间常数 (秒)
+SCROLL_MOMENTUM_DECAY = 0.1  # 停止滚动时的惯性衰减时间常数 (秒)，0 表示立即停止
 ADAPTIVE_SPEED = True       # 是否启用自适应速度
 MAX_SCROLL_SPEED = 8        # 最大滚动速度
+SCROLL_BACKEND = 'pyautogui'  # 滚动输出后端：'pyautogui'、'pynput' 或 'recording'（只记录，不滚动）
 ACCELERATION = 0.2          # 加速度
 
+# 控制模式：'gesture' 按 top/center/bottom 手势控制滚动；'velocity' 把注视偏移直接映射为滚动速度
+CONTROL_MODE = 'gesture'
+VELOCITY_SATURATION = 0.006  # 速度模式：超出中心区多少偏移时达到最大速度 (MAX_SCROLL_SPEED)
+VELOCITY_EXPONENT = 1.5      # 速度模式：传递曲线指数，大于1时小偏移对应的速度更低
+VELOCITY_DEAD_ZONE_SCALE = 1.0  # 速度模式：死区半宽相对中心注视区半宽的比例
+
 # 注视区域参数
 TOP_THRESHOLD = 0.3         # 顶部区域阈值 (屏幕高度的比例)
 BOTTOM_THRESHOLD = 0.7      # 底部区域阈值 (屏幕高度的比例)
@@ -26,16 +78,82 @@ BOTTOM_THRESHOLD = 0.7      # 底部区域阈值 (屏幕高度的比例)
 # 显示参数
 SHOW_PREVIEW = True         # 是否显示预览窗口
 PREVIEW_WINDOW_NAME = "Eye Tracking Control"
+CALIBRATION_WINDOW_NAME = "Eye Tracking Calibration"  # 校准时的全屏目标窗口
+PREVIEW_FPS = 15            # 预览窗口刷新频率 (帧/秒)，低于追踪帧率时跳过部分帧的绘制和显示；0 表示每帧都显示
 
 # 调试参数
 DEBUG_MODE = True           # 是否启用调试模式
 LOG_LEVEL = "INFO"          # 日志级别
+LOG_BUFFER_SIZE = 1024      # 异步日志环形缓冲区容量 (条)，满时覆盖最旧的记录
+LOG_FLUSH_INTERVAL = 0.05   # 后台线程写出日志的间隔 (秒)
+# 热路径日志类别：enabled 开关，sample_every 每N条保留1条，rate 每秒最多条数 (0为不限)
+LOG_CATEGORIES = {
+    'gaze': {'enabled': DEBUG_MODE, 'sample_every': 10, 'rate': 5.0},      # 每帧的眼睛偏移
+    'classify': {'enabled': DEBUG_MODE, 'sample_every': 10, 'rate': 5.0},  # 注视位置分类
+    'status': {'enabled': DEBUG_MODE, 'sample_every': 10, 'rate': 2.0},    # 位置/置信度/速度
+    'gesture': {'enabled': DEBUG_MODE, 'rate': 10.0},                      # 手势检测
+    'scroll': {'enabled': True, 'rate': 10.0},                             # 开始/停止滚动
+}
 
 # 校准参数
-CALIBRATION_MODE = False    # 是否启用校准模式
+CALIBRATION_MODE = False    # 启动时是否立即进入校准模式
+CALIBRATION_TARGETS = [0.5, 0.1, 0.3, 0.7, 0.9]  # 校准目标的屏幕纵坐标 (屏幕高度的比例，0 为顶部)
+CALIBRATION_SAMPLES_PER_TARGET = 30  # 每个目标收集的样本数
+CALIBRATION_SETTLE_SAMPLES = 15      # 切换目标后丢弃的样本数（等待视线稳定）
+CALIBRATION_POLY_DEGREE = 2          # 注视偏移到屏幕纵坐标映射的多项式次数
+CALIBRATION_PROFILE_DIR = '~/.eye_scroll/profiles'  # 校准档案目录，每个用户一个 JSON 文件
+CALIBRATION_PROFILE = 'default'      # 默认使用的校准档案名
 GAZE_OFFSET_MULTIPLIER = 4.5 # 注视偏移放大倍数 - 适当降低以减少过度灵敏
 
+# 注视偏移滤波参数：分类前对连续偏移做时域滤波，抑制抖动引起的位置跳变
+GAZE_FILTER = 'one_euro'    # 'one_euro'、'kalman' 或 'none'
+GAZE_FILTER_PARAMS = {
+    'one_euro': {'min_cutoff': 1.0, 'beta': 10.0, 'd_cutoff': 1.0},  # 截止频率 (Hz) 及速度增益
+    'kalman': {'process_noise': 0.1, 'measurement_noise': 2e-6},    # 加速度方差、测量噪声方差
+    'none': {},
+}
+
 # 针对Mac摄像头位于屏幕顶端的特性进行优化
-# 由于注视摄像头附近时实际上是在看屏幕顶部，我们调整阈值使其更符合这一特性
-GAZE_TOP_THRESHOLD = 0.0070 # 向上注视阈值 - 根据实际测试值调整，向上看时offset_y约为0.008-0.009
-GAZE_BOTTOM_THRESHOLD = 0.0080 # 向下注视阈值 - 根据实际测试值调整，向下看时offset_y约为0.009
+# 未校准时使用的注视偏移阈值 - 根据用户测试：看中间offset_y约为0.013，看上面约0.017，看下面约0.009
+# 加载校准档案或校准完成后，由校准结果替代
+GAZE_TOP_THRESHOLD = 0.015   # offset_y 大于该值为向上注视
+GAZE_BOTTOM_THRESHOLD = 0.009  # offset_y 小于该值为向下注视
+
+# 头部姿态补偿：用 solvePnP 估计头部俯仰角/偏航角，从注视偏移中扣除点头、转头造成的变化
+# pitch_gain 尚未用实测数据标定，默认关闭；开启前先用 `benchmark.py headpose` 确认补偿降低了偏移抖动
+HEAD_POSE_COMPENSATION = False
+HEAD_POSE_PARAMS = {
+    'pitch_gain': 0.02,      # 俯仰角每弧度对应的 offset_y 变化
+    'yaw_gain': 0.0,         # 偏航角每弧度对应的 offset_x 变化（offset_x 目前不参与分类）
+    'reference_time': 10.0,  # 参考姿态的指数加权时间常数 (秒)，慢于此的姿势变化由自适应阈值处理
+}
+
+# 眨眼检测：用每只眼睛的纵横比 (EAR) 判断睁眼/闭眼，闭眼的帧不参与注视分类和手势分析，
+# 只有一只眼睛有效时用另一只眼计算注视方向
+BLINK_DETECTION = True
+EYE_OPENNESS_PARAMS = {
+    'closed_ratio': 0.6,        # EAR 低于睁眼基线的该比例时视为闭眼/眯眼
+    'baseline_time': 10.0,      # 睁眼基线的指数加权时间常数 (秒)
+    'warmup': 15,               # 前几个样本用累积平均建立基线
+    'max_blink_duration': 0.5,  # 闭眼超过该时长 (秒) 不再视为眨眼，按未检测到眼睛处理（停止滚动）
+}
+
+# 注视置信度：各项分数的乘积，低于 GAZE_THRESHOLD 的帧不进入滤波、分类和手势历史。
+# 各 scale 为该项分数降到0.5时的偏差（按眼宽归一化）
+CONFIDENCE_PARAMS = {
+    'stability_scale': 0.08,   # 眼睛轮廓相对上一帧的形状变化
+    'contour_scale': 0.25,     # 虹膜中心到眼睛中心的距离
+    'agreement_scale': 0.1,    # 左右眼偏移之差
+    'single_eye_score': 0.8,   # 只有一只眼有效时的左右一致性分数
+    'max_gap': 0.2,            # 与上一帧间隔超过该时长 (秒) 时不计稳定性
+}
+MAX_UNCERTAIN_DURATION = 0.5  # 置信度持续低于阈值超过该时长 (秒) 后按未检测到眼睛处理（停止滚动）
+
+# 自适应阈值：阅读时跟踪中心注视偏移的缓慢漂移（姿势、光照变化），平移上下注视阈值
+ADAPTIVE_THRESHOLDS = True
+ADAPTIVE_THRESHOLD_PARAMS = {
+    'time_constant': 30.0,   # 指数加权时间常数 (秒)
+    'max_shift': 0.004,      # 阈值相对基准的最大平移量
+    'warmup': 30,            # 开始平移前需要的中心注视样本数
+    'outlier_sigma': 3.0,    # 偏离基线超过几个标准差的样本不参与统计
+}
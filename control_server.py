@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+控制接口模块 - 无头模式下通过本地 Unix 套接字接收控制命令（退出、校准、暂停、切换预览、查询状态）
+
+协议为每行一条文本命令，服务端对每条命令回复一行（'ok'、状态 JSON 或 'error: ...'）。
+也可以直接运行本模块发送命令：
+
+    python control_server.py --socket ~/.eye_scroll/control.sock calibrate
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from typing import Callable
+
+# 控制命令
+CMD_QUIT = 'quit'
+CMD_CALIBRATE = 'calibrate'
+CMD_PAUSE = 'pause'
+CMD_RESUME = 'resume'
+CMD_TOGGLE_PAUSE = 'toggle-pause'
+CMD_TOGGLE_PREVIEW = 'preview'
+CMD_STATUS = 'status'
+CONTROL_COMMANDS = (CMD_QUIT, CMD_CALIBRATE, CMD_PAUSE, CMD_RESUME, CMD_TOGGLE_PAUSE, CMD_TOGGLE_PREVIEW,
+                    CMD_STATUS)
+
+
+class ControlServer:
+    """在后台线程中监听本地 Unix 套接字，把收到的命令交给 handler(command) -> 回复文本
+
+    handler 在服务线程中调用，需要自行保证线程安全（EyeScrollController 只把命令放进队列，由主循环执行）。
+    """
+
+    def __init__(self, path: str, handler: Callable[[str], str]):
+        self.path = os.path.expanduser(path)
+        self.handler = handler
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        handler = self.handler
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    command = line.decode('utf-8', 'replace').strip()
+                    if not command:
+                        continue
+                    reply = handler(command)
+                    self.wfile.write((reply + '\n').encode('utf-8'))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._remove_stale_socket()
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        self.server.daemon_threads = True
+        os.chmod(self.path, 0o600)  # 只允许当前用户控制
+        self.thread = threading.Thread(target=self.server.serve_forever, name='ControlServer', daemon=True)
+        self.thread.start()
+
+    def _remove_stale_socket(self):
+        """删除上次异常退出留下的套接字文件
+
+        路径上是普通文件等非套接字，或者另一个实例仍在监听时抛出 OSError，不删除任何东西。
+        """
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(f"控制套接字路径已存在且不是套接字: {self.path}")
+        try:
+            send_command(self.path, CMD_STATUS, timeout=0.5)
+        except OSError:
+            os.unlink(self.path)  # 没有服务端应答，是遗留的套接字
+            return
+        raise OSError(f"另一个实例正在使用控制套接字: {self.path}")
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+
+def send_command(path: str, command: str, timeout: float = 2.0) -> str:
+    """向控制套接字发送一条命令，返回服务端的回复"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(os.path.expanduser(path))
+        client.sendall((command + '\n').encode('utf-8'))
+        reply = b''
+        while not reply.endswith(b'\n'):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+    return reply.decode('utf-8').strip()
+
+
+def main():
+    import config
+    parser = argparse.ArgumentParser(description="向运行中的眼球追踪控制发送命令")
+    parser.add_argument('--socket', default=config.CONTROL_SOCKET_PATH, help="控制套接字路径")
+    parser.add_argument('command', choices=CONTROL_COMMANDS, help="控制命令")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("未指定控制套接字（config.CONTROL_SOCKET_PATH 为空）")
+    try:
+        print(send_command(args.socket, args.command))
+    except OSError as e:
+        print(f"无法连接控制套接字 {args.socket}: {e}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -7,6 +7,7 @@
 import cv2
 import time
 from eye_tracker import EyeTracker
+from frame_source import open_frame_source
 from screen_controller import ScreenController
 
 def demo_eye_tracking():
@@ -21,15 +22,12 @@ def demo_eye_tracking():
     tracker = EyeTracker()
     print("✓ 眼球追踪器已创建")
     
-    # 初始化摄像头
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("✗ 无法打开摄像头")
+    # 初始化帧源（默认摄像头，可在 config.FRAME_SOURCE 中改为录像或图片目录）
+    source = open_frame_source()
+    if not source.is_opened():
+        print(f"✗ 无法打开帧源: {source.describe()}")
         return False
-    
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    print("✓ 摄像头初始化成功")
+    print(f"✓ 帧源初始化成功: {source.describe()}")
     print("请将面部对准摄像头，演示将开始...")
     print()
     
@@ -48,16 +46,15 @@ def demo_eye_tracking():
     position_count = {'top': 0, 'center': 0, 'bottom': 0}
     
     while True:
-        ret, frame = cap.read()
+        ret, frame, _ = source.read()
         if not ret:
             print("无法读取摄像头帧")
             break
             
-        # 翻转帧（镜像显示）
-        frame = cv2.flip(frame, 1)
-        
-        # 检测眼球位置
+        # 检测眼球位置（对原始画面推理，关键点已按镜像处理），再翻转帧用于镜像显示
         eye_result = tracker.get_eye_position(frame)
+        if tracker.mirror:
+            frame = cv2.flip(frame, 1)
         
         if eye_result:
             position, confidence = eye_result
@@ -99,7 +96,7 @@ def demo_eye_tracking():
             break
     
     # 清理资源
-    cap.release()
+    source.release()
     cv2.destroyAllWindows()
     
     # 显示统计结果
@@ -171,15 +168,12 @@ def demo_integration():
     
     print("✓ 组件创建完成")
     
-    # 初始化摄像头
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("✗ 无法打开摄像头")
+    # 初始化帧源（默认摄像头，可在 config.FRAME_SOURCE 中改为录像或图片目录）
+    source = open_frame_source()
+    if not source.is_opened():
+        print(f"✗ 无法打开帧源: {source.describe()}")
         return False
-    
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    print("✓ 摄像头初始化成功")
+    print(f"✓ 帧源初始化成功: {source.describe()}")
     
     # 设置控制参数
     controller.set_scroll_speed(3)
@@ -201,12 +195,13 @@ def demo_integration():
     position_start_time = 0
     
     while True:
-        ret, frame = cap.read()
+        ret, frame, _ = source.read()
         if not ret:
             break
             
-        frame = cv2.flip(frame, 1)
         eye_result = tracker.get_eye_position(frame)
+        if tracker.mirror:
+            frame = cv2.flip(frame, 1)
         
         if eye_result:
             position, confidence = eye_result
@@ -259,7 +254,7 @@ def demo_integration():
             break
     
     # 清理资源
-    cap.release()
+    source.release()
     cv2.destroyAllWindows()
     controller.stop_all_scrolling()
     
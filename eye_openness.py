@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+睁眼程度模块 - 用每只眼睛的纵横比（EAR）和自适应阈值判断睁眼/闭眼，检测眨眼事件
+
+眨眼和眯眼时虹膜偏移会大幅跳动，闭眼的帧不参与注视分类和手势分析；
+只有一只眼睛有效时（眯起一只眼、被遮挡），注视方向只用另一只眼计算。
+"""
+
+import math
+
+# 眼睛事件
+EVENT_BLINK = 'blink'              # 短暂闭眼后重新睁开
+EVENT_EYES_CLOSED = 'eyes_closed'  # 闭眼时间超过 max_blink_duration
+
+
+class EyeOpennessMonitor:
+    """左右眼睁开程度的在线判断
+
+    每只眼睛分别维护睁眼时 EAR 的基线（前 warmup 个样本为累积平均，之后按时间常数 baseline_time 秒
+    指数加权），EAR 低于 closed_ratio * 基线时该眼视为无效（闭合或眯起）。无效的样本不更新基线，
+    因此眨眼不会把基线拉低；基线随距离、光照和个人眼型缓慢变化。
+    两只眼都无效时为闭眼；闭眼不超过 max_blink_duration 秒后睁开记为一次眨眼。
+    """
+
+    def __init__(self, closed_ratio: float = 0.6, baseline_time: float = 10.0, warmup: int = 15,
+                 max_blink_duration: float = 0.5):
+        self.closed_ratio = closed_ratio
+        self.baseline_time = baseline_time
+        self.warmup = warmup
+        self.max_blink_duration = max_blink_duration
+        self.reset()
+
+    def reset(self):
+        self.baseline = [0.0, 0.0]
+        self.samples = [0, 0]
+        self.valid = [True, True]  # 最近一帧每只眼睛是否有效
+        self.ratios = [1.0, 1.0]   # 最近一帧每只眼睛的纵横比相对睁眼基线的比例
+        self.closed_since = None   # 当前这次闭眼开始的时间戳，睁眼时为 None
+        self.closed_reported = False
+        self.last_timestamp = None
+        self.blink_count = 0
+
+    @property
+    def closed(self) -> bool:
+        """最近一帧是否两只眼都闭合"""
+        return not (self.valid[0] or self.valid[1])
+
+    def threshold(self, eye: int) -> float:
+        """第 eye 只眼（0 左，1 右）当前的闭眼阈值"""
+        return self.closed_ratio * self.baseline[eye]
+
+    def closed_duration(self, timestamp: float) -> float:
+        """当前这次闭眼已持续的秒数，睁眼时为 0"""
+        return 0.0 if self.closed_since is None else timestamp - self.closed_since
+
+    def update(self, openness, timestamp: float):
+        """输入左右眼的 EAR 和时间戳（秒），返回本帧产生的眼睛事件（EVENT_*），没有事件时返回 None"""
+        if self.last_timestamp is None or timestamp <= self.last_timestamp:
+            dt = 0.0
+        else:
+            dt = timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+
+        for eye in (0, 1):
+            value = float(openness[eye])
+            samples = self.samples[eye]
+            baseline = self.baseline[eye]
+            self.ratios[eye] = value / baseline if samples and baseline > 0 else 1.0
+            valid = samples == 0 or value >= self.closed_ratio * baseline
+            self.valid[eye] = valid
+            if not valid:
+                continue
+            samples += 1
+            self.samples[eye] = samples
+            if samples <= self.warmup:
+                alpha = 1.0 / samples
+            else:
+                alpha = 1.0 - math.exp(-dt / self.baseline_time)
+            self.baseline[eye] += alpha * (value - baseline)
+
+        if self.closed:
+            if self.closed_since is None:
+                self.closed_since = timestamp
+                self.closed_reported = False
+            elif not self.closed_reported and timestamp - self.closed_since > self.max_blink_duration:
+                self.closed_reported = True
+                return EVENT_EYES_CLOSED
+            return None
+
+        if self.closed_since is not None:
+            duration = timestamp - self.closed_since
+            self.closed_since = None
+            if duration <= self.max_blink_duration:
+                self.blink_count += 1
+                return EVENT_BLINK
+        return None
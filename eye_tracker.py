@@ -1,31 +1,109 @@
 import cv2
 import mediapipe as mp
 import numpy as np
+import time
 import config
+from adaptive_thresholds import AdaptiveThresholds
+from async_log import LOG_CLASSIFY, LOG_GAZE, get_logger
+from calibration import CalibrationSession, fit_calibration, load_profile, save_profile, target_label
+from eye_openness import EyeOpennessMonitor
+from gaze_confidence import GazeConfidence
+from gaze_filter import create_gaze_filter
+from head_pose import HEAD_POSE_LANDMARKS, HeadPoseCompensator, HeadPoseEstimator
+from instrumentation import (STAGE_CLASSIFY, STAGE_CVT_COLOR, STAGE_FACE_MESH, STAGE_FILTER, STAGE_FLOW,
+                             STAGE_HEAD_POSE, STAGE_LANDMARKS, STAGE_RESIZE, StageTimer)
+from landmarks import LandmarkExtractor
+from optical_flow import EyeFlowTracker
 from typing import Tuple, Optional
 
+BOTH_EYES = (True, True)
+
 class EyeTracker:
     """眼球追踪器类，用于检测用户眼球位置和注视方向"""
     
+    # 眼部关键点索引
+    LEFT_EYE = [362, 385, 387, 263, 373, 380]
+    RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+    
+    # 虹膜关键点索引
+    LEFT_IRIS = [474, 475, 476, 477]
+    RIGHT_IRIS = [469, 470, 471, 472]
+    
+    # 面部轮廓极值点索引（额头、下巴、右脸颊、左脸颊），用于构建面部ROI
+    FACE_BOUNDS = [10, 152, 234, 454]
+    
     def __init__(self, debug_mode=False):
         # 初始化MediaPipe
         self.debug_mode = debug_mode
-        self.calibration_mode = config.CALIBRATION_MODE
+        self.log = get_logger()
+        self.calibration_mode = False
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        # 眼部关键点索引
-        self.LEFT_EYE = [362, 385, 387, 263, 373, 380]
-        self.RIGHT_EYE = [33, 160, 158, 133, 153, 144]
-        
-        # 虹膜关键点索引
-        self.LEFT_IRIS = [474, 475, 476, 477]
-        self.RIGHT_IRIS = [469, 470, 471, 472]
+        # FaceMesh在第一次推理时创建，回放关键点录制时完全不需要加载模型
+        self.face_mesh = None
+        
+        # 镜像：输入为未翻转的摄像头画面，关键点在提取时镜像，与镜像显示的预览一致
+        self.mirror = config.MIRROR_IMAGE
+        
+        # 每帧只把这些关键点转换一次为NumPy数组
+        self.extractor = LandmarkExtractor(self.LEFT_EYE, self.RIGHT_EYE, self.LEFT_IRIS, self.RIGHT_IRIS,
+                                           {'face_bounds': self.FACE_BOUNDS, 'head_pose': HEAD_POSE_LANDMARKS},
+                                           pool_size=config.LANDMARK_BUFFER_POOL, mirror=self.mirror)
+        
+        # 头部姿态补偿：从注视偏移中扣除点头/转头造成的变化
+        self.head_pose = HeadPoseEstimator()
+        self.head_pose_compensator = HeadPoseCompensator(**config.HEAD_POSE_PARAMS)
+        self.head_pose_enabled = config.HEAD_POSE_COMPENSATION
+        self.last_head_pose = None  # 最近一次估计的 (俯仰角, 偏航角)，弧度
+        # 关键点所在图像的尺寸（solvePnP 需要像素坐标）；回放关键点录制时使用摄像头分辨率
+        self.frame_size = (config.CAMERA_WIDTH, config.CAMERA_HEIGHT)
+        
+        # 睁眼程度：闭眼（眨眼）的帧跳过分类，只有一只眼有效时用另一只眼计算注视方向
+        self.blink_detection = config.BLINK_DETECTION
+        self.eye_openness = EyeOpennessMonitor(**config.EYE_OPENNESS_PARAMS)
+        self.eye_event_listeners = []  # 眼睛事件回调 callback(event, timestamp)，见 eye_openness.EVENT_*
+        
+        # 每帧的注视置信度：低于 min_confidence 的帧不进入滤波、分类和手势历史
+        contour_rows = slice(self.extractor.slices['left_eye'].start, self.extractor.slices['right_eye'].stop)
+        self.gaze_confidence = GazeConfidence(len(self.extractor.indices), contour_rows, **config.CONFIDENCE_PARAMS)
+        self.min_confidence = config.GAZE_THRESHOLD
+        # 低置信度持续太久时不再返回 'uncertain'，而是按未检测到眼睛处理，避免正在进行的持续滚动停不下来
+        self.max_uncertain_duration = config.MAX_UNCERTAIN_DURATION
+        self.uncertain_since = None  # 当前这段低置信度开始的时间戳，置信度正常时为 None
+        
+        # 面部ROI：检测成功后只在面部附近区域内推理
+        self.use_face_roi = config.FACE_ROI_ENABLED
+        self.face_roi_padding = config.FACE_ROI_PADDING
+        self.face_roi = None  # (x0, y0, x1, y1)，像素坐标；None表示全帧搜索
+        # FaceMesh在视频模式下会用上一帧的结果跟踪面部，坐标相对于输入图像；
+        # 全帧和ROI的输入坐标系不同，所以ROI使用单独的实例（首次进入ROI时创建）
+        self.roi_face_mesh = None
+        
+        # 各阶段耗时统计；EyeScrollController 会与其他阶段共用同一个计时器
+        self.timer = StageTimer()
+        self.roi_stats = {'roi': 0, 'full': 0, 'lost': 0, 'flow': 0}
+        
+        # 关键帧推理：每 keyframe_interval 帧运行一次FaceMesh，中间帧用光流传播眼睛和虹膜关键点
+        self.flow_tracker = EyeFlowTracker(
+            [self.extractor.slices[name] for name in ('left_eye', 'right_eye', 'left_iris', 'right_iris')],
+            win_size=config.FLOW_WIN_SIZE, max_level=config.FLOW_PYRAMID_LEVELS,
+            max_fb_error=config.FLOW_MAX_FB_ERROR, min_quality=config.FLOW_MIN_QUALITY, mirror=self.mirror)
+        self.keyframe_interval = 1
+        self.frames_since_keyframe = 0
+        self.last_points = None  # 上一帧的关键点，光流从这里出发
+        self.last_keyframe = True  # 最近一次 detect_landmarks 的结果是否来自FaceMesh（而不是光流）
+        self.set_keyframe_interval(config.KEYFRAME_INTERVAL)
+        
+        # 注视偏移滤波器：分类前对连续偏移做时域滤波
+        self.gaze_filter = None
+        self.last_raw_gaze_direction = None  # 滤波前的注视方向
+        self.set_gaze_filter(config.GAZE_FILTER)
+        
+        # 推理分辨率缩放：送入FaceMesh的图像相对采集图像的比例，预览仍保持原分辨率
+        self.inference_scale = 1.0
+        self.set_inference_scale(config.INFERENCE_SCALE)
+        # 缩放和颜色转换的输出缓冲区，每帧复用；尺寸变化（ROI移动、切换全帧）时由 OpenCV 重新分配
+        self.resize_buffer = None
+        self.rgb_buffer = None
         
         # 屏幕尺寸
         self.screen_width = 1920  # 默认值，会在运行时更新
@@ -35,162 +113,402 @@ class EyeTracker:
         self.top_threshold = 0.3  # 屏幕顶部30%区域
         self.bottom_threshold = 0.7  # 屏幕底部30%区域
         
-        # 校准数据
-        self.calibration_samples = []
+        # 注视偏移阈值：offset_y 大于 gaze_top_threshold 为向上注视，小于 gaze_bottom_threshold 为向下注视
+        self.gaze_top_threshold = config.GAZE_TOP_THRESHOLD
+        self.gaze_bottom_threshold = config.GAZE_BOTTOM_THRESHOLD
+        
+        # 自适应阈值：阅读（中心注视）时跟踪偏移基线的缓慢漂移，平移上下阈值
+        self.adaptive_thresholds = None
+        self.set_adaptive_thresholds(config.ADAPTIVE_THRESHOLDS)
+        
+        # 校准数据：多点校准会话和当前使用的校准档案
+        self.calibration = None
+        self.calibration_profile = None
+        self.profile_path = None  # 校准完成后保存档案的路径，None 表示不保存
         self.is_calibrated = False
+        if config.CALIBRATION_MODE:
+            self.start_calibration()
         
     def set_screen_dimensions(self, width: int, height: int):
         """设置屏幕尺寸"""
         self.screen_width = width
         self.screen_height = height
         
+    def _create_face_mesh(self):
+        """创建FaceMesh实例"""
+        return self.mp_face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        
+    def set_inference_scale(self, scale: float):
+        """设置推理分辨率缩放比例"""
+        self.inference_scale = max(0.1, min(1.0, scale))
+        
+    def set_keyframe_interval(self, interval: int):
+        """设置关键帧间隔，1表示每帧都运行FaceMesh"""
+        self.keyframe_interval = max(1, int(interval))
+        self.frames_since_keyframe = 0
+        self.flow_tracker.active = False
+        
+    def set_gaze_filter(self, name: str, params: dict = None):
+        """设置注视偏移滤波器，params 默认取自 config.GAZE_FILTER_PARAMS"""
+        if params is None:
+            params = config.GAZE_FILTER_PARAMS.get(name, {})
+        self.gaze_filter = create_gaze_filter(name, **params)
+        
+    @property
+    def last_gaze_direction(self) -> Optional[Tuple[float, float]]:
+        """最近一次计算的注视方向 (offset_x, offset_y)"""
+        return getattr(self, '_last_gaze_direction', None)
+        
+    def add_eye_event_listener(self, callback):
+        """注册眼睛事件（眨眼、长时间闭眼）回调，在控制线程中以 callback(event, timestamp) 调用"""
+        self.eye_event_listeners.append(callback)
+        
+    def set_adaptive_thresholds(self, enabled: bool):
+        """开关自适应阈值；以当前阈值为基准"""
+        if self.adaptive_thresholds is not None:
+            # 回到基准阈值
+            self.gaze_top_threshold = self.adaptive_thresholds.base_top
+            self.gaze_bottom_threshold = self.adaptive_thresholds.base_bottom
+        if enabled:
+            self.adaptive_thresholds = AdaptiveThresholds(**config.ADAPTIVE_THRESHOLD_PARAMS)
+            self.adaptive_thresholds.set_baseline(self.gaze_bottom_threshold, self.gaze_top_threshold)
+        else:
+            self.adaptive_thresholds = None
+            
     def start_calibration(self):
-        """开始校准过程"""
+        """开始多点校准：依次注视 config.CALIBRATION_TARGETS 中的屏幕位置"""
+        self.calibration = CalibrationSession(config.CALIBRATION_TARGETS, config.CALIBRATION_SAMPLES_PER_TARGET,
+                                              config.CALIBRATION_SETTLE_SAMPLES)
         self.calibration_mode = True
-        self.calibration_samples = []
-        self.is_calibrated = False
-        print("校准模式已启动，请注视屏幕中心5秒钟...")
-        
-    # 已将add_calibration_sample方法的功能整合到get_eye_position方法中
+        self.gaze_filter.reset()
+        print(f"校准模式已启动，共 {len(self.calibration.targets)} 个目标")
+        self._announce_calibration_target()
+        
+    def _announce_calibration_target(self):
+        target = self.calibration.current_target
+        if target is not None:
+            print(f"请注视屏幕{target_label(target)}（距顶部 {target * 100:.0f}% 处）...")
+            
+    def _add_calibration_sample(self, gaze_direction):
+        """校准模式下每帧调用：记录样本，所有目标完成后拟合"""
+        if self.calibration.add_sample(*gaze_direction):
+            if self.calibration.done:
+                self.finish_calibration()
+            else:
+                self._announce_calibration_target()
             
     def finish_calibration(self):
-        """完成校准过程"""
-        if len(self.calibration_samples) < 10:
+        """完成校准：拟合注视偏移到屏幕纵坐标的映射，更新分类阈值并保存档案"""
+        self.calibration_mode = False
+        session = self.calibration
+        self.calibration = None
+        self.gaze_filter.reset()
+        if session is None or session.count < 10:
             print("校准失败：样本数量不足")
             return
             
-        # 计算中心注视的平均偏移值
-        avg_x = sum(sample[0] for sample in self.calibration_samples) / len(self.calibration_samples)
-        avg_y = sum(sample[1] for sample in self.calibration_samples) / len(self.calibration_samples)
-        
-        # 计算标准差，用于确定阈值
-        std_y = np.std([sample[1] for sample in self.calibration_samples])
-        
-        # 设置新的阈值（中心偏移值 +/- 2.5倍标准差）
-        new_top_threshold = avg_y - (2.5 * std_y)
-        new_bottom_threshold = avg_y + (2.5 * std_y)
-        
-        # 更新配置
-        config.GAZE_TOP_THRESHOLD = new_top_threshold
-        config.GAZE_BOTTOM_THRESHOLD = new_bottom_threshold
-        
-        print(f"校准完成！新的阈值设置为：上 {new_top_threshold:.6f}，下 {new_bottom_threshold:.6f}")
-        
-        # 退出校准模式
-        self.calibration_mode = False
+        profile = fit_calibration(session.offsets[:session.count], session.screen_y[:session.count],
+                                  config.CALIBRATION_POLY_DEGREE, self.top_threshold, self.bottom_threshold)
+        if profile is None:
+            print("校准失败：注视偏移与目标位置不相关，请保持头部稳定后重新校准")
+            return
+        self.apply_calibration_profile(profile)
+        print(f"校准完成！新的阈值设置为：上 {profile.top_threshold:.6f}，下 {profile.bottom_threshold:.6f} "
+              f"(内点 {profile.inliers}/{profile.samples}，误差 {profile.rms_error * 100:.1f}% 屏幕高度)")
+        if self.profile_path:
+            try:
+                save_profile(profile, self.profile_path)
+            except OSError as e:
+                # 在控制阶段中运行，保存失败不能中断追踪；本次校准结果仍然生效
+                print(f"⚠ 校准档案保存失败: {self.profile_path} ({e})")
+                return
+            print(f"校准档案已保存: {self.profile_path}")
+            
+    def apply_calibration_profile(self, profile):
+        """使用校准档案中的分类阈值"""
+        self.calibration_profile = profile
+        self.gaze_top_threshold = profile.top_threshold
+        self.gaze_bottom_threshold = profile.bottom_threshold
+        if self.adaptive_thresholds is not None:
+            self.adaptive_thresholds.set_baseline(profile.bottom_threshold, profile.top_threshold)
         self.is_calibrated = True
         
+    def load_calibration_profile(self, path: str) -> bool:
+        """加载校准档案；之后校准的结果也保存到该路径"""
+        self.profile_path = path
+        profile = load_profile(path)
+        if profile is None:
+            return False
+        self.apply_calibration_profile(profile)
+        return True
+        
     def get_eye_position(self, frame) -> Optional[Tuple[str, float]]:
         """获取眼球位置
         返回：(位置, 置信度)
         位置可能是：'top', 'center', 'bottom'
         置信度范围：0.0-1.0
         """
+        points = self.detect_landmarks(frame)
+        if points is None:
+            return None
+        return self.estimate_eye_position(points, keyframe=self.last_keyframe)
+        
+    def detect_landmarks(self, frame) -> Optional[np.ndarray]:
+        """返回所需关键点的 (K, 2) 数组（全帧归一化坐标）；未检测到面部时返回None
+        
+        keyframe_interval > 1 时，两次FaceMesh推理之间的帧用光流跟踪眼部关键点；
+        光流跟踪质量不足时立即对该帧运行FaceMesh。结果是否来自FaceMesh记录在 last_keyframe。
+        """
+        height, width = frame.shape[:2]
+        self.frame_size = (width, height)
+        if (self.keyframe_interval > 1 and self.last_points is not None
+                and self.frames_since_keyframe < self.keyframe_interval - 1):
+            start = time.perf_counter()
+            points = self.flow_tracker.track(frame, self.last_points, self.extractor.acquire())
+            self.timer.lap(STAGE_FLOW, start)
+            if points is not None:
+                self.roi_stats['flow'] += 1
+                self.frames_since_keyframe += 1
+                self.last_points = points
+                self.last_keyframe = False
+                return points
+        
+        points = self._run_face_mesh(frame)
+        self.frames_since_keyframe = 0
+        self.last_keyframe = True
+        self.last_points = points
+        if points is not None and self.keyframe_interval > 1:
+            self.flow_tracker.reset(frame, points)
+        return points
+        
+    def _run_face_mesh(self, frame) -> Optional[np.ndarray]:
+        """运行FaceMesh推理
+        
+        检测成功后会记住带边距的面部区域，下一帧只对该区域做颜色转换和推理，
+        关键点再映射回全帧归一化坐标。在ROI内跟丢时，立即对同一帧做一次全帧搜索。
+        """
+        if self.face_roi is not None:
+            points = self._process_region(frame, self.face_roi)
+            if points is not None:
+                self.roi_stats['roi'] += 1
+                self._update_face_roi(points, frame.shape)
+                return points
+            # 跟踪丢失，回退到全帧搜索
+            self.roi_stats['lost'] += 1
+            self.face_roi = None
+        
+        self.roi_stats['full'] += 1
+        points = self._process_region(frame, None)
+        if points is not None and self.use_face_roi:
+            self._update_face_roi(points, frame.shape)
+        return points
+        
+    def _process_region(self, frame, roi) -> Optional[np.ndarray]:
+        """对整帧或ROI区域按推理分辨率运行FaceMesh，返回全帧坐标下的关键点数组"""
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            image = frame[y0:y1, x0:x1]
+            if self.roi_face_mesh is None:
+                self.roi_face_mesh = self._create_face_mesh()
+            face_mesh = self.roi_face_mesh
+        else:
+            image = frame
+            if self.face_mesh is None:
+                self.face_mesh = self._create_face_mesh()
+            face_mesh = self.face_mesh
+        
+        timer = self.timer
+        t = time.perf_counter()
+        
+        # 缩小后再推理；关键点是归一化坐标，与图像缩放无关，映射方式不变
+        if self.inference_scale < 1.0:
+            height, width = image.shape[:2]
+            size = (round(width * self.inference_scale), round(height * self.inference_scale))
+            image = self.resize_buffer = cv2.resize(image, size, dst=self.resize_buffer,
+                                                    interpolation=cv2.INTER_AREA)
+            t = timer.lap(STAGE_RESIZE, t)
+        
         # 转换为RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame = self.rgb_buffer = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        t = timer.lap(STAGE_CVT_COLOR, t)
         
         # 处理图像
-        results = self.face_mesh.process(rgb_frame)
+        results = face_mesh.process(rgb_frame)
+        t = timer.lap(STAGE_FACE_MESH, t)
         
         # 如果没有检测到面部，返回None
         if not results.multi_face_landmarks:
             return None
             
         # 获取第一个检测到的面部
-        face_landmarks = results.multi_face_landmarks[0]
-        
-        # 获取左右眼虹膜中心点
-        left_iris = self._get_iris_center(face_landmarks, self.LEFT_IRIS)
-        right_iris = self._get_iris_center(face_landmarks, self.RIGHT_IRIS)
-        
-        # 获取左右眼中心点
-        left_eye_center = self._get_eye_center(face_landmarks, self.LEFT_EYE)
-        right_eye_center = self._get_eye_center(face_landmarks, self.RIGHT_EYE)
+        points = self.extractor.extract(results.multi_face_landmarks[0])
+        
+        if roi is not None:
+            # 把裁剪区域内的归一化坐标映射回全帧归一化坐标；镜像坐标下裁剪区域的左边界是原画面中的右边界
+            height, width = frame.shape[:2]
+            left = width - x1 if self.mirror else x0
+            self.extractor.remap(points, (left / width, y0 / height), ((x1 - x0) / width, (y1 - y0) / height))
+        timer.lap(STAGE_LANDMARKS, t)
+        return points
+        
+    def _update_face_roi(self, points, frame_shape):
+        """根据面部轮廓关键点更新带边距的面部区域"""
+        height, width = frame_shape[:2]
+        bounds = self.extractor.group(points, 'face_bounds')
+        min_x, min_y = bounds.min(axis=0)
+        max_x, max_y = bounds.max(axis=0)
+        if self.mirror:
+            # ROI是原画面的像素坐标
+            min_x, max_x = 1.0 - max_x, 1.0 - min_x
+        
+        pad_x = (max_x - min_x) * width * self.face_roi_padding
+        pad_y = (max_y - min_y) * height * self.face_roi_padding
+        
+        x0 = max(0, int(min_x * width - pad_x))
+        y0 = max(0, int(min_y * height - pad_y))
+        x1 = min(width, int(max_x * width + pad_x))
+        y1 = min(height, int(max_y * height + pad_y))
+        
+        # 区域太小（异常检测）或几乎覆盖全帧时，直接使用全帧
+        area = (x1 - x0) * (y1 - y0)
+        if x1 - x0 < 32 or y1 - y0 < 32 or area > 0.8 * width * height:
+            self.face_roi = None
+            return
         
-        # 如果在校准模式，添加校准样本
+        # 面部仍在当前ROI内且大小变化不大时保持ROI不动，
+        # 让ROI实例的跟踪状态始终对应同一个裁剪坐标系
+        if self.face_roi is not None:
+            rx0, ry0, rx1, ry1 = self.face_roi
+            inside = (rx0 <= min_x * width and ry0 <= min_y * height and
+                      max_x * width <= rx1 and max_y * height <= ry1)
+            area_ratio = area / max(1, (rx1 - rx0) * (ry1 - ry0))
+            if inside and 0.7 <= area_ratio <= 1.4:
+                return
+        self.face_roi = (x0, y0, x1, y1)
+        
+    def estimate_eye_position(self, points, timestamp: float = None,
+                              keyframe: bool = True) -> Optional[Tuple[str, float]]:
+        """根据关键点数组判断注视位置，返回(位置, 置信度)
+        
+        timestamp 为该帧的时间戳（秒），供注视偏移滤波使用，默认取当前时间。
+        keyframe=False 表示关键点来自光流（只跟踪了眼部），头部姿态沿用最近一个关键帧的估计。
+        闭眼（眨眼）的帧返回 ('closed', 0.0)，不参与分类；闭眼超过 max_blink_duration 后返回 None。
+        置信度低于 min_confidence 的帧返回 ('uncertain', 置信度)，同样不参与滤波和分类；
+        低置信度持续超过 max_uncertain_duration 后返回 None
+        """
+        start = time.perf_counter()
+        if timestamp is None:
+            timestamp = time.monotonic()
+        
+        # 一次性计算左右眼中心、虹膜中心和偏移
+        features = self.extractor.compute_features(points)
+        
+        # 睁眼程度：两只眼都闭合时虹膜偏移不可信，跳过分类
+        aspect = self.frame_size[0] / self.frame_size[1]
+        openness = self.extractor.compute_openness(points, aspect)
+        valid_eyes = BOTH_EYES
+        openness_ratios = None
+        if self.blink_detection:
+            monitor = self.eye_openness
+            event = monitor.update(openness, timestamp)
+            if event is not None:
+                for callback in self.eye_event_listeners:
+                    callback(event, timestamp)
+            if monitor.closed:
+                self.timer.lap(STAGE_CLASSIFY, start)
+                if monitor.closed_reported:
+                    return None
+                return 'closed', 0.0
+            valid_eyes = monitor.valid
+            openness_ratios = monitor.ratios
+        
+        # 置信度：低质量的帧在进入滤波器、自适应阈值和手势历史之前丢弃
+        confidence = self.gaze_confidence.update(points, features.offsets, self.extractor.eye_widths, aspect,
+                                                 openness_ratios, valid_eyes, timestamp)
+        if confidence < self.min_confidence:
+            self.timer.lap(STAGE_CLASSIFY, start)
+            if self.uncertain_since is None:
+                self.uncertain_since = timestamp
+            elif timestamp - self.uncertain_since > self.max_uncertain_duration:
+                return None
+            return 'uncertain', confidence
+        self.uncertain_since = None
+        
+        # 计算注视方向，并扣除头部姿态变化的影响
+        raw_direction = self._calculate_gaze_direction(features, valid_eyes)
+        if self.head_pose_enabled:
+            raw_direction = self._compensate_head_pose(points, raw_direction, timestamp, keyframe)
+        
+        # 如果在校准模式，添加校准样本（与分类使用同一种偏移，未经滤波）
         if self.calibration_mode:
-            # 计算左右眼偏移
-            left_offset_x = left_iris[0] - left_eye_center[0]
-            left_offset_y = left_iris[1] - left_eye_center[1]
-            right_offset_x = right_iris[0] - right_eye_center[0]
-            right_offset_y = right_iris[1] - right_eye_center[1]
-            
-            # 添加校准样本
-            avg_offset_x = (left_offset_x + right_offset_x) / 2
-            avg_offset_y = (left_offset_y + right_offset_y) / 2
-            self.calibration_samples.append((avg_offset_x, avg_offset_y))
-            
-            # 如果收集了足够的样本，完成校准
-            if len(self.calibration_samples) >= 100:  # 约5秒，每秒20帧
-                self.finish_calibration()
-                
+            self._add_calibration_sample(raw_direction)
             return 'center', 1.0  # 校准模式下固定返回中心位置
         
-        if left_iris is None or right_iris is None:
-            return None
-            
-        # 计算注视方向
-        gaze_direction = self._calculate_gaze_direction(face_landmarks, left_iris, right_iris)
+        # 时域滤波，抑制抖动引起的位置跳变
+        filter_start = time.perf_counter()
+        gaze_direction = self.gaze_filter.filter(raw_direction, timestamp)
+        self._last_gaze_direction = gaze_direction
+        self.timer.lap(STAGE_FILTER, filter_start)
         
         # 判断注视位置
         position = self._determine_gaze_position(gaze_direction)
         
-        # 计算置信度（基于面部检测的置信度）
-        confidence = 0.8  # 简化处理
+        # 中心注视时更新偏移基线，阈值随之平移（下一帧生效）
+        adaptive = self.adaptive_thresholds
+        if adaptive is not None and position == 'center':
+            adaptive.update(gaze_direction[1], timestamp)
+            self.gaze_top_threshold = adaptive.top_threshold
+            self.gaze_bottom_threshold = adaptive.bottom_threshold
         
+        self.timer.lap(STAGE_CLASSIFY, start)
         return position, confidence
-        
-    def _get_iris_center(self, landmarks, iris_indices) -> Optional[Tuple[float, float]]:
-        """获取虹膜中心点"""
-        try:
-            x_coords = [landmarks.landmark[idx].x for idx in iris_indices]
-            y_coords = [landmarks.landmark[idx].y for idx in iris_indices]
-            
-            center_x = sum(x_coords) / len(x_coords)
-            center_y = sum(y_coords) / len(y_coords)
             
-            return center_x, center_y
-        except:
-            return None
-            
-    def _calculate_gaze_direction(self, landmarks, left_iris, right_iris) -> Tuple[float, float]:
-        """计算注视方向向量"""
-        # 获取眼睛中心点
-        left_eye_center = self._get_eye_center(landmarks, self.LEFT_EYE)
-        right_eye_center = self._get_eye_center(landmarks, self.RIGHT_EYE)
-        
-        # 计算虹膜相对于眼睛中心的偏移
-        left_offset_x = left_iris[0] - left_eye_center[0]
-        left_offset_y = left_iris[1] - left_eye_center[1]
-        
-        right_offset_x = right_iris[0] - right_eye_center[0]
-        right_offset_y = right_iris[1] - right_eye_center[1]
+    def _compensate_head_pose(self, points, direction, timestamp: float, keyframe: bool = True) -> Tuple[float, float]:
+        """估计头部姿态并补偿注视方向；估计失败时原样返回
         
+        光流帧里姿态关键点只是随眼部整体平移，不重新估计，沿用关键帧的姿态。
+        """
+        start = time.perf_counter()
+        if keyframe:
+            self.last_head_pose = self.head_pose.estimate(self.extractor.group(points, 'head_pose'),
+                                                          *self.frame_size)
+        pose = self.last_head_pose
+        if pose is not None:
+            direction = self.head_pose_compensator.compensate(direction, pose[0], pose[1], timestamp)
+            self.last_raw_gaze_direction = direction
+        self.timer.lap(STAGE_HEAD_POSE, start)
+        return direction
+        
+    def _calculate_gaze_direction(self, features, valid_eyes=BOTH_EYES) -> Tuple[float, float]:
+        """计算注视方向向量
+        
+        valid_eyes 为 [左眼有效, 右眼有效]；只有一只眼有效时只用这只眼的偏移，否则取双眼平均
+        """
+        offset = features.mean_offset
+        if valid_eyes[0] != valid_eyes[1]:
+            offset = features.offsets[0 if valid_eyes[0] else 1]
         # 平均偏移 - 使用配置文件中的垂直方向权重
-        avg_offset_x = (left_offset_x + right_offset_x) / 2
+        avg_offset_x = float(offset[0])
         
         # 对垂直偏移应用更强的权重，并反转方向使向下看为正值
         # 这样更符合直觉：向下看时值为正，向上看时值为负
-        avg_offset_y = -1 * (left_offset_y + right_offset_y) / 2 * config.GAZE_OFFSET_MULTIPLIER
+        avg_offset_y = -1 * float(offset[1]) * config.GAZE_OFFSET_MULTIPLIER
         
-        # 保存最近一次计算的注视方向，用于在draw_eye_tracking方法中绘制注视点
-        self._last_gaze_direction = (avg_offset_x, avg_offset_y)
+        # 保存滤波前的注视方向；滤波后的结果保存在 _last_gaze_direction 中，用于绘制注视点
+        self.last_raw_gaze_direction = (avg_offset_x, avg_offset_y)
         
         # 打印调试信息
-        print(f"Eye offset - Left: ({left_offset_x:.4f}, {left_offset_y:.4f}), Right: ({right_offset_x:.4f}, {right_offset_y:.4f}), Avg: ({avg_offset_x:.4f}, {avg_offset_y:.4f})")
+        (left_offset_x, left_offset_y), (right_offset_x, right_offset_y) = features.offsets
+        self.log.log(LOG_GAZE, "Eye offset - Left: ({:.4f}, {:.4f}), Right: ({:.4f}, {:.4f}), Avg: ({:.4f}, {:.4f})",
+                     left_offset_x, left_offset_y, right_offset_x, right_offset_y, avg_offset_x, avg_offset_y)
         
         return avg_offset_x, avg_offset_y
         
-    def _get_eye_center(self, landmarks, eye_indices) -> Tuple[float, float]:
-        """获取眼睛中心点"""
-        x_coords = [landmarks.landmark[idx].x for idx in eye_indices]
-        y_coords = [landmarks.landmark[idx].y for idx in eye_indices]
-        
-        center_x = sum(x_coords) / len(x_coords)
-        center_y = sum(y_coords) / len(y_coords)
-        
-        return center_x, center_y
-        
     def _determine_gaze_position(self, gaze_direction) -> str:
         """根据注视方向判断注视位置
         
@@ -200,26 +518,29 @@ class EyeTracker:
         - 当用户向下看时，更容易被判断为向下注视
         """
         offset_x, offset_y = gaze_direction
+        bottom = self.gaze_bottom_threshold
+        top = self.gaze_top_threshold
         
-        # 垂直方向判断（上下注视）- 基于实际测试值设定阈值
-        # 根据用户测试：看中间0.013，看上面0.017，看下面0.009
-        # 设定阈值：小于0.011为向下注视，大于0.015为向上注视，中间为中心注视
-        
-        if offset_y < 0.009:  # 向下注视（小于0.009）
+        # 垂直方向判断（上下注视）：小于下阈值为向下注视，大于上阈值为向上注视，中间为中心注视
+        if offset_y < bottom:  # 向下注视
             if self.debug_mode:
-                print(f"向下注视检测: {offset_y:.6f} < 0.009")
+                self.log.log(LOG_CLASSIFY, "向下注视检测: {:.6f} < {:.6f}", offset_y, bottom)
             return 'bottom'
-        elif offset_y > 0.015:  # 向上注视（大于0.015）
+        elif offset_y > top:  # 向上注视
             if self.debug_mode:
-                print(f"向上注视检测: {offset_y:.6f} > 0.015")
+                self.log.log(LOG_CLASSIFY, "向上注视检测: {:.6f} > {:.6f}", offset_y, top)
             return 'top'
-        else:  # 中心注视（0.009 <= offset_y <= 0.015）
+        else:  # 中心注视
             if self.debug_mode:
-                print(f"中心注视检测: 0.009 <= {offset_y:.6f} <= 0.015")
+                self.log.log(LOG_CLASSIFY, "中心注视检测: {:.6f} <= {:.6f} <= {:.6f}", bottom, offset_y, top)
             return 'center'
             
-    def draw_eye_tracking(self, frame, eye_position: str = None, confidence: float = 0.0):
-        """在帧上绘制眼球追踪信息"""
+    def draw_eye_tracking(self, frame, eye_position: str = None, confidence: float = 0.0, gaze_direction=None):
+        """在帧上绘制眼球追踪信息
+        
+        gaze_direction 为该帧对应的注视方向；流水线模式下由控制阶段随帧传入，
+        避免渲染线程读到更新的帧的注视方向
+        """
         # 绘制注视位置指示器
         height, width = frame.shape[:2]
         
@@ -236,6 +557,8 @@ class EyeTracker:
             'top': 'TOP',
             'bottom': 'BOTTOM',
             'center': 'CENTER',
+            'closed': 'CLOSED (BLINK)',
+            'uncertain': 'UNCERTAIN (LOW CONFIDENCE)',
             None: 'NONE (EYES CLOSED/NOT DETECTED)'
         }
         position_display = position_map.get(eye_position, str(eye_position))
@@ -249,9 +572,11 @@ class EyeTracker:
         cv2.putText(frame, confidence_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
         # 如果检测到眼睛并有注视方向数据
-        if eye_position is not None and hasattr(self, '_last_gaze_direction'):
+        if gaze_direction is None:
+            gaze_direction = getattr(self, '_last_gaze_direction', None)
+        if eye_position is not None and gaze_direction is not None:
             # 计算注视点在屏幕上的位置
-            gaze_x, gaze_y = self._last_gaze_direction
+            gaze_x, gaze_y = gaze_direction
             
             # 将相对偏移转换为屏幕上的坐标
             # 注意：这里使用简化的映射，实际应用中可能需要更复杂的映射算法
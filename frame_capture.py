@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+摄像头采集模块 - 在独立线程中持续抓帧，消费者总是拿到最新的一帧
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Optional
+
+from pipeline import QueueClosed
+
+# 采集到的一帧：图像、采集时间戳（time.monotonic）、帧序号、帧源时间戳（录制时间轴，见 frame_source）
+CapturedFrame = namedtuple('CapturedFrame', ['frame', 'timestamp', 'index', 'source_time'])
+
+
+class FrameGrabber:
+    """后台抓帧器
+
+    采集线程不停地调用 source.read()，把结果放进一个很小的环形缓冲区（默认只有1格）。
+    消费者调用 read() 时总是拿到最新的一帧，比它旧、还没被取走的帧记为丢帧。
+    这样驱动缓冲区不会积压，推理和显示再慢也只会处理最新画面。
+
+    lossless=True 时（离线快速回放）缓冲区满了采集线程会等待，不丢任何帧，
+    消费者按先后顺序取帧，保证回放结果可复现。
+    被丢弃的帧归还给帧源（source.release_frame）复用；交给消费者的帧由消费者处理完后归还。
+    """
+
+    def __init__(self, source, buffer_size: int = 1, stats_window: int = 300, lossless: bool = False):
+        self.source = source
+        self.lossless = lossless
+        self.buffer = deque(maxlen=max(1, buffer_size))
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.finished = False  # 采集端已经读不到帧（摄像头断开或文件结束）
+
+        # 统计信息
+        self.captured_count = 0   # 采集到的帧数
+        self.delivered_count = 0  # 交给消费者的帧数
+        self.dropped_count = 0    # 没被消费就被覆盖的帧数
+        self.frame_ages = deque(maxlen=stats_window)  # 交付时的帧龄（秒）
+        self.start_time = 0.0
+
+    def start(self):
+        """启动采集线程"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.running = True
+        self.finished = False
+        self.start_time = time.monotonic()
+        self.thread = threading.Thread(target=self._capture_loop, name='FrameGrabber', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """停止采集线程"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+
+    def _capture_loop(self):
+        """采集线程主循环"""
+        index = 0
+        while self.running:
+            ret, frame, source_time = self.source.read()
+            timestamp = time.monotonic()
+            if not ret:
+                break
+
+            with self.condition:
+                if self.lossless:
+                    self.condition.wait_for(lambda: len(self.buffer) < self.buffer.maxlen or not self.running)
+                    if not self.running:
+                        break
+                elif len(self.buffer) == self.buffer.maxlen:
+                    # 缓冲区已满，挤掉最旧的一帧
+                    self.source.release_frame(self.buffer.popleft().frame)
+                    self.dropped_count += 1
+                self.buffer.append(CapturedFrame(frame, timestamp, index, source_time))
+                self.captured_count += 1
+                self.condition.notify()
+            index += 1
+
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """取出最新的一帧（lossless 模式下为最早的一帧）
+
+        缓冲区为空时最多等待 timeout 秒；超时或采集已结束时返回 None。
+        """
+        with self.condition:
+            if not self.buffer:
+                if self.finished:
+                    return None
+                self.condition.wait_for(lambda: self.buffer or self.finished or not self.running,
+                                        timeout=timeout)
+                if not self.buffer:
+                    return None
+
+            if self.lossless:
+                captured = self.buffer.popleft()
+                self.condition.notify_all()
+            else:
+                captured = self.buffer.pop()
+                # 比最新帧更旧的帧已经没有意义，直接丢弃
+                self.dropped_count += len(self.buffer)
+                for stale in self.buffer:
+                    self.source.release_frame(stale.frame)
+                self.buffer.clear()
+            self.delivered_count += 1
+            self.frame_ages.append(time.monotonic() - captured.timestamp)
+
+        return captured
+
+    def get(self, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """流水线接口：与 read() 相同，但采集结束后抛出 QueueClosed"""
+        captured = self.read(timeout)
+        if captured is None and self.finished:
+            raise QueueClosed('capture')
+        return captured
+
+    def get_stats(self) -> dict:
+        """获取采集统计信息，帧龄单位为毫秒"""
+        with self.condition:
+            ages = sorted(self.frame_ages)
+            captured = self.captured_count
+            delivered = self.delivered_count
+            dropped = self.dropped_count
+
+        elapsed = max(1e-6, time.monotonic() - self.start_time) if self.start_time else 0.0
+        stats = {
+            'captured': captured,
+            'delivered': delivered,
+            'dropped': dropped,
+            'capture_fps': captured / elapsed if elapsed else 0.0,
+            'frame_age_mean_ms': 0.0,
+            'frame_age_p50_ms': 0.0,
+            'frame_age_p95_ms': 0.0,
+            'frame_age_max_ms': 0.0,
+        }
+        if ages:
+            stats['frame_age_mean_ms'] = sum(ages) / len(ages) * 1000
+            stats['frame_age_p50_ms'] = ages[len(ages) // 2] * 1000
+            stats['frame_age_p95_ms'] = ages[min(len(ages) - 1, int(len(ages) * 0.95))] * 1000
+            stats['frame_age_max_ms'] = ages[-1] * 1000
+        return stats
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+帧源模块 - 统一摄像头、录像文件和图片目录的读取接口，便于无摄像头环境下回放和性能分析
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+# 回放节奏
+PACING_REALTIME = 'realtime'  # 按录制时间戳的间隔播放
+PACING_FAST = 'fast'          # 尽可能快地读取，不等待
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+TIMESTAMPS_FILE = 'timestamps.txt'  # 图片目录中可选的时间戳文件，每行一个秒数，与排序后的图片一一对应
+
+
+class FrameSource(ABC):
+    """帧源基类，子类实现 _read_next()、_rewind() 和 is_opened()
+
+    read() 返回 (是否成功, 帧, 时间戳)，时间戳单位为秒：
+    摄像头使用 time.monotonic()，录像和图片目录使用录制时间轴（循环播放时继续递增）。
+
+    摄像头和录像的帧优先解码到空闲缓冲区中：使用者处理完一帧后调用 release_frame() 归还，
+    之后的 read() 会原地复用它的内存；没有空闲缓冲区时分配新帧。不归还的帧不会被复用，可以任意保留。
+    """
+
+    is_live = False
+
+    def __init__(self, pacing: str = PACING_REALTIME, loop: bool = False, fps: float = config.CAMERA_FPS):
+        if pacing not in (PACING_REALTIME, PACING_FAST):
+            raise ValueError(f"未知的回放节奏: {pacing}")
+        self.pacing = pacing
+        self.loop = loop
+        self.fps = fps if fps and fps > 0 else config.CAMERA_FPS
+        self.frame_count = 0
+
+        # 循环播放时累加的时间偏移，保证时间戳单调递增
+        self.loop_offset = 0.0
+        self.last_timestamp = None
+
+        # 实时节奏：录制时间轴起点与本地时钟起点
+        self.pace_origin = None
+
+        # 空闲帧缓冲区（归还的帧），deque 的 append/pop 是线程安全的
+        self.free_frames = deque(maxlen=max(1, config.FRAME_BUFFER_POOL))
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        """读取下一帧"""
+        ret, frame, timestamp = self._read_next()
+        if not ret and self.loop and self.frame_count > 0:
+            # 从头开始，时间轴接在上一轮最后一帧之后
+            self.loop_offset = (self.last_timestamp or 0.0) + 1.0 / self.fps
+            self._rewind()
+            ret, frame, timestamp = self._read_next()
+            if ret:
+                timestamp += self.loop_offset
+        elif ret:
+            timestamp += self.loop_offset
+
+        if not ret:
+            return False, None, 0.0
+
+        self.frame_count += 1
+        self.last_timestamp = timestamp
+        if self.pacing == PACING_REALTIME:
+            self._pace(timestamp)
+        return True, frame, timestamp
+
+    def _pace(self, timestamp: float):
+        """按录制时间戳等待，使播放速度与录制时一致"""
+        now = time.monotonic()
+        if self.pace_origin is None:
+            self.pace_origin = (timestamp, now)
+            return
+        source_origin, clock_origin = self.pace_origin
+        delay = (timestamp - source_origin) - (now - clock_origin)
+        if delay > 0:
+            time.sleep(delay)
+
+    @abstractmethod
+    def _read_next(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        """读取源中的下一帧（不含循环和节奏处理），时间戳相对于源的起点"""
+
+    def release_frame(self, frame: Optional[np.ndarray]):
+        """归还不再使用的帧，供之后的 read() 复用（可在任意线程中调用）
+
+        每一帧只能归还一次，归还后不能再读写它。
+        """
+        if frame is not None:
+            self.free_frames.append(frame)
+
+    def _read_into_free_buffer(self, cap) -> Tuple[bool, Optional[np.ndarray]]:
+        """从 VideoCapture 读取一帧，有空闲缓冲区时解码到其中（尺寸不符时 OpenCV 会重新分配）"""
+        try:
+            buffer = self.free_frames.pop()
+        except IndexError:
+            buffer = None
+        ret, frame = cap.read(buffer)
+        if not ret and buffer is not None:
+            self.free_frames.append(buffer)
+        return ret, frame
+
+    @abstractmethod
+    def _rewind(self):
+        """回到第一帧"""
+
+    @abstractmethod
+    def is_opened(self) -> bool:
+        """帧源是否成功打开"""
+
+    def release(self):
+        pass
+
+    def describe(self) -> str:
+        return self.__class__.__name__
+
+
+class CameraSource(FrameSource):
+    """摄像头帧源"""
+
+    is_live = True
+
+    def __init__(self, device: int = 0, width: int = config.CAMERA_WIDTH, height: int = config.CAMERA_HEIGHT,
+                 fps: float = config.CAMERA_FPS):
+        # 摄像头自身决定节奏，不需要额外等待
+        super().__init__(pacing=PACING_FAST, loop=False, fps=fps)
+        self.device = device
+        self.cap = cv2.VideoCapture(device)
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+            # 尽量减小驱动缓冲区，避免拿到积压的旧帧
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def _read_next(self):
+        ret, frame = self._read_into_free_buffer(self.cap)
+        return ret, frame, time.monotonic()
+
+    def _rewind(self):
+        pass
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def describe(self) -> str:
+        return f"摄像头 {self.device}"
+
+
+class VideoFileSource(FrameSource):
+    """录像文件帧源，时间戳取自视频容器"""
+
+    def __init__(self, path: str, pacing: str = PACING_REALTIME, loop: bool = False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0.0
+        super().__init__(pacing=pacing, loop=loop, fps=fps)
+        self.index = 0
+
+    def _read_next(self):
+        ret, frame = self._read_into_free_buffer(self.cap)
+        if not ret:
+            return False, None, 0.0
+        timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if timestamp <= 0 and self.index > 0:
+            # 部分后端不提供时间戳，按帧率推算
+            timestamp = self.index / self.fps
+        self.index += 1
+        return True, frame, timestamp
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.index = 0
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def describe(self) -> str:
+        return f"录像 {self.path}"
+
+
+class ImageDirectorySource(FrameSource):
+    """图片目录帧源，按文件名排序读取；目录中有 timestamps.txt 时使用其中的时间戳"""
+
+    def __init__(self, directory: str, pacing: str = PACING_REALTIME, loop: bool = False,
+                 fps: float = config.CAMERA_FPS):
+        super().__init__(pacing=pacing, loop=loop, fps=fps)
+        self.directory = directory
+        self.files = sorted(name for name in os.listdir(directory)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.timestamps = None
+        timestamps_path = os.path.join(directory, TIMESTAMPS_FILE)
+        if os.path.exists(timestamps_path):
+            with open(timestamps_path) as f:
+                self.timestamps = [float(line) for line in f if line.strip()]
+            if len(self.timestamps) < len(self.files):
+                print(f"⚠ {TIMESTAMPS_FILE} 中的时间戳少于图片数量，改为按帧率推算")
+                self.timestamps = None
+        self.index = 0
+
+    def _read_next(self):
+        while self.index < len(self.files):
+            index = self.index
+            self.index += 1
+            frame = cv2.imread(os.path.join(self.directory, self.files[index]))
+            if frame is None:
+                print(f"⚠ 无法读取图片: {self.files[index]}")
+                continue
+            if self.timestamps is not None:
+                timestamp = self.timestamps[index] - self.timestamps[0]
+            else:
+                timestamp = index / self.fps
+            return True, frame, timestamp
+        return False, None, 0.0
+
+    def _rewind(self):
+        self.index = 0
+
+    def is_opened(self) -> bool:
+        return len(self.files) > 0
+
+    def describe(self) -> str:
+        return f"图片目录 {self.directory} ({len(self.files)} 张)"
+
+
+def open_frame_source(spec=None, pacing: str = PACING_REALTIME, loop: bool = False) -> FrameSource:
+    """根据描述创建帧源
+
+    spec 可以是摄像头编号（整数或数字字符串）、录像文件路径或图片目录路径，
+    默认使用 config.FRAME_SOURCE。
+    """
+    if spec is None:
+        spec = config.FRAME_SOURCE
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec))
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, pacing=pacing, loop=loop)
+    return VideoFileSource(spec, pacing=pacing, loop=loop)
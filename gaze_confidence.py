@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+注视置信度模块 - 由每帧已有的信号计算 0-1 的置信度：关键点帧间稳定性、睁眼程度、
+虹膜与眼睛轮廓的一致性以及左右眼的一致性
+
+每一项映射为 0-1 的分数，置信度为各项分数的乘积；低于阈值的帧在进入滤波、分类和手势历史之前就被丢弃。
+"""
+
+import math
+
+import numpy as np
+
+
+def _score(value: float, scale: float) -> float:
+    """偏差到分数的映射：value 远小于 scale 时接近1，等于 scale 时为0.5，之后迅速趋近0"""
+    ratio = value / scale
+    ratio *= ratio
+    return 1.0 / (1.0 + ratio * ratio)
+
+
+class GazeConfidence:
+    """单帧注视置信度
+
+    - 稳定性：眼睛轮廓关键点相对上一帧的均方根位移（扣除整体平移，即只看形状变化），按眼宽归一化；
+      与上一帧间隔超过 max_gap 秒时不计
+    - 睁眼程度：眼睛纵横比相对睁眼基线的比例（由 EyeOpennessMonitor 提供）
+    - 轮廓一致性：虹膜中心到眼睛中心的距离，按眼宽归一化；虹膜跑到眼眶外说明关键点错位
+    - 左右一致性：两只眼按眼宽归一化后的偏移之差；只有一只眼有效时按 single_eye_score 计
+    """
+
+    def __init__(self, point_count: int, contour_rows: slice, stability_scale: float = 0.08,
+                 contour_scale: float = 0.25, agreement_scale: float = 0.1, single_eye_score: float = 0.8, max_gap: float = 0.2):
+        self.contour_rows = contour_rows
+        self.stability_scale = stability_scale
+        self.contour_scale = contour_scale
+        self.agreement_scale = agreement_scale
+        self.single_eye_score = single_eye_score
+        self.max_gap = max_gap
+        # 去掉整体平移的轮廓点坐标 = 矩阵乘以全部关键点，每帧一次矩阵乘法
+        rows = contour_rows.stop - contour_rows.start
+        self.centering = np.zeros((rows, point_count))
+        self.centering[:, contour_rows] = np.eye(rows) - 1.0 / rows
+        self.centered = np.zeros((rows, 2))
+        self.previous = np.zeros((rows, 2))
+        self.motion = np.zeros((rows, 2))
+        self.last_timestamp = None
+        # 最近一帧的各项分数，用于调试和预览
+        self.stability = 1.0
+        self.openness = 1.0
+        self.consistency = 1.0
+        self.agreement = 1.0
+        self.confidence = 1.0
+
+    def reset(self):
+        self.last_timestamp = None
+
+    def update(self, points: np.ndarray, offsets: np.ndarray, eye_widths, aspect: float, openness_ratios,
+               valid_eyes, timestamp: float) -> float:
+        """计算一帧的置信度
+
+        offsets 为左右眼虹膜相对眼睛中心的偏移 (2, 2)（全帧归一化坐标），eye_widths 为左右眼宽度，
+        单位为 x 乘以图像宽高比 aspect 之后的归一化坐标；openness_ratios 为左右眼纵横比相对基线的比例
+        （None 表示不计），valid_eyes 为 [左眼有效, 右眼有效]。
+        """
+        left_width = max(float(eye_widths[0]), 1e-9)
+        right_width = max(float(eye_widths[1]), 1e-9)
+
+        # 稳定性
+        centered = self.centered
+        np.dot(self.centering, points, out=centered)
+        if self.last_timestamp is not None and 0 < timestamp - self.last_timestamp <= self.max_gap:
+            motion = self.motion
+            np.subtract(centered, self.previous, out=motion)
+            motion[:, 0] *= aspect
+            flat = motion.reshape(-1)
+            rms = math.sqrt(float(flat @ flat) / len(motion))
+            self.stability = _score(rms * 2 / (left_width + right_width), self.stability_scale)
+        else:
+            self.stability = 1.0
+        # 交换缓冲区，本帧的结果成为下一帧的 previous
+        self.previous, self.centered = centered, self.previous
+        self.last_timestamp = timestamp
+
+        # 轮廓一致性和左右一致性
+        (lx, ly), (rx, ry) = offsets.tolist()
+        lx *= aspect / left_width
+        ly /= left_width
+        rx *= aspect / right_width
+        ry /= right_width
+        left_valid, right_valid = valid_eyes
+        if left_valid and right_valid:
+            self.consistency = _score(max(math.hypot(lx, ly), math.hypot(rx, ry)), self.contour_scale)
+            self.agreement = _score(math.hypot(lx - rx, ly - ry), self.agreement_scale)
+        else:
+            self.consistency = _score(math.hypot(lx, ly) if left_valid else math.hypot(rx, ry), self.contour_scale)
+            self.agreement = self.single_eye_score
+
+        # 睁眼程度：只看参与计算的眼睛
+        if openness_ratios is None:
+            self.openness = 1.0
+        elif left_valid and right_valid:
+            self.openness = min(1.0, (openness_ratios[0] + openness_ratios[1]) / 2)
+        else:
+            self.openness = min(1.0, openness_ratios[0] if left_valid else openness_ratios[1])
+
+        self.confidence = self.stability * self.openness * self.consistency * self.agreement
+        return self.confidence
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+注视方向滤波模块 - 在分类之前对连续的注视偏移做时域滤波，抑制关键点抖动造成的位置来回跳变
+
+每种滤波器每个样本只做常数次标量运算，状态只有几个浮点数。
+"""
+
+import math
+from typing import Tuple
+
+# 滤波器名称
+FILTER_NONE = 'none'
+FILTER_ONE_EURO = 'one_euro'
+FILTER_KALMAN = 'kalman'
+
+
+class GazeFilter:
+    """滤波器基类：输入 (offset_x, offset_y) 和时间戳（秒），输出滤波后的 (offset_x, offset_y)"""
+
+    name = FILTER_NONE
+
+    def filter(self, value: Tuple[float, float], timestamp: float) -> Tuple[float, float]:
+        return value
+
+    def reset(self):
+        pass
+
+
+class PassthroughFilter(GazeFilter):
+    """不做滤波"""
+
+
+class _OneEuroAxis:
+    """单个坐标轴的 One Euro 滤波状态"""
+
+    __slots__ = ('value', 'derivative')
+
+    def __init__(self):
+        self.value = None
+        self.derivative = 0.0
+
+
+class OneEuroFilter(GazeFilter):
+    """One Euro 滤波器（Casiez 等，2012）
+
+    截止频率随信号变化速度自适应：注视稳定时截止频率低、抖动被压平；
+    快速扫视时截止频率升高，延迟变小。
+    min_cutoff 为静止时的截止频率 (Hz)，beta 为速度对截止频率的增益，d_cutoff 为速度估计的截止频率。
+    """
+
+    name = FILTER_ONE_EURO
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 10.0, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.axes = (_OneEuroAxis(), _OneEuroAxis())
+        self.last_timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, value, timestamp):
+        if self.last_timestamp is None or timestamp <= self.last_timestamp:
+            dt = None
+        else:
+            dt = timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+
+        result = []
+        for axis, x in zip(self.axes, value):
+            if axis.value is None or dt is None:
+                # 第一个样本（或时间戳没有前进）直接作为初值
+                if axis.value is None:
+                    axis.value = x
+                result.append(axis.value)
+                continue
+            derivative = (x - axis.value) / dt
+            a_d = self._alpha(self.d_cutoff, dt)
+            axis.derivative += a_d * (derivative - axis.derivative)
+            cutoff = self.min_cutoff + self.beta * abs(axis.derivative)
+            axis.value += self._alpha(cutoff, dt) * (x - axis.value)
+            result.append(axis.value)
+        return result[0], result[1]
+
+    def reset(self):
+        self.axes = (_OneEuroAxis(), _OneEuroAxis())
+        self.last_timestamp = None
+
+
+class _KalmanAxis:
+    """单个坐标轴的匀速模型卡尔曼滤波状态：位置、速度及其2x2协方差（对称，只存3个数）"""
+
+    __slots__ = ('position', 'velocity', 'p00', 'p01', 'p11')
+
+    def __init__(self, position: float, initial_variance: float):
+        self.position = position
+        self.velocity = 0.0
+        self.p00 = initial_variance
+        self.p01 = 0.0
+        self.p11 = initial_variance
+
+
+class KalmanFilter(GazeFilter):
+    """匀速模型卡尔曼滤波器
+
+    状态为 (偏移, 偏移速度)，过程噪声按白噪声加速度建模。
+    process_noise 为加速度方差 ((偏移/秒²)²)，measurement_noise 为测量噪声方差 (偏移²)。
+    """
+
+    name = FILTER_KALMAN
+
+    def __init__(self, process_noise: float = 0.1, measurement_noise: float = 2e-6):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.axes = None
+        self.last_timestamp = None
+
+    def filter(self, value, timestamp):
+        if self.axes is None:
+            self.axes = tuple(_KalmanAxis(x, self.measurement_noise) for x in value)
+            self.last_timestamp = timestamp
+            return value[0], value[1]
+
+        dt = max(0.0, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+        q = self.process_noise
+        r = self.measurement_noise
+        q00 = q * dt ** 4 / 4
+        q01 = q * dt ** 3 / 2
+        q11 = q * dt ** 2
+
+        result = []
+        for axis, z in zip(self.axes, value):
+            # 预测
+            axis.position += axis.velocity * dt
+            p00 = axis.p00 + dt * (2 * axis.p01 + dt * axis.p11) + q00
+            p01 = axis.p01 + dt * axis.p11 + q01
+            p11 = axis.p11 + q11
+
+            # 更新
+            s = p00 + r
+            k0 = p00 / s
+            k1 = p01 / s
+            innovation = z - axis.position
+            axis.position += k0 * innovation
+            axis.velocity += k1 * innovation
+            axis.p00 = (1 - k0) * p00
+            axis.p01 = (1 - k0) * p01
+            axis.p11 = p11 - k1 * p01
+            result.append(axis.position)
+        return result[0], result[1]
+
+    def reset(self):
+        self.axes = None
+        self.last_timestamp = None
+
+
+GAZE_FILTERS = {
+    FILTER_NONE: PassthroughFilter,
+    FILTER_ONE_EURO: OneEuroFilter,
+    FILTER_KALMAN: KalmanFilter,
+}
+
+
+def create_gaze_filter(name: str, **params) -> GazeFilter:
+    """按名称创建滤波器，参数见各滤波器的构造函数"""
+    if name not in GAZE_FILTERS:
+        raise ValueError(f"未知的注视滤波器: {name}")
+    return GAZE_FILTERS[name](**params)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+手势识别模块 - 用显式有限状态机识别注视位置序列中的滚动手势
+
+每个样本只更新固定大小的环形窗口和几个计数器，耗时与历史长度无关：
+- 向下看一下再向上看一下（bottom -> top）：向下滚动一次
+- 向上看一下再向下看一下（top -> bottom）：向上滚动一次
+- 最近的窗口中多数为 bottom / top：持续向下 / 向上滚动，速度随眼球运动速度更新
+- 持续滚动时注视回到中心：停止滚动
+"""
+
+from collections import deque
+
+# 状态
+STATE_IDLE = 'stop'
+STATE_ONCE_UP = 'scroll_up_once'
+STATE_ONCE_DOWN = 'scroll_down_once'
+STATE_CONTINUOUS_UP = 'continuous_scroll_up'
+STATE_CONTINUOUS_DOWN = 'continuous_scroll_down'
+
+SCROLLING_STATES = (STATE_ONCE_UP, STATE_ONCE_DOWN, STATE_CONTINUOUS_UP, STATE_CONTINUOUS_DOWN)
+
+# 动作（update() 的输出）
+ACTION_SCROLL_UP_ONCE = 'scroll_up_once'
+ACTION_SCROLL_DOWN_ONCE = 'scroll_down_once'
+ACTION_START_CONTINUOUS_UP = 'start_continuous_up'
+ACTION_START_CONTINUOUS_DOWN = 'start_continuous_down'
+ACTION_UPDATE_SPEED = 'update_speed'
+ACTION_STOP = 'stop'
+
+NO_ACTIONS = ()
+
+# 位置编号，用于窗口计数
+POSITION_CODES = {'center': 0, 'top': 1, 'bottom': 2}
+_OTHER = 3
+
+
+def movement_speed(changes: int) -> int:
+    """把最近1秒内的位置变化次数映射到眼球运动速度 1-10
+
+    0-1次变化：速度1-2；2-3次：3-4；4-5次：6-7；6次以上：9-10
+    """
+    if changes <= 1:
+        speed = 1 + changes
+    elif changes <= 3:
+        speed = 3 + (changes - 2)
+    elif changes <= 5:
+        speed = 6 + (changes - 4)
+    else:
+        speed = min(10, 9 + (changes - 6) * 0.5)
+    return int(speed)
+
+
+class GestureEngine:
+    """手势状态机
+
+    window 为识别手势的窗口长度（最近几个样本），min_count 为持续注视所需的样本数；
+    history_size 和 speed_window 决定眼球运动速度的统计范围（最近 history_size 个样本中、
+    最近 speed_window 秒内的位置变化次数）；单次滚动在 pulse_duration 秒后自动停止。
+
+    所有时间都使用调用方传入的样本时间戳，因此回放录制序列时结果可复现。
+    """
+
+    def __init__(self, window: int = 3, min_count: int = 2, history_size: int = 10, speed_window: float = 1.0,
+                 pulse_duration: float = 0.5):
+        self.window = window
+        self.min_count = min_count
+        self.history_size = history_size
+        self.speed_window = speed_window
+        self.pulse_duration = pulse_duration
+        self.reset()
+
+    def reset(self):
+        """清空历史并回到空闲状态"""
+        self.state = STATE_IDLE
+        self.pulse_deadline = None
+        self.speed = 1
+        self.sample_count = 0
+
+        # 手势窗口：环形缓冲区 + 各位置计数 + 窗口内相邻位置对的计数
+        self.ring = [_OTHER] * self.window
+        self.ring_index = 0
+        self.position_counts = [0] * 4
+        self.pair_counts = {}
+        self.last_code = None
+
+        # 速度统计：发生变化的相邻样本对中较旧样本的 (序号, 时间戳)
+        self.changes = deque(maxlen=self.history_size)
+        self.last_timestamp = None
+
+    @property
+    def continuous(self) -> bool:
+        """是否处于持续滚动状态"""
+        return self.state in (STATE_CONTINUOUS_UP, STATE_CONTINUOUS_DOWN)
+
+    def _push(self, code: int):
+        """把新样本放入窗口，O(1) 更新位置计数和相邻对计数"""
+        window = self.window
+        if self.sample_count >= window:
+            # 移出最旧的样本，以及它与下一个样本组成的相邻对
+            oldest = self.ring[self.ring_index]
+            following = self.ring[(self.ring_index + 1) % window]
+            self.position_counts[oldest] -= 1
+            self.pair_counts[(oldest, following)] -= 1
+        if self.last_code is not None:
+            pair = (self.last_code, code)
+            self.pair_counts[pair] = self.pair_counts.get(pair, 0) + 1
+        self.ring[self.ring_index] = code
+        self.ring_index = (self.ring_index + 1) % window
+        self.position_counts[code] += 1
+        self.last_code = code
+
+    def _update_speed(self, code: int, timestamp: float):
+        """O(1) 摊还更新眼球运动速度"""
+        index = self.sample_count
+        changes = self.changes
+        if self.last_code is not None and code != self.last_code:
+            changes.append((index - 1, self.last_timestamp))
+        # 只统计最近 history_size 个样本、最近 speed_window 秒内的变化
+        oldest_index = index - self.history_size + 1
+        while changes and (changes[0][0] < oldest_index or timestamp - changes[0][1] > self.speed_window):
+            changes.popleft()
+        self.last_timestamp = timestamp
+        if index + 1 < 3:
+            return 1
+        return movement_speed(len(changes))
+
+    def update(self, position: str, timestamp: float):
+        """输入一个注视位置样本，返回本次需要执行的动作元组（通常为空）"""
+        actions = NO_ACTIONS
+        # 单次滚动到期，先停止
+        if self.pulse_deadline is not None and timestamp >= self.pulse_deadline:
+            actions = self.stop()
+
+        code = POSITION_CODES.get(position, _OTHER)
+        self.speed = self._update_speed(code, timestamp)
+        self._push(code)
+        self.sample_count += 1
+        if self.sample_count < self.window:
+            return actions
+
+        top, bottom = POSITION_CODES['top'], POSITION_CODES['bottom']
+        continuous = self.continuous
+
+        # bottom -> top：向下滚动一次；top -> bottom：向上滚动一次（持续滚动时不触发）
+        if not continuous and self.pair_counts.get((bottom, top), 0) > 0:
+            return actions + self._pulse(STATE_ONCE_DOWN, ACTION_SCROLL_DOWN_ONCE, timestamp)
+        if not continuous and self.pair_counts.get((top, bottom), 0) > 0:
+            return actions + self._pulse(STATE_ONCE_UP, ACTION_SCROLL_UP_ONCE, timestamp)
+
+        # 窗口中多数为 bottom / top：持续滚动
+        if self._sustained(bottom):
+            return actions + self._continuous(STATE_CONTINUOUS_DOWN, ACTION_START_CONTINUOUS_DOWN)
+        if self._sustained(top):
+            return actions + self._continuous(STATE_CONTINUOUS_UP, ACTION_START_CONTINUOUS_UP)
+
+        # 持续滚动时注视回到中心：停止
+        if code == POSITION_CODES['center'] and continuous:
+            return actions + self.stop()
+        return actions
+
+    def _sustained(self, code: int) -> bool:
+        """窗口中某位置至少有 min_count 个且占一半以上"""
+        count = self.position_counts[code]
+        return count >= self.min_count and 2 * count >= self.window
+
+    def _pulse(self, state: str, action: str, timestamp: float):
+        self.state = state
+        self.pulse_deadline = timestamp + self.pulse_duration
+        return (action,)
+
+    def _continuous(self, state: str, action: str):
+        if self.state == state:
+            return (ACTION_UPDATE_SPEED,)
+        self.state = state
+        self.pulse_deadline = None
+        return (action,)
+
+    def stop(self):
+        """停止当前滚动（例如未检测到眼睛时）；正在滚动时返回 (ACTION_STOP,)"""
+        self.pulse_deadline = None
+        if self.state in SCROLLING_STATES:
+            self.state = STATE_IDLE
+            return (ACTION_STOP,)
+        return NO_ACTIONS
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+头部姿态模块 - 用FaceMesh已输出的6个关键点和 cv2.solvePnP 估计头部俯仰角和偏航角，
+用于从注视偏移中扣除点头、转头造成的变化
+"""
+
+import math
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 参与解算的关键点：鼻尖、下巴、左眼外角、右眼外角、左嘴角、右嘴角
+HEAD_POSE_LANDMARKS = [1, 152, 263, 33, 291, 61]
+
+# 通用人脸模型上对应点的三维坐标（毫米），与OpenCV相机坐标系一致：x 向右、y 向下、z 指向场景深处。
+# FaceMesh 的"左眼/左嘴角"（263、291）总是位于输入图像的右侧
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),          # 鼻尖
+    (0.0, 330.0, 65.0),       # 下巴
+    (225.0, -170.0, 135.0),   # 左眼外角
+    (-225.0, -170.0, 135.0),  # 右眼外角
+    (150.0, 150.0, 125.0),    # 左嘴角
+    (-150.0, 150.0, 125.0),   # 右嘴角
+])
+
+
+class HeadPoseEstimator:
+    """头部姿态估计器
+
+    相机内参按帧尺寸缓存（焦距取图像宽度、主点在图像中心、无畸变），模型点数组和图像点缓冲区预先分配并复用。
+    使用 SQPnP 求解：直接得到全局最优解，不需要初值，6个点时比迭代法快2-4倍。
+    俯仰角低头为正，偏航角鼻尖转向图像左侧为正，单位为弧度。
+    """
+
+    def __init__(self):
+        self.model_points = MODEL_POINTS.copy()
+        self.image_points = np.zeros((len(MODEL_POINTS), 2))
+        self.dist_coeffs = np.zeros(4)
+        self.camera_matrix = None
+        self.frame_size = None
+        self.pitch = 0.0
+        self.yaw = 0.0
+
+    def _camera_matrix(self, width: int, height: int) -> np.ndarray:
+        if self.frame_size != (width, height):
+            self.frame_size = (width, height)
+            self.camera_matrix = np.array([
+                [width, 0.0, width / 2],
+                [0.0, width, height / 2],
+                [0.0, 0.0, 1.0],
+            ])
+        return self.camera_matrix
+
+    def estimate(self, points: np.ndarray, width: int, height: int) -> Optional[Tuple[float, float]]:
+        """由6个关键点的全帧归一化坐标 (6, 2) 估计 (俯仰角, 偏航角)，失败时返回 None"""
+        camera_matrix = self._camera_matrix(width, height)
+        image_points = self.image_points
+        np.multiply(points, (width, height), out=image_points)
+        ok, rvec, tvec = cv2.solvePnP(self.model_points, image_points, camera_matrix, self.dist_coeffs,
+                                      flags=cv2.SOLVEPNP_SQPNP)
+        if not ok or tvec[2, 0] <= 0:
+            return None
+
+        rotation, _ = cv2.Rodrigues(rvec)
+        # 旋转矩阵的第三列是模型 z 轴（面部朝向的反方向）在相机坐标系中的方向
+        self.pitch = math.atan2(-rotation[1, 2], rotation[2, 2])
+        self.yaw = math.asin(max(-1.0, min(1.0, rotation[0, 2])))
+        return self.pitch, self.yaw
+
+
+class HeadPoseCompensator:
+    """从注视偏移中扣除头部姿态变化的影响
+
+    参考姿态为俯仰角/偏航角的指数加权平均（时间常数 reference_time 秒），只反映缓慢的姿势变化；
+    点头、转头等快速变化按 pitch_gain / yaw_gain（偏移/弧度）换算后从注视偏移中扣除。
+    """
+
+    def __init__(self, pitch_gain: float = 0.02, yaw_gain: float = 0.0, reference_time: float = 10.0):
+        self.pitch_gain = pitch_gain
+        self.yaw_gain = yaw_gain
+        self.reference_time = reference_time
+        self.reset()
+
+    def reset(self):
+        self.reference_pitch = None
+        self.reference_yaw = None
+        self.last_timestamp = None
+
+    def compensate(self, offset: Tuple[float, float], pitch: float, yaw: float,
+                   timestamp: float) -> Tuple[float, float]:
+        """返回扣除头部姿态影响后的 (offset_x, offset_y)，同时更新参考姿态"""
+        if self.reference_pitch is None:
+            self.reference_pitch = pitch
+            self.reference_yaw = yaw
+        elif timestamp > self.last_timestamp:
+            alpha = 1.0 - math.exp(-(timestamp - self.last_timestamp) / self.reference_time)
+            self.reference_pitch += alpha * (pitch - self.reference_pitch)
+            self.reference_yaw += alpha * (yaw - self.reference_yaw)
+        self.last_timestamp = timestamp
+        # 低头时虹膜在眼眶中相对上移，offset_y（向上看为正）随之增大
+        return (offset[0] - self.yaw_gain * (yaw - self.reference_yaw),
+                offset[1] - self.pitch_gain * (pitch - self.reference_pitch))
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+性能测量模块 - 用预分配的环形数组记录各处理阶段的耗时，以及运行时的计数器和仪表，
+可导出为 JSON-lines 文件或 Prometheus 文本格式
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# 处理阶段编号（热路径中直接用整数下标，避免字典查找）
+STAGE_FLIP = 0         # 预览画面水平翻转（镜像显示）
+STAGE_RESIZE = 1       # 推理前缩放
+STAGE_CVT_COLOR = 2    # BGR -> RGB
+STAGE_FACE_MESH = 3    # face_mesh.process
+STAGE_LANDMARKS = 4    # 关键点提取与特征计算
+STAGE_CLASSIFY = 5     # 注视方向与位置分类
+STAGE_GESTURE = 6      # 手势/趋势分析
+STAGE_DRAW = 7         # 绘制预览
+STAGE_DISPLAY = 8      # imshow/waitKey
+STAGE_FLOW = 9         # 关键帧之间的光流跟踪
+STAGE_FILTER = 10      # 注视偏移时域滤波
+STAGE_HEAD_POSE = 11   # 头部姿态估计与补偿
+
+STAGE_NAMES = ('flip', 'resize', 'cvtColor', 'face_mesh', 'landmarks', 'classify', 'gesture', 'draw', 'display',
+               'flow', 'filter', 'head_pose')
+
+# 直方图桶边界（毫秒），对数分布
+HISTOGRAM_EDGES_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class StageTimer:
+    """阶段计时器
+
+    每个阶段有一行固定长度的环形数组保存最近 capacity 个耗时样本（秒）。
+    每个阶段只应由一个线程写入，读取统计时允许与写入并发（得到近似结果）。
+
+    用法：
+        t = time.perf_counter()
+        ...  # 阶段A
+        t = timer.lap(STAGE_A, t)
+        ...  # 阶段B
+        t = timer.lap(STAGE_B, t)
+    """
+
+    def __init__(self, capacity: int = 4096, stage_names=STAGE_NAMES):
+        self.capacity = capacity
+        self.stage_names = stage_names
+        self.samples = np.zeros((len(stage_names), capacity))
+        self.counts = [0] * len(stage_names)
+
+    def lap(self, stage: int, start: float) -> float:
+        """记录从 start 到现在的耗时，返回当前时间作为下一阶段的起点"""
+        now = time.perf_counter()
+        count = self.counts[stage]
+        self.samples[stage, count % self.capacity] = now - start
+        self.counts[stage] = count + 1
+        return now
+
+    def add(self, stage: int, seconds: float):
+        """直接记录一个耗时样本"""
+        count = self.counts[stage]
+        self.samples[stage, count % self.capacity] = seconds
+        self.counts[stage] = count + 1
+
+    def reset(self):
+        """清空所有样本"""
+        self.counts = [0] * len(self.stage_names)
+
+    def stage_samples(self, stage: int) -> np.ndarray:
+        """某阶段当前保存的样本（秒）"""
+        return self.samples[stage, :min(self.counts[stage], self.capacity)]
+
+    def summary(self) -> dict:
+        """各阶段的耗时统计（毫秒），包含百分位数和直方图；没有样本的阶段不输出"""
+        result = {}
+        edges = np.array((0.0,) + HISTOGRAM_EDGES_MS + (np.inf,))
+        for stage, name in enumerate(self.stage_names):
+            samples = self.stage_samples(stage) * 1000
+            if len(samples) == 0:
+                continue
+            p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+            hist, _ = np.histogram(samples, bins=edges)
+            result[name] = {
+                'count': self.counts[stage],
+                'mean_ms': float(samples.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(samples.max()),
+                'histogram': {'edges_ms': list(HISTOGRAM_EDGES_MS), 'counts': hist.tolist()},
+            }
+        return result
+
+    def format_summary(self) -> str:
+        """格式化为表格"""
+        lines = [f"{'stage':>10} {'count':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:>10} {s['count']:>7} {s['mean_ms']:>8.3f} {s['p50_ms']:>8.3f} "
+                         f"{s['p95_ms']:>8.3f} {s['p99_ms']:>8.3f} {s['max_ms']:>8.3f}")
+        return "\n".join(lines)
+
+
+# 计数器编号
+COUNTER_FRAMES = 0          # 处理的帧数
+COUNTER_DETECTIONS = 1      # 检测到面部的帧数
+COUNTER_MISSES = 2          # 未检测到面部的帧数
+COUNTER_GESTURES = 3        # 触发的手势（单次滚动和持续滚动）
+COUNTER_SCROLL_STARTS = 4   # 开始滚动次数
+COUNTER_SCROLL_STOPS = 5    # 停止滚动次数
+COUNTER_THREAD_SPAWNS = 6   # 为滚动创建的线程数（含定时器）
+COUNTER_BLINKS = 7          # 检测到的眨眼次数
+
+COUNTER_NAMES = ('frames', 'detections', 'misses', 'gesture_triggers', 'scroll_starts', 'scroll_stops',
+                 'thread_spawns', 'blinks')
+
+# 仪表编号
+GAUGE_SCROLL_SPEED = 0      # 当前滚动速度
+GAUGE_FRAME_AGE_MS = 1      # 最近一帧从采集到显示的帧龄 (毫秒)
+
+GAUGE_NAMES = ('scroll_speed', 'frame_age_ms')
+
+METRIC_PREFIX = 'eye_scroll'
+
+
+class Metrics:
+    """运行时指标：计数器、仪表和阶段耗时
+
+    计数器和仪表都保存在固定长度的列表里，热路径上只做一次下标写入。
+    写入不加锁；同一指标大多只由一个线程写入，偶尔的并发写入最多少计一次，可以接受。
+    阶段耗时复用 StageTimer（由 EyeTracker 和 EyeScrollController 共用）。
+    """
+
+    def __init__(self, timer: StageTimer = None):
+        self.timer = timer if timer is not None else StageTimer()
+        self.counters = [0] * len(COUNTER_NAMES)
+        self.gauges = [0.0] * len(GAUGE_NAMES)
+        self.start_time = time.monotonic()
+
+    def inc(self, counter: int, amount: int = 1):
+        """计数器加一"""
+        self.counters[counter] += amount
+
+    def set(self, gauge: int, value: float):
+        """设置仪表的值"""
+        self.gauges[gauge] = value
+
+    def snapshot(self) -> dict:
+        """当前所有指标的快照（导出线程调用，不在热路径上）"""
+        stages = {}
+        for name, s in self.timer.summary().items():
+            stages[name] = {key: value for key, value in s.items() if key != 'histogram'}
+        return {
+            'time': time.time(),
+            'uptime_s': time.monotonic() - self.start_time,
+            'counters': dict(zip(COUNTER_NAMES, self.counters)),
+            'gauges': dict(zip(GAUGE_NAMES, self.gauges)),
+            'stages': stages,
+        }
+
+    def format_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot['counters'].items():
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, value in snapshot['gauges'].items():
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        metric = f"{METRIC_PREFIX}_stage_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, s in snapshot['stages'].items():
+            for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                lines.append(f'{metric}{{stage="{name}",quantile="{quantile}"}} {s[key] / 1000:.9f}')
+            # 样本环形缓冲区只保留最近的样本，_sum 按均值和总数估算
+            lines.append(f'{metric}_sum{{stage="{name}"}} {s["mean_ms"] * s["count"] / 1000:.9f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {s["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+class JsonLinesExporter:
+    """后台线程定期把指标快照追加到 JSON-lines 文件"""
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 5.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='MetricsJsonLines', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        with open(self.path, 'a') as f:
+            while not self.stop_event.wait(self.interval):
+                self._write(f)
+            # 退出前再写一次，保留最终数值
+            self._write(f)
+
+    def _write(self, f):
+        f.write(json.dumps(self.metrics.snapshot()) + "\n")
+        f.flush()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+
+class PrometheusExporter:
+    """在本地HTTP线程中提供 Prometheus 文本格式的 /metrics"""
+
+    def __init__(self, metrics: Metrics, port: int, host: str = '127.0.0.1'):
+        self.metrics = metrics
+        self.address = (host, port)
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.format_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 不输出访问日志
+
+        self.server = ThreadingHTTPServer(self.address, Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='MetricsHTTP', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
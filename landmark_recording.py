@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+关键点录制模块 - 把每帧的关键点和时间戳保存为可内存映射的NumPy结构化数组，
+回放时跳过FaceMesh，直接驱动注视分类和手势逻辑
+"""
+
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+RECORDING_VERSION = 1
+
+
+def recording_dtype(num_points: int) -> np.dtype:
+    """录制文件的记录格式：时间戳、是否检测到面部、关键点坐标（float32，与FaceMesh输出精度一致）"""
+    return np.dtype([
+        ('timestamp', '<f8'),
+        ('detected', '?'),
+        ('points', '<f4', (num_points, 2)),
+    ])
+
+
+def metadata_path(path: str) -> str:
+    """元数据文件路径（记录关键点索引，保证回放时的点序与当前代码一致）"""
+    return path + '.json'
+
+
+def partial_path(path: str) -> str:
+    """录制过程中追加写入的原始记录文件，正常结束时转换为 .npy 并删除"""
+    return path + '.part'
+
+
+class LandmarkRecorder:
+    """关键点录制器
+
+    每帧写入内存中固定大小的块，块写满时追加到 .part 文件并刷新到磁盘，close() 时转换为 .npy 文件。
+    进程被强制结束时最多丢失最后一个块，已写入的部分仍可由 load_landmark_recording 读取。
+    """
+
+    def __init__(self, path: str, indices: List[int], flush_frames: int = 300):
+        if not path.endswith('.npy'):
+            path += '.npy'
+        self.path = path
+        self.indices = list(indices)
+        self.dtype = recording_dtype(len(self.indices))
+        self.chunk = np.zeros(max(1, flush_frames), dtype=self.dtype)
+        self.pending = 0  # 块中尚未写入文件的帧数
+        self.count = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._write_metadata()
+        self.file = open(partial_path(self.path), 'wb')
+
+    def _write_metadata(self, frames: Optional[int] = None):
+        meta = {'version': RECORDING_VERSION, 'indices': self.indices}
+        if frames is not None:
+            meta['frames'] = frames
+        with open(metadata_path(self.path), 'w') as f:
+            json.dump(meta, f)
+
+    def record(self, timestamp: float, points: Optional[np.ndarray]):
+        """记录一帧；未检测到面部时 points 为 None"""
+        record = self.chunk[self.pending]
+        record['timestamp'] = timestamp
+        record['detected'] = points is not None
+        if points is not None:
+            record['points'] = points
+        self.pending += 1
+        self.count += 1
+        if self.pending == len(self.chunk):
+            self.flush()
+
+    def flush(self):
+        """把块中的记录追加到 .part 文件"""
+        if self.pending:
+            self.file.write(self.chunk[:self.pending].tobytes())
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        """保存录制结果"""
+        self.flush()
+        self.file.close()
+        part = partial_path(self.path)
+        np.save(self.path, np.fromfile(part, dtype=self.dtype), allow_pickle=False)
+        os.remove(part)
+        self._write_metadata(self.count)
+        print(f"关键点录制已保存: {self.path} ({self.count} 帧)")
+
+
+def load_landmark_recording(path: str) -> Tuple[np.ndarray, dict]:
+    """以内存映射方式打开录制文件，返回 (记录数组, 元数据)
+
+    录制没有正常结束（只有 .part 文件）时读取其中完整写入的记录。
+    """
+    meta = {}
+    if os.path.exists(metadata_path(path)):
+        with open(metadata_path(path)) as f:
+            meta = json.load(f)
+    part = partial_path(path)
+    if not os.path.exists(path) and os.path.exists(part) and 'indices' in meta:
+        dtype = recording_dtype(len(meta['indices']))
+        count = os.path.getsize(part) // dtype.itemsize
+        print(f"警告: 录制没有正常结束，读取已写入的 {count} 帧: {part}")
+        if count == 0:
+            return np.zeros(0, dtype=dtype), meta
+        return np.memmap(part, dtype=dtype, mode='r', shape=(count,)), meta
+    records = np.load(path, mmap_mode='r', allow_pickle=False)
+    return records, meta
+
+
+def recorded_point_count(meta: dict, indices: List[int]) -> Optional[int]:
+    """录制中每帧的关键点数；与当前关键点索引不兼容时返回 None
+
+    之后新增的分组追加在索引末尾，旧录制的关键点仍是当前索引的前缀，可以回放（缺少的分组不可用）。
+    """
+    recorded = meta.get('indices')
+    if recorded is None:
+        return len(indices)
+    if recorded == list(indices[:len(recorded)]):
+        return len(recorded)
+    return None
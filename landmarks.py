@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+关键点提取模块 - 每帧把需要的面部关键点一次性转换为NumPy数组，再做向量化计算
+"""
+
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# FaceMesh 关键点的左右对称对（只列出本项目用到的点），以及位于面部中线上、与自身对称的点。
+# 对原始画面推理时，把第 i 号点换成与它对称的点并把 x 镜像为 1 - x，
+# 结果与对水平翻转后的画面推理的第 i 号点一致（录像上实测平均差异小于1像素）
+MIRROR_PAIRS = [
+    (33, 263), (133, 362), (160, 387), (158, 385), (144, 373), (153, 380),  # 眼睛轮廓
+    (469, 476), (470, 475), (471, 474), (472, 477),                          # 虹膜
+    (234, 454), (61, 291),                                                   # 脸颊、嘴角
+]
+MIDLINE_LANDMARKS = [1, 10, 152]  # 鼻尖、额头、下巴
+
+
+def mirrored_landmark(index: int) -> int:
+    """与第 index 号关键点左右对称的关键点"""
+    if index in MIDLINE_LANDMARKS:
+        return index
+    for a, b in MIRROR_PAIRS:
+        if index == a:
+            return b
+        if index == b:
+            return a
+    raise ValueError(f"没有关键点 {index} 的对称点，请补充 MIRROR_PAIRS")
+
+
+class EyeFeatures:
+    """由关键点数组计算出的眼部特征，第0行为左眼，第1行为右眼
+
+    所有字段都是同一个 (7, 2) 缓冲区的视图，由一次矩阵乘法整体更新。
+    """
+
+    def __init__(self):
+        self.buffer = np.zeros((7, 2))
+        self.eye_centers = self.buffer[0:2]   # 眼睛轮廓中心 (x, y)
+        self.iris_centers = self.buffer[2:4]  # 虹膜中心 (x, y)
+        self.offsets = self.buffer[4:6]       # 虹膜相对眼睛中心的偏移
+        self.mean_offset = self.buffer[6]     # 双眼平均偏移
+
+
+class LandmarkExtractor:
+    """关键点提取器
+
+    把 LEFT_EYE、RIGHT_EYE、LEFT_IRIS、RIGHT_IRIS 以及额外分组的关键点按固定顺序
+    收集到一个 (K, 2) 的数组里（全帧归一化坐标）。数组来自预分配的缓冲池，循环复用，
+    所以同一时刻在流水线中流动的帧数不能超过 pool_size。
+
+    mirror=True 时输入的是未翻转的摄像头画面，提取时读取对称的关键点并把 x 镜像为 1 - x，
+    输出与先水平翻转画面再推理相同（见 MIRROR_PAIRS），省去每帧复制整帧图像。
+    """
+
+    def __init__(self, left_eye: List[int], right_eye: List[int], left_iris: List[int], right_iris: List[int],
+                 extra_groups: Optional[Dict[str, List[int]]] = None, pool_size: int = 8, mirror: bool = False):
+        if len(left_eye) != len(right_eye) or len(left_iris) != len(right_iris):
+            raise ValueError("左右眼的关键点数量必须一致")
+
+        groups = {
+            'left_eye': left_eye,
+            'right_eye': right_eye,
+            'left_iris': left_iris,
+            'right_iris': right_iris,
+        }
+        groups.update(extra_groups or {})
+
+        # 每个分组在数组中的行范围
+        self.slices = {}
+        self.indices = []
+        for name, group in groups.items():
+            start = len(self.indices)
+            self.indices.extend(group)
+            self.slices[name] = slice(start, len(self.indices))
+        self.mirror = mirror
+        # 实际从FaceMesh结果中读取的关键点
+        self.source_indices = [mirrored_landmark(idx) for idx in self.indices] if mirror else self.indices
+
+        # 特征都是关键点的线性组合：预先构建权重矩阵，每帧只做一次矩阵乘法
+        eye_weight = 1.0 / len(left_eye)
+        iris_weight = 1.0 / len(left_iris)
+        weights = np.zeros((7, len(self.indices)))
+        for row, (eye_name, iris_name) in enumerate((('left_eye', 'left_iris'), ('right_eye', 'right_iris'))):
+            weights[row, self.slices[eye_name]] = eye_weight
+            weights[2 + row, self.slices[iris_name]] = iris_weight
+        weights[4:6] = weights[2:4] - weights[0:2]
+        weights[6] = weights[4:6].mean(axis=0)
+        self.feature_weights = weights
+
+        # 眼睛睁开程度（眼睛纵横比 EAR）用到的轮廓点差向量：每只眼两条竖直方向的弦和一条眼角连线。
+        # 要求6点轮廓按 [眼角, 上, 上, 眼角, 下, 下] 的顺序排列（与 EyeTracker.LEFT_EYE/RIGHT_EYE 一致）
+        self.contour_weights = None
+        if len(left_eye) == 6:
+            contour_weights = np.zeros((6, len(self.indices)))
+            for row, eye_name in enumerate(('left_eye', 'right_eye')):
+                first = self.slices[eye_name].start
+                for chord, (a, b) in enumerate(((1, 5), (2, 4), (0, 3))):
+                    contour_weights[3 * row + chord, first + a] = 1.0
+                    contour_weights[3 * row + chord, first + b] = -1.0
+            self.contour_weights = contour_weights
+        self.contour_diffs = np.zeros((6, 2))
+        self.openness = np.zeros(2)
+        self.eye_widths = np.zeros(2)  # 眼角距离，单位与 compute_openness 的 aspect 换算后一致
+
+        self.pool = [np.zeros((len(self.indices), 2)) for _ in range(max(1, pool_size))]
+        self.pool_index = 0
+
+        # 特征计算使用的预分配结果
+        self.features = EyeFeatures()
+
+    def acquire(self) -> np.ndarray:
+        """从缓冲池取出下一个 (K, 2) 数组"""
+        points = self.pool[self.pool_index]
+        self.pool_index = (self.pool_index + 1) % len(self.pool)
+        return points
+
+    def extract(self, face_landmarks) -> np.ndarray:
+        """从FaceMesh结果中收集关键点，返回 (K, 2) 数组"""
+        points = self.acquire()
+
+        landmark = face_landmarks.landmark
+        selected = [landmark[idx] for idx in self.source_indices]
+        flat = points.reshape(-1)
+        if self.mirror:
+            flat[0::2] = [1.0 - point.x for point in selected]
+        else:
+            flat[0::2] = [point.x for point in selected]
+        flat[1::2] = [point.y for point in selected]
+        return points
+
+    @staticmethod
+    def remap(points: np.ndarray, offset, scale) -> np.ndarray:
+        """原地把裁剪区域内的归一化坐标映射回全帧归一化坐标"""
+        np.multiply(points, scale, out=points)
+        np.add(points, offset, out=points)
+        return points
+
+    def group(self, points: np.ndarray, name: str) -> np.ndarray:
+        """取出某个分组的关键点（视图）"""
+        return points[self.slices[name]]
+
+    def compute_features(self, points: np.ndarray) -> EyeFeatures:
+        """向量化计算眼睛中心、虹膜中心和偏移
+
+        返回的 EyeFeatures 是预分配对象，下一次调用时会被覆盖。
+        """
+        features = self.features
+        np.dot(self.feature_weights, points, out=features.buffer)
+        return features
+
+    def compute_openness(self, points: np.ndarray, aspect: float = 1.0) -> np.ndarray:
+        """计算左右眼的眼睛纵横比 (两条竖直弦长之和 / 2倍眼角距离)，返回 (2,) 数组
+
+        两只眼的6个弦向量由一次矩阵乘法得到；只剩6个长度，逐个用标量运算比再做几次小数组运算更快。
+        aspect 为图像宽高比：归一化坐标的 x 乘以它之后横纵单位一致。眼角距离同时保存在 eye_widths 中。
+        返回的是预分配数组，下一次调用时会被覆盖。
+        """
+        diffs = self.contour_diffs
+        np.dot(self.contour_weights, points, out=diffs)
+        (x1, y1), (x2, y2), (x3, y3), (x4, y4), (x5, y5), (x6, y6) = diffs.tolist()
+        hypot = math.hypot
+        left_width = max(hypot(x3 * aspect, y3), 1e-9)
+        right_width = max(hypot(x6 * aspect, y6), 1e-9)
+        self.eye_widths[0] = left_width
+        self.eye_widths[1] = right_width
+        openness = self.openness
+        openness[0] = (hypot(x1 * aspect, y1) + hypot(x2 * aspect, y2)) / (2 * left_width)
+        openness[1] = (hypot(x4 * aspect, y4) + hypot(x5 * aspect, y5)) / (2 * right_width)
+        return openness
@@ -1,17 +1,72 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import cv2
-import threading
+import json
+import numpy as np
+import queue
+import signal
 import time
 import config
+from async_log import LOG_GESTURE, LOG_SCROLL, LOG_STATUS, get_logger
+from calibration import profile_path
+from control_server import (CMD_CALIBRATE, CMD_PAUSE, CMD_QUIT, CMD_RESUME, CMD_STATUS, CMD_TOGGLE_PAUSE,
+                            CMD_TOGGLE_PREVIEW, CONTROL_COMMANDS, ControlServer)
+from eye_openness import EVENT_BLINK, EVENT_EYES_CLOSED
 from eye_tracker import EyeTracker
-from screen_controller import ScreenController
+from frame_capture import FrameGrabber
+from frame_source import PACING_FAST, PACING_REALTIME, open_frame_source
+from gesture import (ACTION_SCROLL_DOWN_ONCE, ACTION_SCROLL_UP_ONCE, ACTION_START_CONTINUOUS_DOWN,
+                     ACTION_START_CONTINUOUS_UP, ACTION_STOP, ACTION_UPDATE_SPEED, GestureEngine)
+from instrumentation import (COUNTER_BLINKS, COUNTER_DETECTIONS, COUNTER_FRAMES, COUNTER_GESTURES, COUNTER_MISSES,
+                             COUNTER_SCROLL_STARTS, COUNTER_SCROLL_STOPS, GAUGE_FRAME_AGE_MS, GAUGE_SCROLL_SPEED,
+                             STAGE_DISPLAY, STAGE_DRAW, STAGE_FLIP, STAGE_GESTURE, JsonLinesExporter, Metrics,
+                             PrometheusExporter)
+from landmark_recording import LandmarkRecorder, load_landmark_recording, recorded_point_count
+from pipeline import BLOCK, Pipeline, QueueClosed
+from preview_renderer import CalibrationScreen, PreviewRenderer
+from screen_controller import SCROLL_DOWN, SCROLL_UP, ScreenController
+from scroll_backends import BACKEND_RECORDING, SCROLL_BACKENDS, create_scroll_backend
+from velocity_control import CONTROL_MODES, CONTROL_VELOCITY, GazeVelocityMapper
+
+# 预览窗口按键对应的控制命令
+KEY_COMMANDS = {
+    ord('q'): CMD_QUIT,
+    ord('s'): CMD_TOGGLE_PREVIEW,
+    ord('c'): CMD_CALIBRATE,
+    ord('p'): CMD_TOGGLE_PAUSE,
+}
+
+class FramePacket:
+    """在流水线各阶段之间传递的一帧数据"""
+    
+    def __init__(self, frame, timestamp: float, index: int, source_time: float):
+        self.frame = frame
+        self.timestamp = timestamp  # 采集时间戳（time.monotonic）
+        self.index = index
+        self.source_time = source_time  # 帧源时间戳，手势逻辑使用该时间轴
+        self.landmarks = None  # 关键点数组（全帧归一化坐标）
+        self.keyframe = True  # 关键点来自FaceMesh推理（False 表示光流跟踪帧）
+        self.position = None
+        self.confidence = 0.0
+        self.gaze_direction = None
 
 class EyeScrollController:
-    def __init__(self):
+    def __init__(self, source=None, pacing: str = PACING_REALTIME, loop: bool = False, scroll_backend=None,
+                 headless: bool = None):
+        # 帧源：摄像头编号、录像文件或图片目录，默认使用 config.FRAME_SOURCE
+        self.source_spec = config.FRAME_SOURCE if source is None else source
+        self.pacing = pacing
+        self.loop = loop
+        # 无头模式：不调用任何 HighGUI 函数，通过信号或控制套接字控制，主循环由帧源驱动
+        self.headless = config.HEADLESS if headless is None else headless
+        
         self.eye_tracker = EyeTracker(debug_mode=config.DEBUG_MODE)
-        self.screen_controller = ScreenController()
+        # 滚动后端：后端名称或 ScrollBackend 实例，默认使用 config.SCROLL_BACKEND
+        if isinstance(scroll_backend, str):
+            scroll_backend = create_scroll_backend(scroll_backend)
+        self.screen_controller = ScreenController(scroll_backend)
         
         # 配置屏幕控制器参数
         self.screen_controller.set_scroll_speed(config.SCROLL_SPEED)
@@ -24,140 +79,304 @@ class EyeScrollController:
         self.eye_tracker.top_threshold = config.TOP_THRESHOLD
         self.eye_tracker.bottom_threshold = config.BOTTOM_THRESHOLD
         
-        self.cap = None
+        self.source = None
+        self.grabber = None
+        self.landmark_recorder = None  # 关键点录制器，见 start_landmark_recording
+        self.timer = self.eye_tracker.timer  # 各阶段耗时统计，与眼球追踪器共用
+        self.metrics = Metrics(self.timer)  # 计数器和仪表
+        self.screen_controller.metrics = self.metrics
+        self.metrics_exporters = []
+        self.log = get_logger()  # 热路径日志，异步写出并按类别抽样限速
+        self.eye_tracker.add_eye_event_listener(self._on_eye_event)
+        self.pipeline = None
+        self.render_queue = None
         self.running = False
-        self.show_preview = True  # 始终显示预览窗口，以便查看注视点
+        self.show_preview = not self.headless  # 默认显示预览窗口，以便查看注视点
+        # 预览渲染：静态叠加层按分辨率缓存；刷新频率低于追踪帧率
+        self.preview_renderer = PreviewRenderer(config.TOP_THRESHOLD, config.BOTTOM_THRESHOLD)
+        self.preview_interval = 1.0 / config.PREVIEW_FPS if config.PREVIEW_FPS > 0 else 0.0
+        self.last_preview_time = 0.0
+        self.preview_frame = None  # 预览画面缓冲区：帧翻转（或复制）到这里再绘制，流水线中的帧保持不变
+        self.window_open = False
+        # 校准目标在全屏窗口中按真实屏幕位置显示（屏幕尺寸来自滚动后端，见 initialize_source）
+        self.calibration_screen = None
+        self.calibration_window_open = False
         self.gaze_threshold = config.GAZE_THRESHOLD
+        self.eye_tracker.min_confidence = self.gaze_threshold
         self.position_hold_time = config.POSITION_HOLD_TIME
         self.current_position = 'center'
         self.position_start_time = 0
         self.last_action = None
         
-        # 眼睛动作趋势跟踪
-        self.position_history = []  # 记录最近的眼睛位置历史
-        self.history_max_length = 10  # 历史记录最大长度
-        self.continuous_scroll = False  # 是否处于连续滚动状态
-        self.last_trend_action = None  # 最后一次基于趋势的动作
+        # 眼睛动作趋势跟踪：手势状态机（最近3个样本识别手势，最近10个样本统计眼球运动速度）
+        self.gesture = GestureEngine(window=3, min_count=2, history_size=10, speed_window=1.0, pulse_duration=0.5)
         self.eye_movement_speed = 1  # 眼球运动速度，默认为1
         
-    def initialize_camera(self):
+        # 控制模式：手势（默认）或连续速度控制
+        self.control_mode = config.CONTROL_MODE
+        self.velocity_mapper = GazeVelocityMapper(config.MAX_SCROLL_SPEED, config.VELOCITY_SATURATION,
+                                                  config.VELOCITY_EXPONENT, config.VELOCITY_DEAD_ZONE_SCALE)
+        self.scroll_velocity = 0.0  # 速度模式下最近一次发送的速度设定值
+        
+        # 控制命令：键盘、信号和控制套接字的命令都放进队列，由主循环执行
+        self.commands = queue.SimpleQueue()
+        self.control_server = None
+        self.paused = False        # 暂停时不运行FaceMesh，也不滚动
+        self.pause_applied = False  # 控制线程是否已为本次暂停停止滚动
+        self.calibration_requested = False  # 由控制线程在下一帧开始校准
+        self.fps = 0.0
+        
+    def initialize_source(self):
         try:
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
-                print("错误：无法打开摄像头")
+            self.source = open_frame_source(self.source_spec, self.pacing, self.loop)
+            if not self.source.is_opened():
+                print(f"错误：无法打开帧源 {self.source.describe()}")
                 return False
             
-            # 使用配置文件中的摄像头参数
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.CAMERA_WIDTH)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.CAMERA_HEIGHT)
-            self.cap.set(cv2.CAP_PROP_FPS, config.CAMERA_FPS)
+            # 在独立线程中抓帧，主循环只处理最新帧；
+            # 离线快速回放时不丢帧，保证结果可复现
+            lossless = not self.source.is_live and self.pacing == PACING_FAST
+            self.grabber = FrameGrabber(self.source, config.CAPTURE_BUFFER_SIZE, config.CAPTURE_STATS_WINDOW,
+                                        lossless=lossless)
+            self.grabber.start()
             
-            # 获取屏幕尺寸并设置到眼球追踪器
-            import pyautogui
-            screen_width, screen_height = pyautogui.size()
-            self.eye_tracker.set_screen_dimensions(screen_width, screen_height)
+            # 获取屏幕尺寸并设置到眼球追踪器（由滚动后端提供，无桌面环境下可能没有）
+            screen_size = self.screen_controller.backend.screen_size()
+            if screen_size is not None:
+                self.eye_tracker.set_screen_dimensions(*screen_size)
             
-            print(f"摄像头初始化成功 ({config.CAMERA_WIDTH}x{config.CAMERA_HEIGHT}@{config.CAMERA_FPS}fps)")
-            print(f"屏幕尺寸: {screen_width}x{screen_height}")
+            if self.source.is_live:
+                print(f"摄像头初始化成功 ({config.CAMERA_WIDTH}x{config.CAMERA_HEIGHT}@{config.CAMERA_FPS}fps)")
+            else:
+                print(f"帧源初始化成功: {self.source.describe()} (节奏: {self.pacing}, 循环: {self.loop})")
+            if screen_size is not None:
+                print(f"屏幕尺寸: {screen_size[0]}x{screen_size[1]}")
             return True
         except Exception as e:
-            print(f"摄像头初始化失败: {e}")
+            print(f"帧源初始化失败: {e}")
             return False
             
+    def load_calibration_profile(self, name: str):
+        """加载用户的校准档案（之后重新校准的结果也保存到同一档案）"""
+        path = profile_path(name, config.CALIBRATION_PROFILE_DIR)
+        start = time.perf_counter()
+        if self.eye_tracker.load_calibration_profile(path):
+            profile = self.eye_tracker.calibration_profile
+            print(f"已加载校准档案 {name} ({(time.perf_counter() - start) * 1000:.1f}ms): "
+                  f"上 {profile.top_threshold:.6f}，下 {profile.bottom_threshold:.6f}")
+        else:
+            print(f"未找到校准档案 {name}，使用默认阈值（按 'c' 键校准）")
+            
+    def start_metrics_export(self, jsonl_path: str = None, http_port: int = None):
+        """启动指标导出：定期写入 JSON-lines 文件，和/或在本地端口提供 Prometheus 文本格式"""
+        if jsonl_path:
+            exporter = JsonLinesExporter(self.metrics, jsonl_path, config.METRICS_JSONL_INTERVAL)
+            exporter.start()
+            self.metrics_exporters.append(exporter)
+            print(f"指标导出到: {jsonl_path} (每 {config.METRICS_JSONL_INTERVAL}s)")
+        if http_port:
+            exporter = PrometheusExporter(self.metrics, http_port)
+            exporter.start()
+            self.metrics_exporters.append(exporter)
+            print(f"指标服务: http://127.0.0.1:{http_port}/metrics")
+        
+    def start_control_server(self, path: str):
+        """在本地 Unix 套接字上接收控制命令"""
+        if not path:
+            return
+        self.control_server = ControlServer(path, self.submit_command)
+        self.control_server.start()
+        print(f"控制套接字: {self.control_server.path} (命令: {', '.join(CONTROL_COMMANDS)})")
+        
+    def submit_command(self, command: str) -> str:
+        """提交控制命令（可在任意线程中调用），返回回复文本；状态查询直接回复，其余命令由主循环执行"""
+        if command == CMD_STATUS:
+            return json.dumps(self.get_status(), ensure_ascii=False)
+        if command not in CONTROL_COMMANDS:
+            return f"error: 未知命令 {command}"
+        self.commands.put(command)
+        return 'ok'
+        
+    def get_status(self) -> dict:
+        """运行状态快照"""
+        tracker = self.eye_tracker
+        return {
+            'running': self.running,
+            'paused': self.paused,
+            'headless': self.headless,
+            'preview': self.show_preview,
+            'calibrating': tracker.calibration_mode,
+            'position': self.current_position,
+            'scroll_speed': self.screen_controller.current_speed,
+            'fps': self.fps,
+            'counters': self.metrics.snapshot()['counters'],
+        }
+        
+    def _install_signal_handlers(self):
+        """信号控制：SIGTERM/SIGINT 退出，SIGUSR1 校准，SIGUSR2 暂停/继续（只能在主线程中安装）"""
+        handlers = {'SIGTERM': CMD_QUIT, 'SIGUSR1': CMD_CALIBRATE, 'SIGUSR2': CMD_TOGGLE_PAUSE}
+        if self.headless:
+            handlers['SIGINT'] = CMD_QUIT
+        for name, command in handlers.items():
+            signum = getattr(signal, name, None)  # Windows 没有 SIGUSR1/SIGUSR2
+            if signum is not None:
+                signal.signal(signum, lambda signum, frame, command=command: self.commands.put(command))
+        
+    def _execute_command(self, command: str):
+        """在主循环中执行控制命令"""
+        if command == CMD_QUIT:
+            self.running = False
+        elif command == CMD_CALIBRATE:
+            # 手势状态和注视滤波器只在控制线程中修改，校准留到下一帧开始
+            self.calibration_requested = True
+        elif command in (CMD_PAUSE, CMD_RESUME, CMD_TOGGLE_PAUSE):
+            paused = not self.paused if command == CMD_TOGGLE_PAUSE else command == CMD_PAUSE
+            if paused != self.paused:
+                self.pause_applied = False
+                self.paused = paused
+                print("已暂停眼球追踪" if paused else "已继续眼球追踪")
+        elif command == CMD_TOGGLE_PREVIEW:
+            if self.headless:
+                print("无头模式下没有预览窗口")
+                return
+            self.show_preview = not self.show_preview
+            if not self.show_preview:
+                cv2.destroyWindow(config.PREVIEW_WINDOW_NAME)
+                self.window_open = False
+            else:
+                print("已启用预览窗口")
+        
+    def start_landmark_recording(self, path: str):
+        """开始录制每帧的关键点（在 start 之前调用）"""
+        self.landmark_recorder = LandmarkRecorder(path, self.eye_tracker.extractor.indices)
+        print(f"关键点录制已启用: {self.landmark_recorder.path}")
+        
+    def replay_landmarks(self, path: str, realtime: bool = False):
+        """回放关键点录制，跳过采集和FaceMesh，直接驱动注视分类和手势逻辑
+        
+        realtime=False 时尽可能快地回放，用于调参和回归测试
+        """
+        records, meta = load_landmark_recording(path)
+        tracker = self.eye_tracker
+        count = recorded_point_count(meta, tracker.extractor.indices)
+        if count is None:
+            print("错误：录制文件的关键点索引与当前代码不一致，无法回放")
+            return
+        head_pose_enabled = tracker.head_pose_enabled
+        if count < len(tracker.extractor.indices) and head_pose_enabled:
+            print("注意：录制文件没有头部姿态关键点，回放时不做头部姿态补偿")
+            tracker.head_pose_enabled = False
+        
+        print(f"回放关键点录制: {path} ({len(records)} 帧, 节奏: {'实时' if realtime else '最快'})")
+        # 录制文件是float32，转换到追踪器使用的float64缓冲区中
+        points = np.zeros((len(tracker.extractor.indices), 2))
+        recorded = points[:count]
+        start = time.perf_counter()
+        first_timestamp = records[0]['timestamp'] if len(records) else 0.0
+        
+        for record in records:
+            timestamp = float(record['timestamp'])
+            if realtime:
+                delay = (timestamp - first_timestamp) - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            
+            if record['detected']:
+                np.copyto(recorded, record['points'])
+                eye_result = tracker.estimate_eye_position(points, timestamp)
+            else:
+                eye_result = None
+            
+            if eye_result:
+                position, confidence = eye_result
+                self.process_eye_position(position, confidence, timestamp)
+            else:
+                self.stop_scrolling_if_needed()
+        
+        elapsed = time.perf_counter() - start
+        tracker.head_pose_enabled = head_pose_enabled
+        print(f"回放完成: {len(records)} 帧, 用时 {elapsed:.3f}s ({len(records) / max(elapsed, 1e-9):.0f} fps), "
+              f"眨眼 {tracker.eye_openness.blink_count} 次")
+        
     def start(self):
         print("启动眼球追踪控制...")
-        if not self.initialize_camera():
+        if not self.initialize_source():
             return
         self.running = True
+        self._install_signal_handlers()
         print("眼球追踪控制已启动")
-        print("按 'q' 键退出，按 's' 键切换预览显示")
+        if self.headless:
+            print("无头模式：SIGTERM/Ctrl+C 退出，SIGUSR1 校准，SIGUSR2 暂停/继续")
+        else:
+            print("按 'q' 键退出，按 's' 键切换预览显示，按 'p' 键暂停/继续")
         self.main_loop()
         
     def main_loop(self):
+        """主循环：采集、推理、控制三个阶段运行在各自的线程中，预览渲染在主线程
+
+        OpenCV的窗口函数（imshow/waitKey）在macOS上只能在主线程调用，
+        所以渲染阶段由主线程承担，其余阶段通过有界队列连接。
+        主循环阻塞在渲染队列上，节奏由帧源决定；控制命令在每次取帧（或等待超时）后执行。
+        无头模式下不调用任何 HighGUI 函数。
+        """
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+        
         frame_count = 0
         start_time = time.time()
         fps = 0
+        last_stats_time = time.time()
         
         while self.running:
             try:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("无法读取摄像头帧")
+                try:
+                    packet = self.render_queue.get(timeout=0.1)
+                except QueueClosed:
+                    print("无法读取摄像头帧" if self.source.is_live else "帧源回放结束")
                     break
-                    
-                # 水平翻转图像，使其更直观
-                frame = cv2.flip(frame, 1)
-                
-                # 获取眼球位置
-                eye_result = self.eye_tracker.get_eye_position(frame)
                 
-                # 处理眼球位置
-                if eye_result:
-                    position, confidence = eye_result
-                    self.process_eye_position(position, confidence)
+                displayed = False
+                if packet is not None:
+                    # 计算并显示FPS
+                    frame_count += 1
+                    if frame_count % 30 == 0:  # 每30帧更新一次FPS
+                        end_time = time.time()
+                        fps = 30 / (end_time - start_time)
+                        self.fps = fps
+                        start_time = end_time
                     
-                    # 在调试模式下输出信息
-                    if config.DEBUG_MODE and frame_count % 10 == 0:  # 每10帧输出一次
-                        scroll_status = self.screen_controller.get_scroll_status()
-                        print(f"Position: {position}, Confidence: {confidence:.2f}, Speed: {scroll_status['current_speed']:.1f}")
-                    
-                    if self.show_preview:
-                        frame = self.eye_tracker.draw_eye_tracking(frame, position, confidence)
-                else:
-                    # 眼球检测失败（可能是闭眼或未检测到眼睛）
-                    if config.DEBUG_MODE and frame_count % 10 == 0:
-                        print("Eyes not detected or closed")
-                    
-                    # 停止滚动（如果有）
-                    self.stop_scrolling_if_needed()
-                    
-                    # 在预览窗口中显示默认中心点
-                    if self.show_preview:
-                        frame = self.eye_tracker.draw_eye_tracking(frame)  # 不传递参数，使用默认值
+                    # 显示预览窗口和校准画面（按 PREVIEW_FPS 限制刷新频率，其余帧只跟踪不绘制）
+                    now = time.monotonic()
+                    if not self.headless and now - self.last_preview_time >= self.preview_interval:
+                        self.last_preview_time = now
+                        if self.show_preview:
+                            start = time.perf_counter()
+                            frame = self._render_preview(packet, fps)
+                            t = time.perf_counter()
+                            cv2.imshow(config.PREVIEW_WINDOW_NAME, frame)
+                            self.window_open = True
+                            displayed = True
+                            self.render_busy_time += self.timer.lap(STAGE_DISPLAY, t) - start
+                        displayed = self._update_calibration_window() or displayed
+                    self.render_count += 1
+                    self.metrics.set(GAUGE_FRAME_AGE_MS, (time.monotonic() - packet.timestamp) * 1000)
+                    # 预览已复制到自己的缓冲区，这一帧不再使用
+                    self._release_packet(packet)
                 
-                # 计算并显示FPS
-                frame_count += 1
-                if frame_count % 30 == 0:  # 每30帧更新一次FPS
-                    end_time = time.time()
-                    fps = 30 / (end_time - start_time)
-                    start_time = end_time
+                # 定期输出各阶段吞吐量
+                if config.DEBUG_MODE and time.time() - last_stats_time >= config.PIPELINE_STATS_INTERVAL:
+                    print("流水线统计:\n" + self.pipeline.format_stats())
+                    last_stats_time = time.time()
                 
-                # 显示预览窗口
-                if self.show_preview:
-                    # 添加FPS和控制信息
-                    cv2.putText(frame, f"FPS: {fps:.1f}", (frame.shape[1] - 120, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    
-                    # 显示控制提示
-                    cv2.putText(frame, "Press 'q' to quit, 's' to toggle preview, 'c' to calibrate", (10, frame.shape[0] - 10), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                    
-                    # 如果在校准模式，显示提示和中心十字准心
-                    if self.eye_tracker.calibration_mode:
-                        cv2.putText(frame, "校准模式 - 请注视屏幕中心", (10, 60), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                        # 在屏幕中心绘制十字准心
-                        h, w = frame.shape[:2]
-                        cv2.line(frame, (w//2-20, h//2), (w//2+20, h//2), (0, 0, 255), 2)
-                        cv2.line(frame, (w//2, h//2-20), (w//2, h//2+20), (0, 0, 255), 2)
-                    
-                    cv2.imshow(config.PREVIEW_WINDOW_NAME, frame)
+                # 处理键盘输入（键盘事件来自预览窗口，随预览刷新或在等待帧时处理；没有窗口时无需调用）
+                if (self.window_open or self.calibration_window_open) and (packet is None or displayed):
+                    key = cv2.waitKey(1) & 0xFF
+                    if key in KEY_COMMANDS:
+                        self.commands.put(KEY_COMMANDS[key])
                 
-                # 处理键盘输入
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    break
-                elif key == ord('s'):
-                    self.show_preview = not self.show_preview
-                    if not self.show_preview:
-                        cv2.destroyAllWindows()
-                    else:
-                        print("已启用预览窗口")
-                elif key == ord('c'):
-                    print("开始校准...")
-                    self.eye_tracker.start_calibration()
-                    print("请注视屏幕中心5秒钟...")
-                    time.sleep(0.5)  # 防止重复触发
+                # 执行键盘、信号和控制套接字的命令
+                while not self.commands.empty():
+                    self._execute_command(self.commands.get())
             except Exception as e:
                 print(f"主循环出错: {e}")
                 if config.DEBUG_MODE:
@@ -167,267 +386,302 @@ class EyeScrollController:
         
         self.cleanup()
         
-    def process_eye_position(self, position, confidence):
-        current_time = time.time()
-        if confidence < self.gaze_threshold:
-            return
-            
-        # 记录位置变化
-        if position != self.current_position:
-            self.current_position = position
-            self.position_start_time = current_time
-            
-        # 添加当前位置到历史记录
-        self.position_history.append((position, current_time))
+    def _build_pipeline(self) -> Pipeline:
+        """构建 采集 -> 推理 -> 控制 -> 渲染 流水线"""
+        pipeline = Pipeline()
+        landmarks_size, landmarks_policy = config.PIPELINE_QUEUES['landmarks']
+        render_size, render_policy = config.PIPELINE_QUEUES['render']
+        if self.grabber.lossless:
+            # 离线快速回放：各队列都不丢帧
+            landmarks_policy = render_policy = BLOCK
+        # 被丢弃的帧和渲染完的帧都归还给帧源复用
+        landmarks_queue = pipeline.add_queue('landmarks', landmarks_size, landmarks_policy, self._release_packet)
+        self.render_queue = pipeline.add_queue('render', render_size, render_policy, self._release_packet)
         
-        # 保持历史记录在指定长度内
-        if len(self.position_history) > self.history_max_length:
-            self.position_history.pop(0)
+        # 采集阶段由FrameGrabber的线程承担，其环形缓冲区就是采集->推理的队列
+        pipeline.add_stage('inference', self._inference_stage, self.grabber, landmarks_queue)
+        pipeline.add_stage('control', self._control_stage, landmarks_queue, self.render_queue)
+        pipeline.add_external_stats('capture', self._capture_stage_stats)
+        pipeline.add_external_stats('render', self._render_stage_stats)
         
-        # 计算眼球运动速度
-        self.eye_movement_speed = self._calculate_eye_movement_speed()
+        self.render_count = 0
+        self.render_busy_time = 0.0
+        self.render_start_time = time.monotonic()
+        return pipeline
         
-        # 分析眼睛动作趋势
-        self._analyze_eye_movement_trend()
-            
-    def _calculate_eye_movement_speed(self):
-        """计算眼球运动速度
+    def _release_packet(self, packet: FramePacket):
+        """一帧处理完毕（或被丢弃），把帧缓冲区归还给帧源"""
+        self.source.release_frame(packet.frame)
+        packet.frame = None
         
-        基于最近几个位置变化的频率来计算速度
-        返回值范围：1-10，数值越大表示眼球运动越快
-        """
-        if len(self.position_history) < 3:
-            return 1  # 默认最低速度
-            
-        # 计算最近1秒内的位置变化次数
-        current_time = time.time()
-        recent_changes = 0
-        last_position = None
-        
-        for position, timestamp in reversed(self.position_history):
-            if current_time - timestamp > 1.0:  # 只看最近1秒
-                break
-            if last_position is not None and position != last_position:
-                recent_changes += 1
-            last_position = position
-            
-        # 将变化次数映射到速度范围1-10
-        # 0-1次变化：速度1-2
-        # 2-3次变化：速度3-5  
-        # 4-5次变化：速度6-8
-        # 6次以上变化：速度9-10
-        if recent_changes <= 1:
-            speed = 1 + recent_changes
-        elif recent_changes <= 3:
-            speed = 3 + (recent_changes - 2)
-        elif recent_changes <= 5:
-            speed = 6 + (recent_changes - 4)
-        else:
-            speed = min(10, 9 + (recent_changes - 6) * 0.5)
-            
-        return int(speed)
-    
-    def _analyze_eye_movement_trend(self):
-        """分析眼睛动作趋势，根据趋势控制滚动
-        
-        根据用户需求调整眼球动作趋势分析逻辑：
-        - 向下看一下再向上看一下则往上滚动一次
-        - 向下看然后盯住不动则一直向上滚动
-        - 向上看一下再向下看一下则往下滚动一次
-        - 向上看然后盯住不动则一直向下滚动
-        """
-        if len(self.position_history) < 3:  # 至少需要3个样本才能分析趋势
-            return
+    def _inference_stage(self, captured) -> FramePacket:
+        """推理阶段：对原始画面运行FaceMesh（镜像在关键点上完成，不复制整帧）"""
+        packet = FramePacket(captured.frame, captured.timestamp, captured.index, captured.source_time)
+        if not self.paused:
+            packet.landmarks = self.eye_tracker.detect_landmarks(captured.frame)
+            packet.keyframe = self.eye_tracker.last_keyframe
+        return packet
         
-        # 获取最近的几个位置记录
-        recent_positions = [item[0] for item in self.position_history[-3:]]
-        current_position = recent_positions[-1]
+    def _control_stage(self, packet: FramePacket) -> FramePacket:
+        """控制阶段：注视分类和手势逻辑"""
+        if self.calibration_requested:
+            self.calibration_requested = False
+            print("开始校准...")
+            self.stop_scrolling_if_needed()
+            self.eye_tracker.start_calibration()
+        if self.paused:
+            # 暂停后第一帧停止滚动（手势状态只在控制线程中修改）
+            if not self.pause_applied:
+                self.pause_applied = True
+                self.stop_scrolling_if_needed()
+            return packet
+        if self.landmark_recorder is not None:
+            self.landmark_recorder.record(packet.source_time, packet.landmarks)
         
-        # 检测向下看一下再向上看一下的模式（触发向下滚动一次）
-        if self._detect_pattern(recent_positions, ['bottom', 'top']) and not self.continuous_scroll:
-            if config.DEBUG_MODE:
-                print("检测到向下看再向上看的模式 - 向下滚动一次")
-            self.start_scroll_down()
-            # 滚动一次后停止
-            threading.Timer(0.5, self.stop_scrolling_if_needed).start()
-            self.last_trend_action = 'scroll_down_once'
-            return
-            
-        # 检测向上看一下再向下看一下的模式（触发向上滚动一次）
-        if self._detect_pattern(recent_positions, ['top', 'bottom']) and not self.continuous_scroll:
-            if config.DEBUG_MODE:
-                print("检测到向上看再向下看的模式 - 向上滚动一次")
-            self.start_scroll_up()
-            # 滚动一次后停止
-            threading.Timer(0.5, self.stop_scrolling_if_needed).start()
-            self.last_trend_action = 'scroll_down_once'
-            return
+        metrics = self.metrics
+        metrics.inc(COUNTER_FRAMES)
+        if packet.landmarks is not None:
+            metrics.inc(COUNTER_DETECTIONS)
+            eye_result = self.eye_tracker.estimate_eye_position(packet.landmarks, packet.source_time,
+                                                                packet.keyframe)
+        else:
+            metrics.inc(COUNTER_MISSES)
+            eye_result = None
         
-        # 检测持续向下看的模式（触发持续向下滚动）
-        if self._detect_continuous_gaze(recent_positions, 'bottom', 2):  # 降低连续样本要求，提高灵敏度
-            if self.last_trend_action != 'continuous_scroll_down':
-                if config.DEBUG_MODE:
-                    print(f"检测到持续向下看 - 开始持续向下滚动 (速度: {self.eye_movement_speed})")
-                self.start_scroll_down(self.eye_movement_speed)
-                self.continuous_scroll = True
-                self.last_trend_action = 'continuous_scroll_down'
-            else:
-                # 更新滚动速度
-                self.screen_controller.update_scroll_speed(self.eye_movement_speed)
-            return
+        # 处理眼球位置
+        if eye_result:
+            position, confidence = eye_result
+            packet.position = position
+            packet.confidence = confidence
+            # 闭眼、低置信度和校准中的帧没有更新滤波后的偏移，不显示上一帧的注视点
+            if position in ('top', 'center', 'bottom') and not self.eye_tracker.calibration_mode:
+                packet.gaze_direction = self.eye_tracker.last_gaze_direction
+            start = time.perf_counter()
+            self.process_eye_position(position, confidence, packet.source_time)
+            self.timer.lap(STAGE_GESTURE, start)
+            metrics.set(GAUGE_SCROLL_SPEED, self.screen_controller.current_speed)
             
-        # 检测持续向上看的模式（触发持续向上滚动）
-        if self._detect_continuous_gaze(recent_positions, 'top', 2):  # 降低连续样本要求，提高灵敏度
-            if self.last_trend_action != 'continuous_scroll_up':
-                if config.DEBUG_MODE:
-                    print(f"检测到持续向上看 - 开始持续向上滚动 (速度: {self.eye_movement_speed})")
-                self.start_scroll_up(self.eye_movement_speed)
-                self.continuous_scroll = True
-                self.last_trend_action = 'continuous_scroll_up'
-            else:
-                # 更新滚动速度
-                self.screen_controller.update_scroll_speed(self.eye_movement_speed)
-            return
+            # 在调试模式下输出信息（抽样和限速见 config.LOG_CATEGORIES）
+            self.log.log(LOG_STATUS, "Position: {}, Confidence: {:.2f}, Speed: {:.1f}",
+                         position, confidence, self.screen_controller.current_speed)
+        else:
+            # 眼球检测失败（可能是闭眼或未检测到眼睛）
+            self.log.log(LOG_STATUS, "Eyes not detected or closed")
             
-        # 如果注视回到中心，停止滚动
-        if current_position == 'center' and self.continuous_scroll:
-            if config.DEBUG_MODE:
-                print("注视回到中心 - 停止滚动")
+            # 停止滚动（如果有）
             self.stop_scrolling_if_needed()
-            self.continuous_scroll = False
-            self.last_trend_action = 'stop'
-            
-    def _detect_pattern(self, positions, pattern):
-        """检测位置序列中是否包含指定模式
+        return packet
         
-        灵活检测眼球运动模式：
-        - 检测从一个位置到另一个位置的转换
-        - 允许中间有少量噪声，提高检测的稳定性
+    def _render_preview(self, packet: FramePacket, fps: float):
+        """渲染阶段：在预览缓冲区上绘制追踪信息、帧龄（从采集到显示的延迟）、控制提示和校准目标
+
+        帧来自采集缓冲池，不能直接在上面绘制：先水平翻转（镜像显示）或复制到复用的预览缓冲区。
         """
-        # 对于短序列，使用严格匹配
-        if len(positions) <= 3:
-            # 查找子序列
-            for i in range(len(positions) - len(pattern) + 1):
-                match = True
-                for j in range(len(pattern)):
-                    if positions[i+j] != pattern[j]:
-                        match = False
-                        break
-                if match:
-                    return True
+        start = time.perf_counter()
+        if self.eye_tracker.mirror:
+            frame = self.preview_frame = cv2.flip(packet.frame, 1, dst=self.preview_frame)
+        else:
+            frame = self.preview_frame = cv2.copyTo(packet.frame, None, self.preview_frame)
+        start = self.timer.lap(STAGE_FLIP, start)
+        frame_age_ms = (time.monotonic() - packet.timestamp) * 1000
+        session = self.eye_tracker.calibration
+        target = session.current_target if session is not None else None
+        self.preview_renderer.render(frame, packet.position, packet.confidence, packet.gaze_direction,
+                                     fps, frame_age_ms, target, session.progress if target is not None else 0.0)
+        self.timer.lap(STAGE_DRAW, start)
+        return frame
+        
+    def _update_calibration_window(self) -> bool:
+        """校准期间在全屏窗口中显示当前目标，校准结束后关闭窗口；返回本次是否刷新了窗口（主线程调用）"""
+        session = self.eye_tracker.calibration
+        target = session.current_target if session is not None else None
+        if target is None:
+            if self.calibration_window_open:
+                cv2.destroyWindow(config.CALIBRATION_WINDOW_NAME)
+                self.calibration_window_open = False
             return False
+        if not self.calibration_window_open:
+            tracker = self.eye_tracker
+            if (self.calibration_screen is None or
+                    (self.calibration_screen.width, self.calibration_screen.height) !=
+                    (tracker.screen_width, tracker.screen_height)):
+                self.calibration_screen = CalibrationScreen(tracker.screen_width, tracker.screen_height)
+            self.calibration_screen.target = None
+            cv2.namedWindow(config.CALIBRATION_WINDOW_NAME, cv2.WINDOW_NORMAL)
+            cv2.setWindowProperty(config.CALIBRATION_WINDOW_NAME, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            self.calibration_window_open = True
+        cv2.imshow(config.CALIBRATION_WINDOW_NAME, self.calibration_screen.render(target, session.progress))
+        return True
         
-        # 对于较长序列，使用更灵活的匹配
-        # 特别关注序列的最后几个元素，这些通常是最新的眼球位置
-        if len(pattern) == 2 and pattern[0] in ['top', 'bottom'] and pattern[1] == 'center':
-            # 检查是否有从特定位置回到中心的模式
-            # 例如：从底部回到中心，或从顶部回到中心
-            target_pos = pattern[0]  # 'top' 或 'bottom'
-            
-            # 检查最近的3个位置中是否包含目标位置和中心位置
-            recent = positions[-3:]
-            has_target = target_pos in recent
-            has_center = 'center' in recent
-            
-            # 如果最后一个位置是中心，且之前有目标位置，则认为匹配成功
-            if has_target and has_center and positions[-1] == 'center':
-                # 确保目标位置在中心位置之前出现
-                target_idx = len(positions) - 1 - recent[::-1].index(target_pos)
-                center_idx = len(positions) - 1
-                if target_idx < center_idx:
-                    return True
-        
-        # 默认使用原始的严格匹配
-        for i in range(len(positions) - len(pattern) + 1):
-            match = True
-            for j in range(len(pattern)):
-                if positions[i+j] != pattern[j]:
-                    match = False
-                    break
-            if match:
-                return True
-        return False
+    def _capture_stage_stats(self) -> dict:
+        """采集阶段统计（FrameGrabber线程）"""
+        stats = self.grabber.get_stats()
+        return {'fps': stats['capture_fps'], 'avg_ms': 0.0, 'utilization': 0.0,
+                'processed': stats['captured'], 'dropped': stats['dropped']}
         
-    def _detect_continuous_gaze(self, positions, target_position, min_count):
-        """检测是否持续注视某个位置
+    def _render_stage_stats(self) -> dict:
+        """渲染阶段统计（主线程）"""
+        elapsed = max(1e-6, time.monotonic() - self.render_start_time)
+        count = self.render_count
+        return {'fps': count / elapsed, 'processed': count,
+                'avg_ms': self.render_busy_time / count * 1000 if count else 0.0,
+                'utilization': self.render_busy_time / elapsed}
         
-        根据用户需求优化持续注视检测：
-        - 对于'top'位置，检测持续向上看的情况
-        - 对于'bottom'位置，检测持续向下看的情况
-        """
-        # 对于顶部位置的检测
-        if target_position == 'top':
-            # 计算目标位置在最近序列中的比例
-            target_count = positions.count(target_position)
-            # 如果目标位置占比超过50%且至少有min_count个，则认为是持续注视
-            if target_count >= min_count and target_count / len(positions) >= 0.5:
-                return True
+    def process_eye_position(self, position, confidence, timestamp=None):
+        """处理一帧的注视位置；timestamp 为该帧的帧源时间戳（秒），默认取当前时间"""
+        current_time = time.monotonic() if timestamp is None else timestamp
+        if confidence < self.gaze_threshold:
+            return
             
-            # 检查最近的几个位置
-            recent = positions[-min_count:]
-            # 如果最近的几个位置中目标位置占多数，也认为是持续注视
-            if recent.count(target_position) >= min_count / 2 + 0.5:
-                return True
-            return False
+        # 记录位置变化
+        if position != self.current_position:
+            self.current_position = position
+            self.position_start_time = current_time
         
-        # 对于底部位置的检测
-        elif target_position == 'bottom':
-            # 计算目标位置在最近序列中的比例
-            target_count = positions.count(target_position)
-            # 如果目标位置占比超过50%且至少有min_count个，则认为是持续注视
-            if target_count >= min_count and target_count / len(positions) >= 0.5:
-                return True
-            
-            # 检查最近的几个位置
-            recent = positions[-min_count:]
-            # 如果最近的几个位置中目标位置占多数，也认为是持续注视
-            if recent.count(target_position) >= min_count / 2 + 0.5:
-                return True
-            return False
+        if self.control_mode == CONTROL_VELOCITY:
+            tracker = self.eye_tracker
+            gaze_direction = tracker.last_gaze_direction
+            if tracker.calibration_mode or gaze_direction is None:
+                self.set_scroll_velocity(0.0)
+            else:
+                self.set_scroll_velocity(self.velocity_mapper.velocity(gaze_direction[1], tracker.gaze_bottom_threshold,
+                                                                       tracker.gaze_top_threshold))
+            return
         
-        # 对于其他位置，使用原始的严格连续检测
-        else:
-            count = 0
-            for pos in positions:
-                if pos == target_position:
-                    count += 1
-                else:
-                    count = 0  # 重置计数
-                    
-                if count >= min_count:
-                    return True
-                    
-            return False
+        # 手势状态机：每个样本常数时间更新，返回需要执行的滚动动作
+        actions = self.gesture.update(position, current_time)
+        self.eye_movement_speed = self.gesture.speed
+        for action in actions:
+            self._execute_gesture_action(action)
+            
+    def _on_eye_event(self, event, timestamp):
+        """眼睛事件：眨眼计数；长时间闭眼时之后的帧按未检测到眼睛处理"""
+        if event == EVENT_BLINK:
+            self.metrics.inc(COUNTER_BLINKS)
+            self.log.log(LOG_GESTURE, "检测到眨眼")
+        elif event == EVENT_EYES_CLOSED:
+            self.log.log(LOG_GESTURE, "持续闭眼 - 停止滚动")
+            
+    def _execute_gesture_action(self, action):
+        """执行手势状态机输出的动作"""
+        if action == ACTION_SCROLL_DOWN_ONCE:
+            self.log.log(LOG_GESTURE, "检测到向下看再向上看的模式 - 向下滚动一次")
+            self.metrics.inc(COUNTER_GESTURES)
+            self.pulse_scroll(SCROLL_DOWN)
+        elif action == ACTION_SCROLL_UP_ONCE:
+            self.log.log(LOG_GESTURE, "检测到向上看再向下看的模式 - 向上滚动一次")
+            self.metrics.inc(COUNTER_GESTURES)
+            self.pulse_scroll(SCROLL_UP)
+        elif action == ACTION_START_CONTINUOUS_DOWN:
+            self.log.log(LOG_GESTURE, "检测到持续向下看 - 开始持续向下滚动 (速度: {})", self.eye_movement_speed)
+            self.metrics.inc(COUNTER_GESTURES)
+            self.start_scroll_down(self.eye_movement_speed)
+        elif action == ACTION_START_CONTINUOUS_UP:
+            self.log.log(LOG_GESTURE, "检测到持续向上看 - 开始持续向上滚动 (速度: {})", self.eye_movement_speed)
+            self.metrics.inc(COUNTER_GESTURES)
+            self.start_scroll_up(self.eye_movement_speed)
+        elif action == ACTION_UPDATE_SPEED:
+            # 更新滚动速度
+            self.screen_controller.update_scroll_speed(self.eye_movement_speed)
+        elif action == ACTION_STOP:
+            self.log.log(LOG_SCROLL, "停止滚动")
+            self.metrics.inc(COUNTER_SCROLL_STOPS)
+            self.screen_controller.stop_all_scrolling()
                 
     def start_scroll_up(self, speed=None):
         if speed:
-            print(f"开始向上滚动 (速度: {speed})")
+            self.log.log(LOG_SCROLL, "开始向上滚动 (速度: {})", speed)
             self.screen_controller.set_scroll_speed_by_eye_movement(speed)
         else:
-            print("开始向上滚动")
-        threading.Thread(target=self.screen_controller.start_scroll_up, daemon=True).start()
+            self.log.log(LOG_SCROLL, "开始向上滚动")
+        self.metrics.inc(COUNTER_SCROLL_STARTS)
+        self.screen_controller.start_scroll_up()
         
     def start_scroll_down(self, speed=None):
         if speed:
-            print(f"开始向下滚动 (速度: {speed})")
+            self.log.log(LOG_SCROLL, "开始向下滚动 (速度: {})", speed)
             self.screen_controller.set_scroll_speed_by_eye_movement(speed)
         else:
-            print("开始向下滚动")
-        threading.Thread(target=self.screen_controller.start_scroll_down, daemon=True).start()
+            self.log.log(LOG_SCROLL, "开始向下滚动")
+        self.metrics.inc(COUNTER_SCROLL_STARTS)
+        self.screen_controller.start_scroll_down()
+        
+    def pulse_scroll(self, direction):
+        """单次滚动：滚动线程在 gesture.pulse_duration 秒后自动停止，不依赖后续样本"""
+        self.log.log(LOG_SCROLL, "开始{}滚动一次", '向上' if direction == SCROLL_UP else '向下')
+        self.metrics.inc(COUNTER_SCROLL_STARTS)
+        self.screen_controller.pulse_scroll(direction, self.gesture.pulse_duration)
+        
+    def set_scroll_velocity(self, velocity):
+        """速度模式：每帧把带符号的速度设定值发给滚动线程（与上次相同时不发送）"""
+        previous = self.scroll_velocity
+        if velocity == previous:
+            return
+        self.scroll_velocity = velocity
+        if previous == 0.0:
+            self.log.log(LOG_SCROLL, "开始{}滚动 (速度: {:.1f})", '向上' if velocity > 0 else '向下', abs(velocity))
+            self.metrics.inc(COUNTER_SCROLL_STARTS)
+        elif velocity == 0.0:
+            self.log.log(LOG_SCROLL, "停止滚动")
+            self.metrics.inc(COUNTER_SCROLL_STOPS)
+        self.screen_controller.set_velocity(velocity)
         
     def stop_scrolling_if_needed(self):
-        if self.last_trend_action in ['continuous_scroll_up', 'continuous_scroll_down', 'scroll_up_once', 'scroll_down_once']:
-            print("停止滚动")
-            self.screen_controller.stop_all_scrolling()
-            self.last_trend_action = 'stop'
-            self.continuous_scroll = False
+        if self.control_mode == CONTROL_VELOCITY:
+            self.set_scroll_velocity(0.0)
+            return
+        for action in self.gesture.stop():
+            self._execute_gesture_action(action)
             
+    def print_capture_stats(self):
+        """输出采集统计信息"""
+        stats = self.grabber.get_stats()
+        print(f"采集统计: 采集 {stats['captured']} 帧, 处理 {stats['delivered']} 帧, 丢弃 {stats['dropped']} 帧, "
+              f"采集帧率 {stats['capture_fps']:.1f}fps")
+        print(f"帧龄: 平均 {stats['frame_age_mean_ms']:.1f}ms, p50 {stats['frame_age_p50_ms']:.1f}ms, "
+              f"p95 {stats['frame_age_p95_ms']:.1f}ms, 最大 {stats['frame_age_max_ms']:.1f}ms")
+        
+    def print_output_stats(self):
+        """打印滚动输出统计"""
+        stats = self.screen_controller.get_output_stats()
+        print(f"滚动输出: 后端 {stats['backend']}, {stats['events']} 次事件, {stats['events_per_second']:.1f} 次/秒")
+        print(f"滚动延迟: 平均 {stats['latency_mean_ms']:.1f}ms, p50 {stats['latency_p50_ms']:.1f}ms, "
+              f"p95 {stats['latency_p95_ms']:.1f}ms, 最大 {stats['latency_max_ms']:.1f}ms")
+        ticks = self.screen_controller.get_tick_stats()
+        print(f"滚动节拍: {ticks['rate_hz']:g}Hz, {ticks['ticks']} 个节拍, 抖动 p50 {ticks['jitter_p50_ms']:.2f}ms, "
+              f"p95 {ticks['jitter_p95_ms']:.2f}ms, 最大 {ticks['jitter_max_ms']:.2f}ms")
+        
     def cleanup(self):
+        # 先写出缓冲区中的日志，保证与后续输出的先后顺序
+        self.log.flush()
         print("正在清理资源...")
-        self.screen_controller.stop_all_scrolling()
-        if self.cap:
-            self.cap.release()
-        cv2.destroyAllWindows()
+        if self.pipeline:
+            if config.DEBUG_MODE:
+                print("流水线统计:\n" + self.pipeline.format_stats())
+                print("阶段耗时:\n" + self.timer.format_summary())
+            self.pipeline.stop()
+            self.pipeline = None
+        self.screen_controller.close()
+        if config.DEBUG_MODE:
+            self.print_output_stats()
+        if self.grabber:
+            self.grabber.stop()
+            self.print_capture_stats()
+            self.grabber = None
+        if self.source:
+            self.source.release()
+            self.source = None
+        if self.landmark_recorder:
+            self.landmark_recorder.close()
+            self.landmark_recorder = None
+        for exporter in self.metrics_exporters:
+            exporter.stop()
+        self.metrics_exporters = []
+        if self.control_server:
+            self.control_server.stop()
+            self.control_server = None
+        if not self.headless:
+            cv2.destroyAllWindows()
         print("清理完成")
 
 def main():
@@ -441,11 +695,55 @@ def main():
     print("- 按 'q' 键退出程序")
     print("- 按 's' 键切换预览显示")
     print("- 按 'c' 键进入校准模式")
+    print("- 按 'p' 键暂停/继续")
     print()
     
-    controller = EyeScrollController()
+    parser = argparse.ArgumentParser(description="眼球追踪控制Mac屏幕滚动")
+    parser.add_argument('--source', default=None,
+                        help="帧源：摄像头编号、录像文件或图片目录（默认 config.FRAME_SOURCE）")
+    parser.add_argument('--pacing', choices=[PACING_REALTIME, PACING_FAST], default=PACING_REALTIME,
+                        help="录像/图片回放节奏：按录制时间播放或尽可能快")
+    parser.add_argument('--loop', action='store_true', help="录像/图片播放结束后从头循环")
+    parser.add_argument('--no-preview', action='store_true', help="不显示预览窗口")
+    parser.add_argument('--record-landmarks', metavar='PATH', help="把每帧的关键点录制到 .npy 文件")
+    parser.add_argument('--replay-landmarks', metavar='PATH',
+                        help="回放关键点录制（跳过摄像头和FaceMesh），节奏由 --pacing 决定")
+    parser.add_argument('--metrics-jsonl', metavar='PATH', default=config.METRICS_JSONL_PATH,
+                        help="定期把运行指标追加到 JSON-lines 文件")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT', default=config.METRICS_HTTP_PORT,
+                        help="在本地端口提供 Prometheus 文本格式的 /metrics")
+    parser.add_argument('--control-mode', choices=CONTROL_MODES, default=config.CONTROL_MODE,
+                        help="控制模式：gesture 按注视区域和手势滚动，velocity 把注视偏移连续映射为滚动速度")
+    parser.add_argument('--profile', default=config.CALIBRATION_PROFILE,
+                        help="校准档案名（保存在 config.CALIBRATION_PROFILE_DIR 中）")
+    parser.add_argument('--scroll-backend', choices=sorted(SCROLL_BACKENDS), default=None,
+                        help="滚动输出后端（recording 只记录滚动事件，不实际滚动）；"
+                             "默认 config.SCROLL_BACKEND，回放关键点时默认 recording")
+    parser.add_argument('--headless', action='store_true', default=config.HEADLESS,
+                        help="无头模式：不打开任何窗口，通过信号或控制套接字控制")
+    parser.add_argument('--control-socket', metavar='PATH', default=config.CONTROL_SOCKET_PATH,
+                        help="在本地 Unix 套接字上接收控制命令（见 control_server.py）")
+    args = parser.parse_args()
+    if args.scroll_backend is None:
+        # 回放关键点不应滚动真实桌面，除非显式指定了后端
+        args.scroll_backend = BACKEND_RECORDING if args.replay_landmarks else config.SCROLL_BACKEND
+    
+    controller = EyeScrollController(args.source, args.pacing, args.loop, args.scroll_backend,
+                                     headless=args.headless)
+    controller.control_mode = args.control_mode
+    controller.load_calibration_profile(args.profile)
+    if args.no_preview:
+        controller.show_preview = False
+    if args.record_landmarks:
+        controller.start_landmark_recording(args.record_landmarks)
     try:
-        controller.start()
+        # 指标端口被占用等错误同样走下面的异常处理，保证 cleanup() 执行
+        controller.start_metrics_export(args.metrics_jsonl, args.metrics_port)
+        controller.start_control_server(args.control_socket)
+        if args.replay_landmarks:
+            controller.replay_landmarks(args.replay_landmarks, realtime=args.pacing == PACING_REALTIME)
+        else:
+            controller.start()
     except KeyboardInterrupt:
         print("\n程序被用户中断")
     except Exception as e:
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+光流跟踪模块 - 在两次FaceMesh推理之间，用金字塔Lucas-Kanade光流在眼部灰度小图上传播眼睛和虹膜关键点
+"""
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class EyeFlowTracker:
+    """眼部关键点光流跟踪器
+
+    关键帧（FaceMesh推理成功的帧）调用 reset() 记录眼部区域的灰度图和关键点；
+    之后每帧调用 track()，只对同一眼部区域做灰度转换，并用前向-后向光流检查跟踪质量。
+    质量低于阈值时返回 None，由调用方立即对该帧重新运行FaceMesh。
+
+    参与光流的只有 track_slices 指定的分组（眼睛轮廓和虹膜），
+    其余关键点（如面部轮廓）按被跟踪点的位移中位数整体平移。
+    mirror=True 时关键点为镜像坐标（x 对应画面中的 1 - x，见 LandmarkExtractor），画面本身不翻转。
+    眼部灰度图写入两个交替复用的缓冲区。
+    """
+
+    def __init__(self, track_slices, win_size: int = 15, max_level: int = 2, max_fb_error: float = 1.0,
+                 min_quality: float = 0.8, padding: float = 0.5, mirror: bool = False):
+        self.track_rows = np.concatenate([np.arange(s.start, s.stop) for s in track_slices])
+        self.lk_params = dict(
+            winSize=(win_size, win_size),
+            maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        )
+        self.max_fb_error = max_fb_error  # 前向-后向误差上限 (像素)
+        self.min_quality = min_quality    # 通过检查的点所占比例下限
+        self.padding = padding            # 眼部区域边距 (眼部包围盒宽高的比例)
+        self.mirror = mirror
+
+        self.active = False
+        self.box = None          # 眼部区域 (x0, y0, x1, y1)，像素坐标
+        self.prev_gray = None    # 上一帧眼部区域灰度图
+        self.spare_gray = None   # 当前帧灰度图的缓冲区，跟踪成功后与 prev_gray 交换
+        self.prev_pts = None     # 上一帧被跟踪点在眼部区域内的像素坐标，float32 (N, 1, 2)
+        self.quality = 0.0       # 最近一次跟踪的质量
+
+    def reset(self, frame, points: np.ndarray):
+        """用关键帧的结果重新初始化；points 为全帧归一化坐标的 (K, 2) 数组"""
+        height, width = frame.shape[:2]
+        tracked = points[self.track_rows] * (width, height)
+        if self.mirror:
+            tracked[:, 0] = width - tracked[:, 0]
+        min_x, min_y = tracked.min(axis=0)
+        max_x, max_y = tracked.max(axis=0)
+        # 眼部包围盒很扁，边距至少留出一个光流窗口，保证窗口不越出区域
+        win = self.lk_params['winSize'][0]
+        pad_x = max((max_x - min_x) * self.padding, win)
+        pad_y = max((max_y - min_y) * self.padding, win)
+
+        x0 = max(0, int(min_x - pad_x))
+        y0 = max(0, int(min_y - pad_y))
+        x1 = min(width, int(max_x + pad_x) + 1)
+        y1 = min(height, int(max_y + pad_y) + 1)
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            self.active = False
+            return
+
+        self.box = (x0, y0, x1, y1)
+        self.prev_gray = self._patch(frame, self.prev_gray)
+        self.prev_pts = (tracked - (x0, y0)).astype(np.float32).reshape(-1, 1, 2)
+        self.quality = 1.0
+        self.active = True
+
+    def _patch(self, frame, dst: Optional[np.ndarray]) -> np.ndarray:
+        """截取眼部区域并转换为灰度图，写入 dst（尺寸不符时由 OpenCV 重新分配）"""
+        x0, y0, x1, y1 = self.box
+        return cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY, dst=dst)
+
+    def track(self, frame, points: np.ndarray, out: np.ndarray) -> Optional[np.ndarray]:
+        """把 points（上一帧的关键点）传播到当前帧，结果写入 out 并返回；跟踪质量不足时返回 None"""
+        if not self.active:
+            return None
+
+        gray = self._patch(frame, self.spare_gray)
+        next_pts, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.prev_pts, None, **self.lk_params)
+        back_pts, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, next_pts, None, **self.lk_params)
+
+        fb_error = np.abs(back_pts - self.prev_pts).reshape(-1, 2).max(axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+        self.quality = float(good.mean())
+        if self.quality < self.min_quality:
+            self.active = False
+            return None
+
+        # 未通过检查的点保持原位，其余点使用光流结果
+        next_pts[~good] = self.prev_pts[~good]
+        height, width = frame.shape[:2]
+        x0, y0 = self.box[:2]
+        np.copyto(out, points)
+        tracked = (next_pts.reshape(-1, 2) + (x0, y0)) / (width, height)
+        if self.mirror:
+            tracked[:, 0] = 1.0 - tracked[:, 0]
+        shift = np.median(tracked[good] - points[self.track_rows][good], axis=0)
+        out += shift
+        out[self.track_rows] = tracked
+
+        self.spare_gray = self.prev_gray
+        self.prev_gray = gray
+        self.prev_pts = next_pts
+        return out
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+流水线模块 - 各处理阶段运行在独立线程中，通过有界队列连接
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+# 队列满时的处理策略
+DROP_OLDEST = 'drop_oldest'  # 丢弃队列中最旧的元素，保证下游拿到最新数据
+DROP_NEWEST = 'drop_newest'  # 丢弃新放入的元素，保留已排队的数据
+BLOCK = 'block'              # 阻塞生产者直到有空位，不丢任何数据（用于离线回放）
+
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class QueueClosed(Exception):
+    """上游已结束且队列已空"""
+
+
+class BoundedQueue:
+    """带丢弃策略的有界队列
+
+    on_drop(item) 在元素被丢弃（挤出队列或没能入队）时调用，用于归还元素持有的资源（例如帧缓冲区）。
+    """
+
+    def __init__(self, name: str, maxsize: int = 2, policy: str = DROP_OLDEST,
+                 on_drop: Optional[Callable] = None):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"未知的队列策略: {policy}")
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.on_drop = on_drop
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # 统计信息
+        self.put_count = 0
+        self.dropped_count = 0
+        self.max_depth = 0
+
+    def put(self, item, timeout: Optional[float] = None, cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """放入元素，返回是否入队成功；没能入队的元素交给 on_drop
+
+        BLOCK 策略下最多等待 timeout 秒（None 表示一直等待）；cancelled() 返回 True 时提前放弃等待。
+        因超时或放弃而没能入队的元素计入丢弃数。
+        """
+        with self.condition:
+            if self.closed:
+                self._drop(item)
+                return False
+            if len(self.items) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped_count += 1
+                    self._drop(item)
+                    return False
+                elif self.policy == DROP_OLDEST:
+                    self._drop(self.items.popleft())
+                    self.dropped_count += 1
+                else:
+                    if not self._wait_for_space(timeout, cancelled):
+                        if not self.closed:
+                            self.dropped_count += 1
+                        self._drop(item)
+                        return False
+
+            self.items.append(item)
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+            return True
+
+    def _wait_for_space(self, timeout: Optional[float], cancelled: Optional[Callable[[], bool]]) -> bool:
+        """等待队列出现空位（调用时已持有锁），队列关闭、超时或被取消时返回 False"""
+        ready = lambda: len(self.items) < self.maxsize or self.closed
+        if cancelled is None:
+            return self.condition.wait_for(ready, timeout=timeout) and not self.closed
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not ready():
+            if cancelled():
+                return False
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return False
+            self.condition.wait(wait)
+        return not self.closed
+
+    def _drop(self, item):
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def get(self, timeout: Optional[float] = None):
+        """取出元素；超时返回 None，队列关闭且为空时抛出 QueueClosed"""
+        with self.condition:
+            if not self.items:
+                self.condition.wait_for(lambda: self.items or self.closed, timeout=timeout)
+                if not self.items:
+                    if self.closed:
+                        raise QueueClosed(self.name)
+                    return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        """关闭队列，已排队的元素仍可被取出"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def get_stats(self) -> dict:
+        """获取队列统计信息"""
+        with self.condition:
+            return {
+                'depth': len(self.items),
+                'max_depth': self.max_depth,
+                'put': self.put_count,
+                'dropped': self.dropped_count,
+                'policy': self.policy,
+            }
+
+
+class PipelineStage:
+    """流水线阶段：从 source 取数据，调用 func 处理，把结果放入 sink
+
+    source 需要提供 get(timeout) 方法（超时返回 None，结束时抛出 QueueClosed）。
+    func 返回 None 表示该数据不再向下游传递。
+    """
+
+    def __init__(self, name: str, func: Callable, source, sink: Optional[BoundedQueue] = None):
+        self.name = name
+        self.func = func
+        self.source = source
+        self.sink = sink
+        self.thread = None
+        self.running = False
+        self.error = None
+
+        # 统计信息
+        self.processed_count = 0
+        self.busy_time = 0.0
+        self.start_time = 0.0
+
+    def start(self):
+        """启动阶段线程"""
+        self.running = True
+        self.start_time = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name=f"Stage-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """停止阶段线程"""
+        self.running = False
+        if self.thread is not None and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+
+    def _run(self):
+        """阶段线程主循环"""
+        try:
+            while self.running:
+                try:
+                    item = self.source.get(timeout=0.1)
+                except QueueClosed:
+                    break
+                if item is None:
+                    continue
+
+                start = time.perf_counter()
+                result = self.func(item)
+                self.busy_time += time.perf_counter() - start
+                self.processed_count += 1
+
+                if result is not None and self.sink is not None:
+                    # BLOCK 队列一直等到下游取走、队列关闭或本阶段停止，下游暂时卡住时也不丢数据
+                    self.sink.put(result, cancelled=lambda: not self.running)
+        except Exception as e:
+            self.error = e
+            print(f"流水线阶段 {self.name} 出错: {e}")
+        finally:
+            self.running = False
+            if self.sink is not None:
+                self.sink.close()
+
+    def get_stats(self) -> dict:
+        """获取阶段统计信息"""
+        elapsed = max(1e-6, time.monotonic() - self.start_time) if self.start_time else 0.0
+        processed = self.processed_count
+        return {
+            'processed': processed,
+            'fps': processed / elapsed if elapsed else 0.0,
+            'avg_ms': self.busy_time / processed * 1000 if processed else 0.0,
+            'utilization': self.busy_time / elapsed if elapsed else 0.0,
+        }
+
+
+class Pipeline:
+    """由多个阶段和队列组成的处理流水线"""
+
+    def __init__(self):
+        self.stages = []
+        self.queues = []
+        self.extra_stats = {}  # 不在本模块管理的阶段（例如采集线程、主线程渲染）的统计函数
+
+    def add_queue(self, name: str, maxsize: int = 2, policy: str = DROP_OLDEST,
+                  on_drop: Optional[Callable] = None) -> BoundedQueue:
+        """创建并登记一个队列"""
+        queue = BoundedQueue(name, maxsize, policy, on_drop)
+        self.queues.append(queue)
+        return queue
+
+    def add_stage(self, name: str, func: Callable, source, sink: Optional[BoundedQueue] = None) -> PipelineStage:
+        """创建并登记一个阶段"""
+        stage = PipelineStage(name, func, source, sink)
+        self.stages.append(stage)
+        return stage
+
+    def add_external_stats(self, name: str, stats_func: Callable[[], dict]):
+        """登记外部阶段的统计函数"""
+        self.extra_stats[name] = stats_func
+
+    def start(self):
+        """启动所有阶段"""
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        """停止所有阶段并关闭队列"""
+        for queue in self.queues:
+            queue.close()
+        for stage in self.stages:
+            stage.stop()
+
+    def is_alive(self) -> bool:
+        """是否还有阶段在运行"""
+        return any(stage.running for stage in self.stages)
+
+    def get_stats(self) -> dict:
+        """获取所有阶段和队列的统计信息"""
+        stats = {'stages': {}, 'queues': {}}
+        for name, stats_func in self.extra_stats.items():
+            stats['stages'][name] = stats_func()
+        for stage in self.stages:
+            stats['stages'][stage.name] = stage.get_stats()
+        for queue in self.queues:
+            stats['queues'][queue.name] = queue.get_stats()
+        return stats
+
+    def format_stats(self) -> str:
+        """格式化统计信息，并标出占用率最高的阶段（瓶颈）
+
+        丢弃队列下游阶段的吞吐量受上游限制，最慢的阶段不一定吞吐量最低，因此按线程忙碌时间的占比判断。
+        """
+        stats = self.get_stats()
+        stage_stats = stats['stages']
+        bottleneck = None
+        if stage_stats:
+            bottleneck = max(stage_stats, key=lambda name: stage_stats[name].get('utilization', 0.0))
+
+        lines = []
+        for name, s in stage_stats.items():
+            marker = ' <- 瓶颈' if name == bottleneck else ''
+            lines.append(f"  [{name}] {s.get('fps', 0.0):.1f}fps, 平均 {s.get('avg_ms', 0.0):.1f}ms, "
+                         f"占用 {s.get('utilization', 0.0) * 100:.0f}%{marker}")
+        for name, q in stats['queues'].items():
+            lines.append(f"  <{name}> 深度 {q['depth']}/{q['max_depth']}, 入队 {q['put']}, "
+                         f"丢弃 {q['dropped']} ({q['policy']})")
+        return "\n".join(lines)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+预览渲染模块 - 静态叠加层（区域框、提示文字、标签）按分辨率预先渲染一次，
+每帧只用一次向量化拷贝把它合成到画面上，再绘制随帧变化的数值和注视点
+
+预览刷新频率可以低于追踪频率（config.PREVIEW_FPS），渲染不再占用推理的时间。
+"""
+
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+GREEN = (0, 255, 0)
+GRAY = (100, 100, 100)
+WHITE = (255, 255, 255)
+YELLOW = (0, 255, 255)
+CYAN = (255, 255, 0)
+RED = (0, 0, 255)
+ORANGE = (0, 165, 255)
+
+# 注视位置的英文显示，避免中文编码问题
+POSITION_LABELS = {
+    'top': 'TOP',
+    'bottom': 'BOTTOM',
+    'center': 'CENTER',
+    'closed': 'CLOSED (BLINK)',
+    'uncertain': 'UNCERTAIN (LOW CONFIDENCE)',
+    None: 'NONE (EYES CLOSED/NOT DETECTED)',
+}
+
+HELP_TEXT = "Press 'q' to quit, 's' to toggle preview, 'c' to calibrate, 'p' to pause"
+
+
+class OverlayLayer:
+    """预渲染的叠加层：图像和单通道掩码（绘制过的像素为1）
+
+    合成用 cv2.copyTo 按掩码整体拷贝，一次调用完成；全帧 640x480 约十几微秒，
+    比逐个重画文字和图形快，也比 NumPy 的布尔/下标赋值快一个数量级。
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.mask = image.any(axis=2).astype(np.uint8)
+        self.height, self.width = image.shape[:2]
+
+    def blend(self, frame: np.ndarray, x: int = 0, y: int = 0):
+        """把叠加层合成到 frame（原地），(x, y) 为叠加层左上角在 frame 中的位置，超出画面的部分被裁掉"""
+        frame_height, frame_width = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, frame_width), min(y + self.height, frame_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if x0 == 0 and y0 == 0 and x1 - x == self.width == frame_width and y1 - y == self.height == frame_height:
+            cv2.copyTo(self.image, self.mask, frame)
+            return
+        sx, sy = x0 - x, y0 - y
+        cv2.copyTo(self.image[sy:sy + y1 - y0, sx:sx + x1 - x0], self.mask[sy:sy + y1 - y0, sx:sx + x1 - x0],
+                   frame[y0:y1, x0:x1])
+
+
+class PreviewRenderer:
+    """预览画面渲染器
+
+    静态叠加层按 (宽, 高, 状态) 缓存，状态为高亮的区域框（top / bottom / center 表示都不高亮）以及
+    是否检测到眼睛（None，未检测到时的默认中心点也是静态的）。注视点标记预先渲染成小图块，每帧只拷贝到对应位置。
+    """
+
+    def __init__(self, top_threshold: float = 0.3, bottom_threshold: float = 0.7):
+        self.top_threshold = top_threshold
+        self.bottom_threshold = bottom_threshold
+        self.layers: Dict[Tuple[int, int, Optional[str]], OverlayLayer] = {}
+        self.value_x = {}  # 标签之后数值文字的横坐标，与分辨率无关
+        self.marker = self._render_marker()
+
+    def _label_end(self, label: str, scale: float, thickness: int) -> int:
+        """标签文字的宽度（像素）"""
+        if label not in self.value_x:
+            (width, _), _ = cv2.getTextSize(label, FONT, scale, thickness)
+            self.value_x[label] = width
+        return self.value_x[label]
+
+    @staticmethod
+    def _render_marker() -> OverlayLayer:
+        """注视点标记（十字准心和三个圆圈），以图块中心为注视点"""
+        size = 41
+        image = np.zeros((size, size, 3), dtype=np.uint8)
+        c = size // 2
+        cv2.line(image, (c - 15, c), (c + 15, c), YELLOW, 2)
+        cv2.line(image, (c, c - 15), (c, c + 15), YELLOW, 2)
+        cv2.circle(image, (c, c), 8, RED, -1)
+        cv2.circle(image, (c, c), 12, WHITE, 2)
+        cv2.circle(image, (c, c), 20, YELLOW, 1)
+        return OverlayLayer(image)
+
+    def _layer(self, width: int, height: int, state: Optional[str]) -> OverlayLayer:
+        key = (width, height, state)
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = OverlayLayer(self._render_static(width, height, state))
+            self.layers[key] = layer
+        return layer
+
+    def _render_static(self, width: int, height: int, state: Optional[str]) -> np.ndarray:
+        """渲染某个分辨率和状态下的静态叠加层"""
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.rectangle(image, (0, 0), (width, int(height * self.top_threshold)),
+                      GREEN if state == 'top' else GRAY, 2)
+        cv2.rectangle(image, (0, int(height * self.bottom_threshold)), (width, height),
+                      GREEN if state == 'bottom' else GRAY, 2)
+        cv2.putText(image, "GAZE: ", (10, 30), FONT, 0.7, GREEN, 2)
+        cv2.putText(image, "CONF: ", (10, 60), FONT, 0.7, GREEN, 2)
+        cv2.putText(image, "FPS: ", (width - 120, 30), FONT, 0.7, GREEN, 2)
+        cv2.putText(image, "AGE: ", (width - 120, 60), FONT, 0.6, GREEN, 2)
+        cv2.putText(image, HELP_TEXT, (10, height - 10), FONT, 0.5, WHITE, 1)
+        if state is None:
+            # 未检测到眼睛：在屏幕中心显示默认注视点
+            cx, cy = width // 2, height // 2
+            cv2.line(image, (cx - 20, cy), (cx + 20, cy), ORANGE, 2)
+            cv2.line(image, (cx, cy - 20), (cx, cy + 20), ORANGE, 2)
+            cv2.circle(image, (cx, cy), 10, ORANGE, -1)
+            cv2.circle(image, (cx, cy), 15, WHITE, 2)
+            cv2.circle(image, (cx, cy), 25, ORANGE, 1)
+            cv2.putText(image, "DEFAULT CENTER POINT (EYES NOT DETECTED)", (10, 90), FONT, 0.6, ORANGE, 2)
+        return image
+
+    def render(self, frame: np.ndarray, position: Optional[str], confidence: float, gaze_direction,
+               fps: float, frame_age_ms: float, calibration_target: Optional[float] = None,
+               calibration_progress: float = 0.0) -> np.ndarray:
+        """在 frame 上（原地）绘制预览信息并返回 frame"""
+        height, width = frame.shape[:2]
+        detected = position is not None
+        state = (position if position in ('top', 'bottom') else 'center') if detected else None
+        self._layer(width, height, state).blend(frame)
+
+        # 随帧变化的数值
+        cv2.putText(frame, POSITION_LABELS.get(position, str(position)),
+                    (10 + self._label_end("GAZE: ", 0.7, 2), 30), FONT, 0.7, GREEN, 2)
+        cv2.putText(frame, f"{confidence:.2f}", (10 + self._label_end("CONF: ", 0.7, 2), 60), FONT, 0.7, GREEN, 2)
+        cv2.putText(frame, f"{fps:.1f}", (width - 120 + self._label_end("FPS: ", 0.7, 2), 30), FONT, 0.7, GREEN, 2)
+        cv2.putText(frame, f"{frame_age_ms:.0f}ms", (width - 120 + self._label_end("AGE: ", 0.6, 2), 60),
+                    FONT, 0.6, GREEN, 2)
+
+        if gaze_direction is not None:
+            # 把相对偏移放大后映射到画面坐标（简化映射，仅用于直观显示）
+            gaze_x, gaze_y = gaze_direction
+            screen_x = max(0, min(int(width / 2 + gaze_x * width * 60), width - 1))
+            screen_y = max(0, min(int(height / 2 + gaze_y * height * 60), height - 1))
+            marker = self.marker
+            marker.blend(frame, screen_x - marker.width // 2, screen_y - marker.height // 2)
+            cv2.putText(frame, f"GAZE POINT: ({screen_x}, {screen_y})", (10, 90), FONT, 0.6, YELLOW, 2)
+            cv2.putText(frame, f"RAW OFFSET: ({gaze_x:.6f}, {gaze_y:.6f})", (10, 120), FONT, 0.6, CYAN, 2)
+
+        # 校准模式：只显示进度，目标画在全屏校准画面上（见 CalibrationScreen）
+        if calibration_target is not None:
+            cv2.putText(frame, f"Calibrating {calibration_progress * 100:.0f}% - look at the cross on screen",
+                        (10, 175), FONT, 0.7, RED, 2)
+        return frame
+
+
+class CalibrationScreen:
+    """全屏校准画面：在屏幕上的真实位置显示校准目标（十字准心）和进度
+
+    校准拟合的是注视偏移到屏幕纵坐标（屏幕高度的比例）的映射，目标必须画在整个屏幕上，
+    而不是画在预览窗口里。画面缓冲区按屏幕尺寸分配一次，目标变化时重画，进度只重画文字所在的区域。
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.image = np.zeros((height, width, 3), dtype=np.uint8)
+        self.target = None
+
+    def render(self, target: float, progress: float) -> np.ndarray:
+        """target 为目标的屏幕纵坐标比例（0 为顶部），progress 为整体校准进度 (0-1)"""
+        image = self.image
+        width, height = self.width, self.height
+        if target != self.target:
+            self.target = target
+            image[:] = 0
+            x, y = width // 2, int(height * target)
+            cv2.line(image, (x - 40, y), (x + 40, y), RED, 3)
+            cv2.line(image, (x, y - 40), (x, y + 40), RED, 3)
+            cv2.circle(image, (x, y), 6, WHITE, -1)
+        # 进度文字在屏幕左下角，避开所有目标所在的中线
+        image[height - 60:height, 0:width // 3] = 0
+        cv2.putText(image, f"Calibrating {progress * 100:.0f}% - look at the cross", (20, height - 25),
+                    FONT, 0.8, WHITE, 2)
+        return image
@@ -1,15 +1,46 @@
-import pyautogui
+import queue
 import time
 import threading
+from collections import deque
 from typing import Optional
 
+import config
+from instrumentation import COUNTER_THREAD_SPAWNS
+from scroll_backends import ScrollBackend, create_scroll_backend
+from scroll_physics import ScrollPhysics, TickScheduler
+
+# 滚动方向
+SCROLL_UP = 1
+SCROLL_DOWN = -1
+
+# 滚动线程的命令，元组第二项都是发出命令时的 time.monotonic()
+CMD_START = 'start'          # (CMD_START, t, 方向)：持续滚动
+CMD_PULSE = 'pulse'          # (CMD_PULSE, t, 方向, 时长)：滚动一段时间后自动停止
+CMD_STOP = 'stop'            # (CMD_STOP, t)
+CMD_SCROLL_BY = 'scroll_by'  # (CMD_SCROLL_BY, t, 滚动量)：在下一个输出周期追加一次性的滚动量
+CMD_SET_SPEED = 'set_speed'  # (CMD_SET_SPEED, t, 眼球运动速度, 是否只在滚动时生效)
+CMD_SET_VELOCITY = 'set_velocity'  # (CMD_SET_VELOCITY, t, 带符号的速度设定值)
+CMD_SHUTDOWN = 'shutdown'    # (CMD_SHUTDOWN, t)
+
+MAX_CATCH_UP_TICKS = 4  # 滚动线程被延迟时，最多补上的节拍数
+
 class ScreenController:
-    """屏幕控制器类，用于执行滚动等操作"""
+    """屏幕控制器类，用于执行滚动等操作
     
-    def __init__(self):
-        # 设置pyautogui安全设置
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.01  # 操作间隔
+    所有滚动都由一个常驻的滚动线程完成。公开方法只把命令放进队列，立即返回，从不阻塞调用方；
+    滚动线程按顺序执行命令，滚动状态只由它修改，因此状态转换是确定的。
+    is_scrolling_up/is_scrolling_down/current_speed 供其他线程读取，可能比最新命令晚一个周期。
+    
+    滚动线程按 tick_rate 的固定频率节拍运行（见 scroll_physics），每个节拍积分滚动速度，
+    开始滚动时加速、停止时按惯性减速。scroll_speed/max_scroll_speed 以"每 scroll_interval 秒滚动的单位数"表示，
+    acceleration 为每 scroll_interval 秒的速度增量，与节拍频率无关。
+    每个节拍内累积的滚动量（速度积分的整数部分、scroll_by 的滚动量）合并为一次系统事件，
+    由可替换的后端发出（见 scroll_backends）。
+    """
+    
+    def __init__(self, backend: Optional[ScrollBackend] = None):
+        # 滚动输出后端，默认取自 config.SCROLL_BACKEND
+        self.backend = backend if backend is not None else create_scroll_backend(config.SCROLL_BACKEND)
         
         # 滚动参数
         self.scroll_speed = 3  # 每次滚动的像素数
@@ -17,89 +48,212 @@ class ScreenController:
         self.adaptive_speed = True  # 是否启用自适应速度
         self.max_scroll_speed = 8  # 最大滚动速度
         self.acceleration = 0.2  # 加速度
-        self.current_speed = 0  # 当前速度
+        self.current_speed = 0  # 当前速度（每 scroll_interval 秒的单位数）
+        self.momentum_decay = config.SCROLL_MOMENTUM_DECAY  # 停止时的惯性衰减时间常数（秒），0 表示立即停止
+        self.metrics = None  # 可选的 instrumentation.Metrics，用于统计创建的线程数
         
-        # 当前滚动状态
+        # 当前滚动状态（只由滚动线程修改）
         self.is_scrolling_up = False
         self.is_scrolling_down = False
+        self.direction = 0  # SCROLL_UP、SCROLL_DOWN 或 0
+        self.pulse_deadline = None  # 单次滚动的结束时间（time.monotonic）
+        self.velocity_setpoint = None  # 速度控制模式的带符号速度设定值，None 表示按方向和 max_scroll_speed 滚动
+        
+        # 滚动速度积分器和节拍调度器（只由滚动线程使用）
+        self.physics = ScrollPhysics(ease_time=config.SCROLL_EASE_TIME)
+        self.scheduler = TickScheduler(config.SCROLL_TICK_RATE, MAX_CATCH_UP_TICKS, config.CAPTURE_STATS_WINDOW)
+        self.idle_until = 0.0  # 上一个节拍之后一个节拍间隔内到来的请求留到下一个节拍合并
+        
+        # 当前节拍内待发送的滚动量，以及其中最早的请求时间（用于计算输入延迟）
+        self.pending_amount = 0
+        self.pending_since = None
         
-        # 滚动线程控制
-        self.stop_scrolling = False
+        # 输出统计
+        self.output_events = 0
+        self.output_start_time = None
+        self.output_latencies = deque(maxlen=config.CAPTURE_STATS_WINDOW)  # 从请求到事件发出（秒）
+        
+        # 常驻滚动线程及其命令队列，第一次发出命令时启动
+        self.commands = queue.SimpleQueue()
         self.scroll_thread = None
+        self.thread_lock = threading.Lock()
+        
+    def set_backend(self, backend: ScrollBackend):
+        """替换滚动后端（应在开始滚动之前调用）"""
+        self.backend = backend
+        
+    def _send(self, kind, *args):
+        """发送命令给滚动线程（不阻塞）"""
+        if self.scroll_thread is None:
+            with self.thread_lock:
+                if self.scroll_thread is None:
+                    self.scroll_thread = threading.Thread(target=self._scroll_loop, name='ScrollWorker', daemon=True)
+                    self.scroll_thread.start()
+                    if self.metrics is not None:
+                        self.metrics.inc(COUNTER_THREAD_SPAWNS)
+        self.commands.put((kind, time.monotonic()) + args)
         
     def start_scroll_up(self):
         """开始向上滚动"""
-        if not self.is_scrolling_up:
-            self.is_scrolling_up = True
-            self.is_scrolling_down = False
-            self.stop_scrolling = False
-            self.current_speed = 1  # 初始速度
-            if self.scroll_thread is None or not self.scroll_thread.is_alive():
-                self.scroll_thread = threading.Thread(target=self._scroll_up_continuous, daemon=True)
-                self.scroll_thread.start()
+        self._send(CMD_START, SCROLL_UP)
             
     def start_scroll_down(self):
         """开始向下滚动"""
-        if not self.is_scrolling_down:
-            self.is_scrolling_down = True
-            self.is_scrolling_up = False
-            self.stop_scrolling = False
-            self.current_speed = 1  # 初始速度
-            if self.scroll_thread is None or not self.scroll_thread.is_alive():
-                self.scroll_thread = threading.Thread(target=self._scroll_down_continuous, daemon=True)
-                self.scroll_thread.start()
+        self._send(CMD_START, SCROLL_DOWN)
+        
+    def pulse_scroll(self, direction: int, duration: float):
+        """向 direction 方向滚动 duration 秒后自动停止"""
+        self._send(CMD_PULSE, direction, duration)
+        
+    def set_velocity(self, speed: float):
+        """设置带符号的滚动速度（正数向上，负数向下，0 停止），单位与 max_scroll_speed 相同
+        
+        用于连续速度控制：每帧更新设定值，滚动线程在下一个节拍平滑过渡到新速度，不受加速度限制。
+        start_scroll_up/start_scroll_down/pulse_scroll/stop_all_scrolling 会退出速度控制。
+        """
+        self._send(CMD_SET_VELOCITY, speed)
+        
+    def scroll_by(self, amount: int):
+        """滚动一次指定的量（正数向上，负数向下），与同一周期内的其他滚动量合并发送"""
+        self._send(CMD_SCROLL_BY, amount)
             
     def stop_all_scrolling(self):
         """停止所有滚动"""
-        self.stop_scrolling = True
-        self.is_scrolling_up = False
-        self.is_scrolling_down = False
-        self.current_speed = 0  # 重置速度
+        self._send(CMD_STOP)
         
-        # 等待线程结束
-        if self.scroll_thread and self.scroll_thread.is_alive():
-            # 不阻塞主线程，设置超时
-            self.scroll_thread.join(timeout=0.1)
-            self.scroll_thread = None
+    def close(self):
+        """停止滚动并结束滚动线程"""
+        thread = self.scroll_thread
+        if thread is None:
+            return
+        now = time.monotonic()
+        self.commands.put((CMD_STOP, now))
+        self.commands.put((CMD_SHUTDOWN, now))
+        thread.join(timeout=1.0)
+        self.scroll_thread = None
+        self.backend.close()
         
-    def _scroll_up_continuous(self):
-        """持续向上滚动，支持自适应速度"""
-        while self.is_scrolling_up and not self.stop_scrolling:
+    def _scroll_loop(self):
+        """滚动线程主循环：空闲时阻塞等待命令，滚动时在两个节拍之间处理命令"""
+        scheduler = self.scheduler
+        while True:
+            # 等待下一条命令；节拍运行时最多等到下一个节拍或单次滚动结束
+            timeout = scheduler.time_until_next()
+            if timeout is not None and self.pulse_deadline is not None:
+                timeout = min(timeout, max(0.0, self.pulse_deadline - time.monotonic()))
             try:
-                if self.adaptive_speed:
-                    # 自适应速度控制，逐渐加速到最大速度
-                    if self.current_speed < self.max_scroll_speed:
-                        self.current_speed = min(self.max_scroll_speed, 
-                                               self.current_speed + self.acceleration)
-                    actual_speed = int(self.current_speed)
-                else:
-                    actual_speed = self.scroll_speed
-                    
-                pyautogui.scroll(actual_speed)
-                time.sleep(self.scroll_interval)
-            except Exception as e:
-                print(f"向上滚动出错: {e}")
-                break
+                command = self.commands.get(timeout=timeout)
+            except queue.Empty:
+                command = None
+            
+            if command is not None:
+                if command[0] == CMD_SHUTDOWN:
+                    self._set_direction(0)
+                    self.physics.stop()
+                    self._flush_pending()
+                    return
+                self._apply(command)
+                if not scheduler.running and (self.direction != 0 or self.pending_since is not None):
+                    # 空闲后的第一个节拍立即开始；距上一个节拍不足一个间隔的请求留到下一个节拍合并
+                    scheduler.start(max(self.idle_until, command[1]))
+            
+            # 命令持续到来时也按时推进节拍
+            now = time.monotonic()
+            if self.pulse_deadline is not None and now >= self.pulse_deadline:
+                self.pulse_deadline = None
+                self._set_direction(0)
+            due = scheduler.deadline
+            dt = scheduler.tick(now)
+            if dt == 0.0:
+                continue
+            self._tick(dt, due)
+            if not self.physics.moving and self.pending_since is None:
+                scheduler.stop()
+                self.idle_until = now + scheduler.interval
                 
-    def _scroll_down_continuous(self):
-        """持续向下滚动，支持自适应速度"""
-        while self.is_scrolling_down and not self.stop_scrolling:
-            try:
-                if self.adaptive_speed:
-                    # 自适应速度控制，逐渐加速到最大速度
-                    if self.current_speed < self.max_scroll_speed:
-                        self.current_speed = min(self.max_scroll_speed, 
-                                               self.current_speed + self.acceleration)
-                    actual_speed = int(self.current_speed)
-                else:
-                    actual_speed = self.scroll_speed
-                    
-                pyautogui.scroll(-actual_speed)
-                time.sleep(self.scroll_interval)
-            except Exception as e:
-                print(f"向下滚动出错: {e}")
-                break
+    def _tick(self, dt: float, due: float):
+        """推进一个节拍：积分滚动速度，并把本节拍的滚动量作为一次事件发出"""
+        physics = self.physics
+        interval = self.scroll_interval
+        if self.velocity_setpoint is not None:
+            # 速度控制：直接跟随设定值，只保留缓出和惯性，不限制加速度
+            physics.set_target(self.velocity_setpoint / interval)
+            physics.acceleration = float('inf')
+        else:
+            speed = self.max_scroll_speed if self.adaptive_speed else self.scroll_speed
+            physics.set_target(self.direction * speed / interval)
+            physics.acceleration = self.acceleration / interval ** 2 if self.adaptive_speed else 0.0
+        physics.start_velocity = 1 / interval  # 初始速度：每个间隔 1 个单位
+        physics.decay_time = self.momentum_decay
+        amount = physics.step(dt)
+        self.current_speed = abs(physics.velocity) * interval
+        if amount:
+            self._add_pending(amount, due)
+        self._flush_pending()
+        
+    def _add_pending(self, amount: int, requested_at: float):
+        """把滚动量加入当前输出周期"""
+        self.pending_amount += amount
+        if self.pending_since is None or requested_at < self.pending_since:
+            self.pending_since = requested_at
+            
+    def _flush_pending(self):
+        """把当前周期累积的滚动量作为一次事件发出"""
+        if self.pending_since is None:
+            return
+        amount = self.pending_amount
+        requested_at = self.pending_since
+        self.pending_amount = 0
+        self.pending_since = None
+        if amount == 0:
+            return
+        try:
+            self.backend.scroll(amount)
+        except Exception as e:
+            print(f"{'向上' if amount > 0 else '向下'}滚动出错: {e}")
+            self._set_direction(0)
+            self.physics.stop()
+            return
+        now = time.monotonic()
+        if self.output_start_time is None:
+            self.output_start_time = now
+        self.output_events += 1
+        self.output_latencies.append(now - requested_at)
+                
+    def _apply(self, command):
+        """执行一条命令（只在滚动线程中调用）"""
+        kind = command[0]
+        if kind == CMD_START:
+            self.pulse_deadline = None
+            self.velocity_setpoint = None
+            self._set_direction(command[2])
+        elif kind == CMD_PULSE:
+            self.velocity_setpoint = None
+            self._set_direction(command[2])
+            self.pulse_deadline = command[1] + command[3]
+        elif kind == CMD_STOP:
+            self.pulse_deadline = None
+            self.velocity_setpoint = None
+            self._set_direction(0)
+        elif kind == CMD_SET_VELOCITY:
+            speed = command[2]
+            self.pulse_deadline = None
+            self.velocity_setpoint = speed
+            self._set_direction(SCROLL_UP if speed > 0 else SCROLL_DOWN if speed < 0 else 0)
+        elif kind == CMD_SCROLL_BY:
+            self._add_pending(command[2], command[1])
+        elif kind == CMD_SET_SPEED:
+            eye_speed, only_while_scrolling = command[2], command[3]
+            if not only_while_scrolling or self.direction != 0:
+                # 将眼球运动速度(1-10)映射到滚动速度(1-8)
+                self.max_scroll_speed = min(8, max(1, eye_speed))
                 
+    def _set_direction(self, direction: int):
+        """切换滚动方向；加减速和换向由 physics 在节拍中完成"""
+        self.direction = direction
+        self.is_scrolling_up = direction == SCROLL_UP
+        self.is_scrolling_down = direction == SCROLL_DOWN
+        
     def set_scroll_speed(self, speed: int):
         """设置滚动速度"""
         self.scroll_speed = max(1, min(20, speed))  # 限制在1-20之间
@@ -110,10 +264,7 @@ class ScreenController:
         Args:
             eye_speed: 眼球运动速度 (1-10)
         """
-        # 将眼球运动速度(1-10)映射到滚动速度(1-8)
-        scroll_speed = min(8, max(1, eye_speed))
-        self.max_scroll_speed = scroll_speed
-        self.current_speed = min(self.current_speed, scroll_speed)
+        self._send(CMD_SET_SPEED, eye_speed, False)
         
     def update_scroll_speed(self, eye_speed: int):
         """动态更新当前滚动速度
@@ -121,13 +272,40 @@ class ScreenController:
         Args:
             eye_speed: 眼球运动速度 (1-10)
         """
-        if self.is_scrolling_up or self.is_scrolling_down:
-            self.set_scroll_speed_by_eye_movement(eye_speed)
+        self._send(CMD_SET_SPEED, eye_speed, True)
         
     def set_scroll_interval(self, interval: float):
         """设置滚动间隔"""
         self.scroll_interval = max(0.01, min(1.0, interval))  # 限制在0.01-1.0之间
         
+    def set_tick_rate(self, rate: float):
+        """设置滚动节拍频率 (Hz)，下次开始滚动时生效"""
+        self.scheduler.set_rate(rate)
+        
+    def get_tick_stats(self) -> dict:
+        """滚动节拍统计：频率、节拍数和节拍抖动（毫秒）"""
+        return self.scheduler.get_stats()
+        
+    def get_output_stats(self) -> dict:
+        """滚动输出统计：事件数、事件频率和从请求到事件发出的延迟（毫秒）"""
+        latencies = sorted(self.output_latencies)
+        elapsed = time.monotonic() - self.output_start_time if self.output_start_time is not None else 0.0
+        stats = {
+            'backend': self.backend.name,
+            'events': self.output_events,
+            'events_per_second': self.output_events / elapsed if elapsed > 0 else 0.0,
+            'latency_mean_ms': 0.0,
+            'latency_p50_ms': 0.0,
+            'latency_p95_ms': 0.0,
+            'latency_max_ms': 0.0,
+        }
+        if latencies:
+            stats['latency_mean_ms'] = sum(latencies) / len(latencies) * 1000
+            stats['latency_p50_ms'] = latencies[len(latencies) // 2] * 1000
+            stats['latency_p95_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+            stats['latency_max_ms'] = latencies[-1] * 1000
+        return stats
+        
     def get_scroll_status(self) -> dict:
         """获取当前滚动状态"""
         return {
@@ -135,6 +313,7 @@ class ScreenController:
             'scrolling_down': self.is_scrolling_down,
             'scroll_speed': self.scroll_speed,
             'scroll_interval': self.scroll_interval,
+            'tick_rate': self.scheduler.rate,
             'adaptive_speed': self.adaptive_speed,
             'current_speed': self.current_speed,
             'max_scroll_speed': self.max_scroll_speed
@@ -143,11 +322,11 @@ class ScreenController:
     def test_scroll(self):
         """测试滚动功能"""
         print("测试向上滚动...")
-        pyautogui.scroll(5)
+        self.backend.scroll(5)
         time.sleep(0.5)
         
         print("测试向下滚动...")
-        pyautogui.scroll(-5)
+        self.backend.scroll(-5)
         time.sleep(0.5)
         
         print("滚动测试完成")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+滚动输出后端模块 - 把滚动量发送给操作系统（pyautogui / pynput），或只记录在内存中用于测试和基准测试
+"""
+
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# 后端名称
+BACKEND_PYAUTOGUI = 'pyautogui'
+BACKEND_PYNPUT = 'pynput'
+BACKEND_RECORDING = 'recording'
+
+
+class ScrollBackend(ABC):
+    """滚动后端基类：scroll(amount) 发送一次滚轮事件，正数向上，负数向下"""
+
+    name = None
+
+    @abstractmethod
+    def scroll(self, amount: int):
+        """发送一次滚动量为 amount 的滚轮事件"""
+
+    def screen_size(self):
+        """屏幕尺寸 (宽, 高)；后端无法获取时返回 None"""
+        return None
+
+    def close(self):
+        pass
+
+
+class PyAutoGUIBackend(ScrollBackend):
+    """pyautogui 后端"""
+
+    name = BACKEND_PYAUTOGUI
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+        # 保留移动鼠标到屏幕角落紧急停止的安全机制；
+        # PAUSE 会在每次调用后 sleep，滚动节奏由 ScreenController 控制，这里不需要
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0
+
+    def scroll(self, amount: int):
+        self.pyautogui.scroll(amount)
+
+    def screen_size(self):
+        width, height = self.pyautogui.size()
+        return width, height
+
+
+class PynputBackend(ScrollBackend):
+    """pynput 后端"""
+
+    name = BACKEND_PYNPUT
+
+    def __init__(self):
+        from pynput.mouse import Controller
+        self.mouse = Controller()
+
+    def scroll(self, amount: int):
+        self.mouse.scroll(0, amount)
+
+
+class RecordingBackend(ScrollBackend):
+    """内存记录后端：不产生任何系统事件，只记录带时间戳（time.monotonic）的滚动量
+
+    用于无桌面环境下运行完整流程、测试和基准测试。
+    """
+
+    name = BACKEND_RECORDING
+
+    def __init__(self, initial_capacity: int = 4096):
+        self.timestamps = np.zeros(initial_capacity)
+        self.amounts = np.zeros(initial_capacity, dtype=np.int64)
+        self.count = 0
+
+    def scroll(self, amount: int):
+        if self.count == len(self.timestamps):
+            self.timestamps = np.resize(self.timestamps, len(self.timestamps) * 2)
+            self.amounts = np.resize(self.amounts, len(self.amounts) * 2)
+        self.timestamps[self.count] = time.monotonic()
+        self.amounts[self.count] = amount
+        self.count += 1
+
+    def events(self):
+        """已记录的 (时间戳数组, 滚动量数组)"""
+        return self.timestamps[:self.count], self.amounts[:self.count]
+
+    def clear(self):
+        self.count = 0
+
+    def get_stats(self) -> dict:
+        """事件数、总滚动量和事件频率"""
+        timestamps, amounts = self.events()
+        duration = float(timestamps[-1] - timestamps[0]) if self.count > 1 else 0.0
+        return {
+            'events': self.count,
+            'total_up': int(amounts[amounts > 0].sum()),
+            'total_down': int(-amounts[amounts < 0].sum()),
+            'duration_s': duration,
+            'events_per_second': (self.count - 1) / duration if duration > 0 else 0.0,
+        }
+
+
+SCROLL_BACKENDS = {
+    BACKEND_PYAUTOGUI: PyAutoGUIBackend,
+    BACKEND_PYNPUT: PynputBackend,
+    BACKEND_RECORDING: RecordingBackend,
+}
+
+
+def create_scroll_backend(name: str) -> ScrollBackend:
+    """按名称创建滚动后端"""
+    if name not in SCROLL_BACKENDS:
+        raise ValueError(f"未知的滚动后端: {name}")
+    return SCROLL_BACKENDS[name]()
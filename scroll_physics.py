@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+滚动运动模块 - 固定频率的滚动速度积分器和基于截止时间的节拍调度器
+
+速度以 单位/秒 表示，每个节拍按实际经过的时间积分，不足一个单位的滚动量留到下一个节拍，
+因此小数速度和小数加速度都不会因取整而丢失，滚动量也不随节拍频率或调度延迟改变。
+"""
+
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+
+class ScrollPhysics:
+    """滚动速度积分器
+
+    set_target() 设置目标速度（正数向上，负数向下，0 表示停止），step(dt) 推进 dt 秒并返回本节拍的整数滚动量。
+    - 加速：从静止开始时先跳到 start_velocity，之后以不超过 acceleration 的加速度接近目标，
+      离目标较近时按时间常数 ease_time 指数逼近（缓出），到达目标时没有突变
+    - 减速、停止和换向：速度按时间常数 decay_time 指数衰减（惯性），低于 stop_velocity 时停止
+    acceleration 为 0 时不做加减速，速度直接等于目标速度。
+    """
+
+    def __init__(self, acceleration: float = 80.0, ease_time: float = 0.15, decay_time: float = 0.1,
+                 start_velocity: float = 20.0, stop_velocity: float = 5.0):
+        self.acceleration = acceleration        # 单位/秒²
+        self.ease_time = ease_time              # 秒
+        self.decay_time = decay_time            # 秒
+        self.start_velocity = start_velocity    # 单位/秒
+        self.stop_velocity = stop_velocity      # 单位/秒
+        self.velocity = 0.0
+        self.target = 0.0
+        self.remainder = 0.0  # 尚未发出的不足一个单位的滚动量
+
+    @property
+    def moving(self) -> bool:
+        """是否还需要继续推进（正在滚动或正在减速）"""
+        return self.velocity != 0.0 or self.target != 0.0
+
+    def set_target(self, velocity: float):
+        """设置目标速度（单位/秒）"""
+        self.target = velocity
+
+    def stop(self):
+        """立即停止，不保留惯性"""
+        self.target = 0.0
+        self.velocity = 0.0
+        self.remainder = 0.0
+
+    def _decay(self, velocity: float, toward: float, dt: float) -> float:
+        if self.decay_time <= 0:
+            return toward
+        return toward + (velocity - toward) * math.exp(-dt / self.decay_time)
+
+    def step(self, dt: float) -> int:
+        """推进 dt 秒，返回本节拍的滚动量"""
+        target = self.target
+        velocity = self.velocity
+        if self.acceleration <= 0:
+            velocity = target
+        elif target == 0.0 or velocity * target < 0:
+            # 停止或换向：先按惯性减速到停止
+            velocity = self._decay(velocity, 0.0, dt)
+            if abs(velocity) < self.stop_velocity:
+                velocity = 0.0
+        elif abs(velocity) < abs(target):
+            if velocity == 0.0:
+                velocity = math.copysign(min(self.start_velocity, abs(target)), target)
+            else:
+                gap = target - velocity
+                ease = abs(gap) * (1 - math.exp(-dt / self.ease_time)) if self.ease_time > 0 else abs(gap)
+                velocity += math.copysign(min(self.acceleration * dt, ease), gap)
+        elif velocity != target:
+            # 目标速度降低：平滑减速到新目标
+            velocity = self._decay(velocity, target, dt)
+        self.velocity = velocity
+
+        if velocity == 0.0:
+            # 完全停止时丢弃残余的小数部分，下次从零开始
+            self.remainder = 0.0
+            return 0
+        self.remainder += velocity * dt
+        amount = int(self.remainder)  # 向零取整，余数保留到下一个节拍
+        self.remainder -= amount
+        return amount
+
+
+class TickScheduler:
+    """基于截止时间的固定频率节拍调度器
+
+    第 n 个节拍的截止时间固定为 start + n * interval，不会因每次处理耗时而累积漂移。
+    落后超过 max_catch_up 个节拍时跳过错过的节拍，从当前时间重新对齐。
+    每个节拍记录实际时间相对截止时间的延迟，用于统计节拍抖动。
+    """
+
+    def __init__(self, rate: float, max_catch_up: int = 4, stats_window: int = 300):
+        self.max_catch_up = max_catch_up
+        self.set_rate(rate)
+        self.deadline = None
+        self.last_tick = None
+        self.ticks = 0
+        self.resyncs = 0  # 落后太多而重新对齐的次数
+        self.lateness = deque(maxlen=stats_window)  # 秒
+
+    def set_rate(self, rate: float):
+        """设置节拍频率 (Hz)"""
+        self.rate = max(1.0, rate)
+        self.interval = 1.0 / self.rate
+
+    @property
+    def running(self) -> bool:
+        return self.deadline is not None
+
+    def start(self, now: float = None):
+        """从 now 开始计时，第一个节拍立即到期"""
+        self.deadline = time.monotonic() if now is None else now
+        self.last_tick = None
+
+    def stop(self):
+        """停止计时（空闲时调用，下次 start() 重新对齐）"""
+        self.deadline = None
+        self.last_tick = None
+
+    def time_until_next(self, now: float = None) -> float:
+        """距下一个节拍的秒数（已到期时为 0）；未启动时返回 None"""
+        if self.deadline is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.deadline - now)
+
+    def tick(self, now: float = None) -> float:
+        """处理一个到期的节拍，返回距上一个节拍的时间（秒）；未到期时返回 0"""
+        now = time.monotonic() if now is None else now
+        if self.deadline is None or now < self.deadline:
+            return 0.0
+        self.lateness.append(now - self.deadline)
+        self.ticks += 1
+
+        # 按节拍数推进截止时间；落后太多时重新对齐
+        missed = int((now - self.deadline) / self.interval)
+        if missed >= self.max_catch_up:
+            self.resyncs += 1
+            self.deadline = now + self.interval
+        else:
+            self.deadline += (missed + 1) * self.interval
+
+        if self.last_tick is None:
+            dt = self.interval
+        else:
+            dt = min(now - self.last_tick, self.max_catch_up * self.interval)
+        self.last_tick = now
+        return dt
+
+    def get_stats(self) -> dict:
+        """节拍统计：频率、节拍数、重新对齐次数和抖动（实际时间相对截止时间的延迟，毫秒）"""
+        stats = {
+            'rate_hz': self.rate,
+            'ticks': self.ticks,
+            'resyncs': self.resyncs,
+            'jitter_mean_ms': 0.0,
+            'jitter_p50_ms': 0.0,
+            'jitter_p95_ms': 0.0,
+            'jitter_max_ms': 0.0,
+        }
+        if self.lateness:
+            lateness = np.array(self.lateness) * 1000
+            stats['jitter_mean_ms'] = float(lateness.mean())
+            stats['jitter_p50_ms'] = float(np.percentile(lateness, 50))
+            stats['jitter_p95_ms'] = float(np.percentile(lateness, 95))
+            stats['jitter_max_ms'] = float(lateness.max())
+        return stats
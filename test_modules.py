@@ -47,27 +47,587 @@ def test_screen_controller():
         return False
 
 def test_camera():
-    """测试摄像头"""
+    """测试摄像头（或 config.FRAME_SOURCE 指定的帧源）"""
     print("测试摄像头...")
     try:
-        import cv2
-        cap = cv2.VideoCapture(0)
-        if cap.isOpened():
-            print("✓ 摄像头可用")
-            ret, frame = cap.read()
+        from frame_source import open_frame_source
+        source = open_frame_source()
+        if source.is_opened():
+            print(f"✓ 帧源可用: {source.describe()}")
+            ret, frame, timestamp = source.read()
             if ret:
-                print(f"✓ 摄像头读取成功，帧大小: {frame.shape}")
+                print(f"✓ 帧读取成功，帧大小: {frame.shape}，时间戳: {timestamp:.3f}")
             else:
-                print("⚠ 摄像头读取失败")
-            cap.release()
+                print("⚠ 帧读取失败")
+            source.release()
             return True
         else:
-            print("✗ 摄像头不可用")
+            print("✗ 帧源不可用")
             return False
     except Exception as e:
         print(f"✗ 摄像头测试失败: {e}")
         return False
 
+def test_gesture_engine():
+    """用录制的注视位置序列测试手势状态机"""
+    print("测试手势状态机...")
+    try:
+        from gesture import (ACTION_SCROLL_DOWN_ONCE, ACTION_SCROLL_UP_ONCE, ACTION_START_CONTINUOUS_UP, ACTION_STOP,
+                             ACTION_UPDATE_SPEED, GestureEngine)
+        
+        # (位置序列, 采样间隔, 期望的动作序列)
+        cases = [
+            # 向下看再向上看：向下滚动一次；随后持续向上看转为持续滚动，回到中心停止
+            (['center', 'center', 'center', 'bottom', 'top', 'top', 'top', 'center', 'center'], 0.1,
+             [ACTION_SCROLL_DOWN_ONCE, ACTION_SCROLL_DOWN_ONCE, ACTION_START_CONTINUOUS_UP, ACTION_UPDATE_SPEED,
+              ACTION_STOP]),
+            # 向上看再向下看：向上滚动一次，0.5秒后自动停止
+            (['center', 'center', 'top', 'bottom', 'center', 'center', 'center', 'center', 'center', 'center'], 0.1,
+             [ACTION_SCROLL_UP_ONCE, ACTION_SCROLL_UP_ONCE, ACTION_STOP]),
+            # 一直注视中心：没有动作
+            (['center'] * 20, 0.05, []),
+        ]
+        for positions, interval, expected in cases:
+            engine = GestureEngine()
+            actions = []
+            for i, position in enumerate(positions):
+                actions.extend(engine.update(position, i * interval))
+            if actions != expected:
+                print(f"✗ 序列 {positions} 的动作为 {actions}，期望 {expected}")
+                return False
+        print("✓ 手势序列识别正确")
+        
+        # 最近1秒内6次位置变化：速度9
+        engine = GestureEngine()
+        for i, position in enumerate(['center', 'top'] * 3 + ['center']):
+            engine.update(position, i * 0.1)
+        if engine.speed != 9:
+            print(f"✗ 眼球运动速度为 {engine.speed}，期望 9")
+            return False
+        print("✓ 眼球运动速度计算正确")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 手势状态机测试失败: {e}")
+        return False
+
+def test_scroll_physics():
+    """测试滚动速度积分和惯性减速"""
+    print("测试滚动运动...")
+    try:
+        from scroll_physics import ScrollPhysics
+        
+        # 每秒25个单位、60Hz节拍：每个节拍不足一个单位，2秒内应正好滚动50个单位
+        physics = ScrollPhysics(acceleration=0)
+        physics.set_target(25.0)
+        total = sum(physics.step(1 / 60) for _ in range(120))
+        if total != 50:
+            print(f"✗ 滚动总量为 {total}，期望 50")
+            return False
+        print("✓ 小数滚动量累积正确")
+        
+        # 停止后按惯性减速，并在有限时间内完全停止
+        physics = ScrollPhysics()
+        physics.set_target(-160.0)
+        for _ in range(120):
+            physics.step(1 / 60)
+        physics.set_target(0.0)
+        coast = sum(physics.step(1 / 60) for _ in range(60))
+        if coast >= 0 or physics.moving:
+            print(f"✗ 停止后滚动量 {coast}，仍在运动: {physics.moving}")
+            return False
+        print(f"✓ 惯性减速正确（停止后滚动 {coast} 个单位）")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 滚动运动测试失败: {e}")
+        return False
+
+def test_velocity_control():
+    """测试注视偏移到滚动速度的映射，以及速度设定值归零后的惯性停止"""
+    print("测试速度控制...")
+    try:
+        from velocity_control import GazeVelocityMapper
+        from screen_controller import ScreenController, CMD_SET_VELOCITY
+        from scroll_backends import RecordingBackend
+        
+        # 中心区 [0.009, 0.015]：中点 0.012，死区半宽 0.003，再偏移 0.006 达到最大速度
+        mapper = GazeVelocityMapper(max_speed=8.0, saturation=0.006, exponent=1.5)
+        speeds = {offset: mapper.velocity(offset, 0.009, 0.015) for offset in (0.012, 0.0145, 0.0095, 0.018, 0.006,
+                                                                                0.021, 0.03, -0.01)}
+        if any(speeds[offset] != 0.0 for offset in (0.012, 0.0145, 0.0095)):
+            print(f"✗ 死区内速度不为零: {speeds}")
+            return False
+        if not (speeds[0.018] > 0 > speeds[0.006]):
+            print(f"✗ 速度方向错误: 向上 {speeds[0.018]}，向下 {speeds[0.006]}")
+            return False
+        if speeds[0.021] != 8.0 or speeds[0.03] != 8.0 or speeds[-0.01] != -8.0:
+            print(f"✗ 速度没有在 max_speed 处饱和: {speeds}")
+            return False
+        half = speeds[0.018]
+        if not 0 < half < 8.0 or abs(half + speeds[0.006]) > 1e-9:
+            print(f"✗ 死区外的半程偏移速度为 {half}, {speeds[0.006]}")
+            return False
+        print(f"✓ 死区、方向和饱和正确（半程偏移速度 {half:.2f}）")
+        
+        # 直接在当前线程中推进节拍，不启动滚动线程
+        backend = RecordingBackend()
+        controller = ScreenController(backend)
+        controller._apply((CMD_SET_VELOCITY, 0.0, -6.0))
+        for i in range(60):
+            controller._tick(1 / 60, i / 60)
+        _, amounts = backend.events()
+        if not controller.is_scrolling_down or amounts.sum() >= 0:
+            print(f"✗ 负速度设定值没有向下滚动（滚动量 {amounts.sum()}）")
+            return False
+        moving_speed = controller.current_speed
+        controller._apply((CMD_SET_VELOCITY, 1.0, 0.0))
+        ticks = 0
+        while controller.physics.moving and ticks < 600:
+            controller._tick(1 / 60, 1.0 + ticks / 60)
+            ticks += 1
+        if controller.physics.moving or controller.current_speed != 0 or controller.direction != 0:
+            print(f"✗ 速度设定为0后{ticks}个节拍仍未停止（当前速度 {controller.current_speed}）")
+            return False
+        if ticks < 2:
+            print("✗ 速度设定为0后立即停止，没有惯性减速")
+            return False
+        print(f"✓ 速度 {moving_speed:.1f} 设定为0后经过 {ticks} 个节拍减速停止")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 速度控制测试失败: {e}")
+        return False
+
+def test_calibration_fit():
+    """用合成的多点校准样本测试拟合和离群样本剔除"""
+    print("测试校准拟合...")
+    try:
+        import os
+        import tempfile
+        import numpy as np
+        from calibration import CalibrationSession, fit_calibration, load_profile, save_profile
+        
+        # 看中间 offset_y 约0.013，越往上越大；约5%的样本为眨眼造成的离群值
+        rng = np.random.default_rng(0)
+        session = CalibrationSession()
+        while not session.done:
+            offset_y = 0.013 + (0.5 - session.current_target) * 0.01 + rng.normal(0, 0.0005)
+            if rng.random() < 0.05:
+                offset_y += 0.02
+            session.add_sample(rng.normal(0, 0.002), offset_y)
+        profile = fit_calibration(session.offsets[:session.count], session.screen_y[:session.count])
+        if profile is None:
+            print("✗ 校准拟合失败")
+            return False
+        # 屏幕30%/70%处对应的偏移应为0.015/0.011
+        if abs(profile.top_threshold - 0.015) > 0.0005 or abs(profile.bottom_threshold - 0.011) > 0.0005:
+            print(f"✗ 阈值为 上 {profile.top_threshold:.6f}，下 {profile.bottom_threshold:.6f}，期望 0.015/0.011")
+            return False
+        print(f"✓ 校准阈值正确（内点 {profile.inliers}/{profile.samples}）")
+        
+        # 档案保存后能读回；损坏的档案被忽略而不是抛出异常
+        path = os.path.join(tempfile.mkdtemp(), 'default.json')
+        save_profile(profile, path)
+        loaded = load_profile(path)
+        if loaded is None or loaded.top_threshold != profile.top_threshold:
+            print("✗ 校准档案读回失败")
+            return False
+        with open(path, 'w') as f:
+            f.write('{"version": 1, "coeffic')
+        if load_profile(path) is not None:
+            print("✗ 损坏的校准档案没有被忽略")
+            return False
+        print("✓ 校准档案保存、读取正确，损坏的档案被忽略")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 校准拟合测试失败: {e}")
+        return False
+
+def test_adaptive_thresholds():
+    """用缓慢漂移的合成偏移测试自适应阈值"""
+    print("测试自适应阈值...")
+    try:
+        import numpy as np
+        from adaptive_thresholds import AdaptiveThresholds
+        
+        # 中心注视的偏移在两分钟内从0.012漂移到0.015（超过固定上阈值的一半时间会被误判为向上注视）
+        rng = np.random.default_rng(0)
+        adaptive = AdaptiveThresholds()
+        adaptive.set_baseline(0.009, 0.015)
+        misclassified = 0
+        for i in range(30 * 180):
+            timestamp = i / 30
+            offset_y = 0.012 + 0.003 * min(1.0, timestamp / 120) + rng.normal(0, 0.0006)
+            centered = adaptive.bottom_threshold <= offset_y <= adaptive.top_threshold
+            if timestamp > 150:
+                misclassified += not centered
+            if centered:
+                adaptive.update(offset_y, timestamp)
+        if misclassified > 10:
+            print(f"✗ 漂移后仍有 {misclassified} 帧被误判，基线 {adaptive.mean:.6f}")
+            return False
+        print(f"✓ 阈值跟随漂移（平移 {adaptive.shift:.6f}，误判 {misclassified} 帧）")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 自适应阈值测试失败: {e}")
+        return False
+
+def test_eye_openness():
+    """用合成的眼睛纵横比序列测试眨眼检测和单眼有效判断"""
+    print("测试眨眼检测...")
+    try:
+        from eye_openness import EVENT_BLINK, EVENT_EYES_CLOSED, EyeOpennessMonitor
+        
+        monitor = EyeOpennessMonitor()
+        events = []
+        single_eye_frames = 0
+        for i in range(300):
+            left = right = 0.3
+            if 60 <= i < 66:      # 0.2秒眨眼
+                left = right = 0.08
+            elif 120 <= i < 150:  # 眯起右眼
+                right = 0.1
+            elif 200 <= i < 240:  # 闭眼1.3秒
+                left = right = 0.08
+            event = monitor.update((left, right), i / 30)
+            if event is not None:
+                events.append(event)
+            single_eye_frames += monitor.valid == [True, False]
+        if events != [EVENT_BLINK, EVENT_EYES_CLOSED] or single_eye_frames != 30:
+            print(f"✗ 事件 {events}，单眼有效 {single_eye_frames} 帧")
+            return False
+        print(f"✓ 眨眼和长时间闭眼均被检测到（基线 {monitor.baseline[0]:.3f}）")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 眨眼检测测试失败: {e}")
+        return False
+
+def test_gaze_confidence():
+    """用合成的眼睛轮廓和虹膜偏移测试注视置信度"""
+    print("测试注视置信度...")
+    try:
+        import numpy as np
+        from gaze_confidence import GazeConfidence
+        
+        confidence = GazeConfidence(12, slice(0, 12))
+        rng = np.random.default_rng(0)
+        contour = rng.random((12, 2))
+        widths = (0.04, 0.04)
+        good = np.array([[0.001, 0.0005], [0.0012, 0.0006]])
+        for i in range(5):
+            stable = confidence.update(contour, good, widths, 1.0, (1.0, 1.0), (True, True), i / 30)
+        # 右眼虹膜偏到眼眶边缘、左右眼不一致
+        misplaced = confidence.update(contour, np.array([[0.001, 0.0005], [0.001, 0.012]]), widths, 1.0,
+                                      (1.0, 1.0), (True, True), 5 / 30)
+        # 轮廓形状突变
+        jittered = confidence.update(contour + rng.normal(0, 0.004, (12, 2)), good, widths, 1.0, (1.0, 1.0),
+                                     (True, True), 6 / 30)
+        if stable < 0.9 or misplaced > 0.2 or jittered > 0.4:
+            print(f"✗ 置信度异常: 正常 {stable:.2f}，虹膜错位 {misplaced:.2f}，轮廓抖动 {jittered:.2f}")
+            return False
+        print(f"✓ 正常 {stable:.2f}，虹膜错位 {misplaced:.2f}，轮廓抖动 {jittered:.2f}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 注视置信度测试失败: {e}")
+        return False
+
+def test_control_server():
+    """测试控制套接字的命令收发"""
+    print("测试控制接口...")
+    try:
+        import os
+        import tempfile
+        from control_server import ControlServer, send_command
+        
+        received = []
+        def handler(command):
+            received.append(command)
+            return 'ok'
+        
+        path = os.path.join(tempfile.mkdtemp(), 'control.sock')
+        server = ControlServer(path, handler)
+        server.start()
+        try:
+            reply = send_command(path, 'calibrate')
+            # 另一个实例正在监听时拒绝启动，也不删除它的套接字
+            try:
+                ControlServer(path, handler).start()
+                print("✗ 套接字被第二个实例接管")
+                return False
+            except OSError:
+                pass
+            reply_after = send_command(path, 'calibrate')
+        finally:
+            server.stop()
+        if reply != 'ok' or reply_after != 'ok' or [c for c in received if c != 'status'] != ['calibrate'] * 2 or os.path.exists(path):
+            print(f"✗ 控制命令收发异常: 回复 {reply!r}，收到 {received}")
+            return False
+        print("✓ 控制命令收发正常，不接管正在使用的套接字")
+        
+        # 路径上是普通文件时拒绝启动，文件保留
+        with open(path, 'w') as f:
+            f.write('keep')
+        try:
+            ControlServer(path, handler).start()
+            print("✗ 普通文件被当作套接字删除")
+            return False
+        except OSError:
+            pass
+        if not os.path.exists(path):
+            print("✗ 普通文件被删除")
+            return False
+        os.unlink(path)
+        
+        # 遗留的套接字（没有服务端）被删除后正常启动
+        import socket
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = ControlServer(path, handler)
+        server.start()
+        try:
+            reply = send_command(path, 'pause')
+        finally:
+            server.stop()
+        if reply != 'ok':
+            print("✗ 遗留套接字没有被替换")
+            return False
+        print("✓ 拒绝非套接字路径，替换遗留套接字")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 控制接口测试失败: {e}")
+        return False
+
+def synthetic_face_points(tracker):
+    """按 tracker.extractor 的关键点顺序构造一张正视前方的合成人脸（全帧归一化坐标）"""
+    import numpy as np
+    from head_pose import HEAD_POSE_LANDMARKS
+    extractor = tracker.extractor
+    points = np.zeros((len(extractor.indices), 2))
+    # 眼睛轮廓顺序：[眼角, 上, 上, 眼角, 下, 下]
+    contour = np.array([[-1, 0], [-0.3, -0.35], [0.3, -0.35], [1, 0], [0.3, 0.35], [-0.3, 0.35]]) * 0.03
+    iris = np.array([[0.005, 0], [0, -0.005], [-0.005, 0], [0, 0.005]])
+    for side, center in (('left', (0.6, 0.4)), ('right', (0.4, 0.4))):
+        points[extractor.slices[f'{side}_eye']] = contour + center
+        points[extractor.slices[f'{side}_iris']] = iris + center
+    points[extractor.slices['face_bounds']] = [(0.5, 0.15), (0.5, 0.85), (0.25, 0.5), (0.75, 0.5)]
+    points[extractor.slices['head_pose']] = [(0.5, 0.5), (0.5, 0.85), (0.62, 0.4), (0.38, 0.4), (0.58, 0.65),
+                                             (0.42, 0.65)][:len(HEAD_POSE_LANDMARKS)]
+    return points
+
+def wait_until(predicate, timeout: float = 2.0) -> bool:
+    """轮询等待 predicate() 为真（例如等滚动线程处理完命令），超时返回 False"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_low_confidence_stop():
+    """置信度持续偏低时，正在进行的持续滚动应当停止"""
+    print("测试低置信度停止滚动...")
+    try:
+        from main import EyeScrollController, FramePacket
+        from scroll_backends import RecordingBackend
+        
+        controller = EyeScrollController(scroll_backend=RecordingBackend())
+        try:
+            # 持续向下看2秒，进入持续滚动
+            for i in range(60):
+                controller.process_eye_position('bottom', 1.0, i / 30)
+            screen = controller.screen_controller
+            # 滚动状态由滚动线程处理命令时更新
+            if not wait_until(lambda: screen.is_scrolling_down):
+                print("✗ 持续向下注视没有开始滚动")
+                return False
+            # 之后每帧的置信度都低于阈值
+            tracker = controller.eye_tracker
+            tracker.min_confidence = 2.0
+            points = synthetic_face_points(tracker)
+            results = []
+            for i in range(60, 90):
+                packet = FramePacket(None, 0.0, i, i / 30)
+                packet.landmarks = points
+                controller._control_stage(packet)
+                results.append(packet.position)
+            if results[0] != 'uncertain' or results[-1] is not None:
+                print(f"✗ 低置信度帧的结果为 {results[0]} ... {results[-1]}，期望 uncertain ... None")
+                return False
+            if not wait_until(lambda: not screen.is_scrolling_down):
+                print("✗ 置信度持续偏低1秒后仍在滚动")
+                return False
+            print(f"✓ 低置信度 {tracker.max_uncertain_duration}s 后停止滚动")
+        finally:
+            controller.screen_controller.close()
+            controller.log.flush()
+        
+        return True
+    except Exception as e:
+        print(f"✗ 低置信度停止滚动测试失败: {e}")
+        return False
+
+def test_frame_buffer_reuse():
+    """帧源只复用归还的帧缓冲区，未归还的帧不会被覆盖"""
+    print("测试帧缓冲复用...")
+    try:
+        import os
+        import tempfile
+        import cv2
+        import numpy as np
+        from frame_source import PACING_FAST, VideoFileSource
+        
+        path = os.path.join(tempfile.mkdtemp(), 'frames.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+        for i in range(30):
+            writer.write(np.full((48, 64, 3), i * 8, dtype=np.uint8))
+        writer.release()
+        
+        source = VideoFileSource(path, pacing=PACING_FAST)
+        held = [source.read()[1] for _ in range(15)]  # 一直持有、从不归还
+        values = [int(frame.mean()) for frame in held]
+        released = source.read()[1]
+        source.release_frame(released)
+        reused = source.read()[1]
+        for _ in range(10):
+            source.read()
+        source.release()
+        if len({id(frame) for frame in held}) != len(held) or [int(frame.mean()) for frame in held] != values:
+            print("✗ 未归还的帧被覆盖")
+            return False
+        if reused is not released:
+            print("✗ 归还的帧缓冲区没有被复用")
+            return False
+        print("✓ 只复用归还的帧缓冲区")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 帧缓冲复用测试失败: {e}")
+        return False
+
+def test_pipeline_block_queue():
+    """BLOCK 队列的下游暂时卡住时，流水线阶段等待而不丢数据"""
+    print("测试无损流水线...")
+    try:
+        from pipeline import BLOCK, BoundedQueue, PipelineStage, QueueClosed
+        
+        dropped = []
+        source = BoundedQueue('source', 10, BLOCK)
+        sink = BoundedQueue('sink', 1, BLOCK, on_drop=dropped.append)
+        for i in range(5):
+            source.put(i)
+        source.close()
+        stage = PipelineStage('stage', lambda item: item, source, sink)
+        stage.start()
+        time.sleep(0.8)  # 下游卡住的时间超过单次等待
+        received = []
+        try:
+            while True:
+                item = sink.get(timeout=1.0)
+                if item is None:
+                    break
+                received.append(item)
+        except QueueClosed:
+            pass
+        stage.stop()
+        if received != list(range(5)) or dropped or sink.get_stats()['dropped']:
+            print(f"✗ 收到 {received}，丢弃 {dropped}")
+            return False
+        print("✓ 下游卡住时没有丢数据")
+        
+        # 超时没能入队的元素计入丢弃数
+        queue = BoundedQueue('timeout', 1, BLOCK, on_drop=dropped.append)
+        queue.put(0)
+        if queue.put(1, timeout=0.05) or queue.get_stats()['dropped'] != 1 or dropped != [1]:
+            print("✗ 超时丢弃没有计数")
+            return False
+        print("✓ 超时丢弃计入统计")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 无损流水线测试失败: {e}")
+        return False
+
+def test_landmark_recording():
+    """关键点录制分块写入磁盘，异常退出后仍能读取已写入的部分"""
+    print("测试关键点录制...")
+    try:
+        import os
+        import tempfile
+        import numpy as np
+        from landmark_recording import LandmarkRecorder, load_landmark_recording
+        
+        directory = tempfile.mkdtemp()
+        points = np.random.default_rng(0).random((6, 2)).astype(np.float32)
+        
+        # 没有调用 close()（模拟进程被强制结束）：只丢失最后一个未写满的块
+        crashed = os.path.join(directory, 'crashed.npy')
+        recorder = LandmarkRecorder(crashed, list(range(6)), flush_frames=10)
+        for i in range(25):
+            recorder.record(i / 30, points if i % 5 else None)
+        records, meta = load_landmark_recording(crashed)
+        if len(records) != 20 or records['detected'][0] or not np.array_equal(records['points'][1], points):
+            print(f"✗ 异常退出后读取到 {len(records)} 帧，期望 20 帧")
+            return False
+        recorder.file.close()
+        print("✓ 异常退出后读取到已写入的 20/25 帧")
+        
+        path = os.path.join(directory, 'session.npy')
+        recorder = LandmarkRecorder(path, list(range(6)), flush_frames=10)
+        for i in range(25):
+            recorder.record(i / 30, points)
+        recorder.close()
+        records, meta = load_landmark_recording(path)
+        if len(records) != 25 or meta.get('frames') != 25 or os.path.exists(path + '.part'):
+            print(f"✗ 正常结束后读取到 {len(records)} 帧，元数据 {meta}")
+            return False
+        print("✓ 正常结束后保存全部 25 帧")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 关键点录制测试失败: {e}")
+        return False
+
+def test_head_pose_flow_frames():
+    """光流帧不重新估计头部姿态，沿用关键帧的姿态"""
+    print("测试光流帧头部姿态...")
+    try:
+        from eye_tracker import EyeTracker
+        
+        tracker = EyeTracker()
+        tracker.head_pose_enabled = True
+        tracker.min_confidence = 0.0
+        points = synthetic_face_points(tracker)
+        tracker.estimate_eye_position(points, 0.0)
+        keyframe_pose = tracker.last_head_pose
+        if keyframe_pose is None:
+            print("✗ 关键帧没有估计出头部姿态")
+            return False
+        # 光流帧中姿态关键点只是整体平移的旧位置，这里把鼻尖和下巴下移模拟点头
+        nodded = points.copy()
+        rows = tracker.extractor.slices['head_pose']
+        nodded[rows.start:rows.start + 2, 1] += 0.05
+        tracker.estimate_eye_position(nodded, 1 / 30, keyframe=False)
+        if tracker.last_head_pose != keyframe_pose:
+            print("✗ 光流帧重新估计了头部姿态")
+            return False
+        tracker.estimate_eye_position(nodded, 2 / 30)
+        if tracker.last_head_pose == keyframe_pose:
+            print("✗ 关键帧没有更新头部姿态")
+            return False
+        print(f"✓ 光流帧沿用关键帧姿态，下一个关键帧俯仰角 {keyframe_pose[0]:.3f} -> {tracker.last_head_pose[0]:.3f} rad")
+        
+        return True
+    except Exception as e:
+        print(f"✗ 光流帧头部姿态测试失败: {e}")
+        return False
+
 def test_dependencies():
     """测试依赖包"""
     print("测试依赖包...")
@@ -99,7 +659,20 @@ def main():
         ("依赖包", test_dependencies),
         ("摄像头", test_camera),
         ("眼球追踪器", test_eye_tracker),
-        ("屏幕控制器", test_screen_controller)
+        ("屏幕控制器", test_screen_controller),
+        ("手势状态机", test_gesture_engine),
+        ("滚动运动", test_scroll_physics),
+        ("速度控制", test_velocity_control),
+        ("校准拟合", test_calibration_fit),
+        ("自适应阈值", test_adaptive_thresholds),
+        ("眨眼检测", test_eye_openness),
+        ("注视置信度", test_gaze_confidence),
+        ("控制接口", test_control_server),
+        ("低置信度停止滚动", test_low_confidence_stop),
+        ("帧缓冲复用", test_frame_buffer_reuse),
+        ("无损流水线", test_pipeline_block_queue),
+        ("关键点录制", test_landmark_recording),
+        ("光流帧头部姿态", test_head_pose_flow_frames)
     ]
     
     results = []
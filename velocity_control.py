@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+速度控制模块 - 把滤波后的垂直注视偏移直接映射为带符号的滚动速度
+
+与手势模式（gesture.py）不同，速度模式不把偏移归为 top/center/bottom 三类，也不从位置变化频率推断速度；
+每帧的偏移经过带死区的传递曲线得到速度设定值，响应延迟只有一帧。
+"""
+
+# 控制模式
+CONTROL_GESTURE = 'gesture'
+CONTROL_VELOCITY = 'velocity'
+CONTROL_MODES = (CONTROL_GESTURE, CONTROL_VELOCITY)
+
+
+class GazeVelocityMapper:
+    """注视偏移到滚动速度的传递曲线
+
+    中心注视区为 [bottom_threshold, top_threshold]，其中点为零速度点。偏离中点的距离先减去死区半宽
+    （中心区半宽 * dead_zone_scale），再除以 saturation（达到最大速度所需的额外偏移）归一化到 [0, 1]，
+    速度 = max_speed * 归一化偏移 ** exponent。exponent > 1 时小偏移对应的速度更低，便于慢速阅读。
+    偏移大于中点时向上滚动（正速度），小于中点时向下滚动（负速度）。
+    速度单位与 ScreenController.max_scroll_speed 相同（每 scroll_interval 秒滚动的单位数）。
+    """
+
+    def __init__(self, max_speed: float = 8.0, saturation: float = 0.006, exponent: float = 1.5,
+                 dead_zone_scale: float = 1.0):
+        self.max_speed = max_speed
+        self.saturation = saturation
+        self.exponent = exponent
+        self.dead_zone_scale = dead_zone_scale
+
+    def velocity(self, offset_y: float, bottom_threshold: float, top_threshold: float) -> float:
+        """由垂直偏移和当前的中心区阈值计算带符号的滚动速度"""
+        center = (top_threshold + bottom_threshold) / 2
+        dead_zone = (top_threshold - bottom_threshold) / 2 * self.dead_zone_scale
+        distance = offset_y - center
+        excess = abs(distance) - dead_zone
+        if excess <= 0:
+            return 0.0
+        level = min(1.0, excess / self.saturation) if self.saturation > 0 else 1.0
+        speed = self.max_speed * level ** self.exponent
+        return speed if distance > 0 else -speed